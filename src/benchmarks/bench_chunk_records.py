@@ -0,0 +1,97 @@
+# Measures the CPU cost per chunk of moving chunks in and out of MongoDB documents.
+#
+#   cd src && python -m benchmarks.bench_chunk_records
+#
+# Only the conversions are timed, not the driver. "validated" is what ChunkModel
+# used to do, DataChunk(**record) on every read and chunk.dict(by_alias=True,
+# exclude_unset=True) on every write. "trusted" reads into a DataChunkRecord and
+# writes chunk.to_record(), "projected" reads only the fields the index job needs.
+# "construct" is pydantic's DataChunk.model_construct, for reference.
+
+import timeit
+import warnings
+from pydantic import PydanticDeprecationWarning
+from bson.objectid import ObjectId
+from models.db_schemes import DataChunk, DataChunkRecord
+from controllers.IndexJobController import INDEXED_CHUNK_FIELDS
+
+
+def get_records(count: int):
+    project_id, asset_id = ObjectId(), ObjectId()
+
+    # what a chunk of a PDF page looks like in the database
+    metadata = {
+        "source": "assets/files/project/document.pdf",
+        "file_path": "assets/files/project/document.pdf",
+        "page": 12,
+        "total_pages": 240,
+        "format": "PDF 1.7",
+        "title": "Annual report",
+        "author": "",
+        "creator": "Writer",
+        "producer": "LibreOffice 7.3",
+        "start_index": 1200,
+        "end_index": 1700,
+    }
+
+    return [
+        {
+            "_id": ObjectId(),
+            "chunk_text": f"chunk number {idx} " * 30,
+            "chunk_metadata": dict(metadata),
+            "chunk_order": idx + 1,
+            "chunk_project_id": project_id,
+            "chunk_asset_id": asset_id,
+        }
+        for idx in range(count)
+    ]
+
+
+def project(records: list, fields: list):
+    return [
+        { key: value for key, value in record.items() if key == "_id" or key in fields }
+        for record in records
+    ]
+
+
+def time_per_chunk(func, count: int, number: int = 5):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number / count * 1e6
+
+
+def run(count: int = 20000):
+    warnings.simplefilter("ignore", PydanticDeprecationWarning)
+
+    records = get_records(count)
+    projected_records = project(records, INDEXED_CHUNK_FIELDS)
+    new_records = [ { key: value for key, value in record.items() if key != "_id" } for record in records ]
+
+    new_chunks = [ DataChunk(**record) for record in new_records ]
+    assert [ chunk.dict(by_alias=True, exclude_unset=True) for chunk in new_chunks ] == \
+           [ chunk.to_record() for chunk in new_chunks ]
+
+    results = {
+        "read": (
+            time_per_chunk(lambda: [ DataChunk(**record) for record in records ], count),
+            time_per_chunk(lambda: [ DataChunkRecord(record) for record in records ], count),
+            time_per_chunk(lambda: [ DataChunkRecord(record) for record in projected_records ], count),
+            time_per_chunk(lambda: [ DataChunk.model_construct(**record) for record in records ], count),
+        ),
+        "write": (
+            time_per_chunk(lambda: [ chunk.dict(by_alias=True, exclude_unset=True) for chunk in new_chunks ], count),
+            time_per_chunk(lambda: [ chunk.to_record() for chunk in new_chunks ], count),
+            None,
+            None,
+        ),
+    }
+
+    print(f"{count} chunks, CPU time per chunk")
+    for name, (validated, trusted, projected, construct) in results.items():
+        line = f"  {name:>5}: validated {validated:6.2f} us  trusted {trusted:6.2f} us ({validated / trusted:.1f}x)"
+        if projected is not None:
+            line += f"  projected {projected:6.2f} us ({validated / projected:.1f}x)"
+            line += f"  construct {construct:6.2f} us ({validated / construct:.1f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    run()
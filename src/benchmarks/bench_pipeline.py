@@ -0,0 +1,285 @@
+# Drives the whole RAG pipeline through the HTTP API:
+# upload -> process -> push -> search -> answer
+#
+#   pip install -r benchmarks/requirements.txt
+#   cd src && python -m benchmarks.bench_pipeline --projects 4 --files 25 --concurrency 16
+#
+# The app runs in process with local stand-ins for its external services:
+# fake embedding and generation providers (deterministic vectors, configurable latency),
+# mongomock instead of MongoDB and the NumPy vector store instead of Qdrant.
+# Per stage throughput and p50/p95/p99 latencies are printed as JSON
+# (and written to --output) so runs can be compared for regressions.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+
+from dotenv import load_dotenv
+
+# settings missing from the environment come from the example file,
+# the external services they point to are replaced below
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(SRC_DIR, ".env.example"))
+
+os.environ.setdefault("GENERATION_MODEL_ID", "fake-generation")
+os.environ.setdefault("EMBEDDING_MODEL_ID", "fake-embedding")
+
+import httpx
+import numpy as np
+from mongomock_motor import AsyncMongoMockClient
+
+from helpers.config import get_settings
+from controllers import ProjectController
+from controllers.BaseController import BaseController
+from models.enums.IndexJobStatusEnum import IndexJobStatusEnum
+from benchmarks.fake_providers import FakeLLMProviderFactory
+import main
+
+
+STAGES = ["upload", "process", "push", "search", "answer"]
+
+FINISHED_JOB_STATUSES = {
+    IndexJobStatusEnum.COMPLETED.value,
+    IndexJobStatusEnum.FAILED.value,
+    IndexJobStatusEnum.CANCELLED.value,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End to end benchmark of the RAG pipeline")
+    parser.add_argument("--projects", type=int, default=4)
+    parser.add_argument("--files", type=int, default=25, help="files per project")
+    parser.add_argument("--file-words", type=int, default=2000, help="words per file")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap-size", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200, help="search and answer requests each")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--mode", default="dense", choices=["dense", "sparse", "hybrid"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0, help="per embedding batch")
+    parser.add_argument("--generation-latency-ms", type=float, default=200.0)
+    parser.add_argument("--vector-db", default="NUMPY", choices=["NUMPY", "NUMPY_IVF", "QDRANT"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="also write the JSON report to this file")
+    return parser.parse_args()
+
+
+class Corpus:
+
+    # synthetic documents over a small vocabulary, queries reuse the document words
+
+    def __init__(self, seed: int, vocabulary_size: int = 5000):
+        self.random = random.Random(seed)
+        self.vocabulary = [ f"term{idx}" for idx in range(vocabulary_size) ]
+
+    def get_document(self, words: int):
+        # each document leans on its own topic words so the searches have real matches
+        topic = self.random.sample(self.vocabulary, 50)
+        return " ".join([
+            self.random.choice(topic) if self.random.random() < 0.5 else self.random.choice(self.vocabulary)
+            for _ in range(words)
+        ])
+
+    def get_query(self, documents: list):
+        words = self.random.choice(documents).split(" ")
+        start = self.random.randrange(0, max(len(words) - 8, 1))
+        return " ".join(words[start:start + 8])
+
+
+class StageStats:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.start = None
+        self.end = None
+
+    async def timed(self, request):
+        start = time.perf_counter()
+        try:
+            ok = await request()
+        except Exception as e:
+            print(f"{self.name} request failed: {e}", file=sys.stderr)
+            ok = False
+
+        self.latencies.append(time.perf_counter() - start)
+        if not ok:
+            self.errors += 1
+
+    async def run(self, requests: list, concurrency: int):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(request):
+            async with semaphore:
+                await self.timed(request)
+
+        self.start = time.perf_counter()
+        await asyncio.gather(*[ limited(request) for request in requests ])
+        self.end = time.perf_counter()
+
+    def get_report(self):
+        seconds = self.end - self.start if self.start is not None else 0.0
+        latencies = np.array(self.latencies) * 1000
+
+        report = {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "throughput": round(len(self.latencies) / seconds, 2) if seconds > 0 else 0.0,
+        }
+
+        for percentile in [50, 95, 99]:
+            value = np.percentile(latencies, percentile) if len(latencies) else 0.0
+            report[f"p{percentile}_ms"] = round(float(value), 2)
+
+        return report
+
+
+async def upload_file(client: httpx.AsyncClient, project_id: str, file_name: str, text: str):
+    response = await client.post(f"/api/v1/data/upload/{project_id}",
+                                 files={ "file": (file_name, text.encode("utf-8"), "text/plain") })
+    return response.status_code == 200
+
+
+async def process_project(client: httpx.AsyncClient, project_id: str, args):
+    response = await client.post(f"/api/v1/data/process/{project_id}", json={
+        "chunk_size": args.chunk_size,
+        "overlap_size": args.overlap_size,
+        "do_reset": 1,
+    })
+    return response.status_code == 200
+
+
+async def push_project(client: httpx.AsyncClient, project_id: str):
+    # the push is an index job, the stage lasts until the job is finished
+    response = await client.post(f"/api/v1/nlp/index/push/{project_id}", json={ "do_reset": 1 })
+    if response.status_code != 202:
+        return False
+
+    job_id = response.json()["job_id"]
+    while True:
+        response = await client.get(f"/api/v1/nlp/index/jobs/{job_id}")
+        job_status = response.json()["job"]["status"]
+
+        if job_status in FINISHED_JOB_STATUSES:
+            return job_status == IndexJobStatusEnum.COMPLETED.value
+
+        await asyncio.sleep(0.01)
+
+
+async def search_project(client: httpx.AsyncClient, project_id: str, query: str, args):
+    response = await client.post(f"/api/v1/nlp/index/search/{project_id}",
+                                 json={ "text": query, "limit": args.limit, "mode": args.mode })
+    return response.status_code == 200
+
+
+async def answer_project(client: httpx.AsyncClient, project_id: str, query: str, args):
+    response = await client.post(f"/api/v1/nlp/index/answer/{project_id}",
+                                 json={ "text": query, "limit": args.limit, "mode": args.mode })
+    return response.status_code == 200
+
+
+def setup_app(args, run_id: str):
+    # everything the benchmark writes on disk goes under per run names, removed at the end
+    os.environ["VECTOR_DB_BACKEND"] = args.vector_db
+    os.environ["VECTOR_DB_PATH"] = f"bench_vector_db_{run_id}"
+    os.environ["LEXICAL_INDEX_PATH"] = f"bench_lexical_index_{run_id}"
+    get_settings.cache_clear()
+
+    main.AsyncIOMotorClient = AsyncMongoMockClient
+    main.LLMProviderFactory = lambda settings: FakeLLMProviderFactory(
+        settings,
+        embedding_latency=args.embedding_latency_ms / 1000,
+        generation_latency=args.generation_latency_ms / 1000
+    )
+
+    return main.app
+
+
+def cleanup(project_ids: list):
+    settings = get_settings()
+    base_controller = BaseController()
+
+    for project_id in project_ids:
+        shutil.rmtree(ProjectController().get_project_dir(project_id=project_id), ignore_errors=True)
+
+    for db_name in [settings.VECTOR_DB_PATH, settings.LEXICAL_INDEX_PATH]:
+        shutil.rmtree(base_controller.get_database_path(db_name), ignore_errors=True)
+
+
+async def run(args):
+    run_id = f"{int(time.time())}_{os.getpid()}"
+    app = setup_app(args, run_id)
+
+    corpus = Corpus(seed=args.seed)
+    project_ids = [ f"bench{run_id}p{idx}" for idx in range(args.projects) ]
+    documents = {
+        project_id: [ corpus.get_document(args.file_words) for _ in range(args.files) ]
+        for project_id in project_ids
+    }
+    queries = []
+    for _ in range(args.queries):
+        project_id = corpus.random.choice(project_ids)
+        queries.append((project_id, corpus.get_query(documents[project_id])))
+
+    stats = { name: StageStats(name) for name in STAGES }
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            await stats["upload"].run([
+                lambda project_id=project_id, idx=idx, text=text:
+                    upload_file(client, project_id, f"doc{idx}.txt", text)
+                for project_id in project_ids
+                for idx, text in enumerate(documents[project_id])
+            ], args.concurrency)
+
+            await stats["process"].run([
+                lambda project_id=project_id: process_project(client, project_id, args)
+                for project_id in project_ids
+            ], args.concurrency)
+
+            await stats["push"].run([
+                lambda project_id=project_id: push_project(client, project_id)
+                for project_id in project_ids
+            ], args.concurrency)
+
+            await stats["search"].run([
+                lambda project_id=project_id, query=query: search_project(client, project_id, query, args)
+                for project_id, query in queries
+            ], args.concurrency)
+
+            await stats["answer"].run([
+                lambda project_id=project_id, query=query: answer_project(client, project_id, query, args)
+                for project_id, query in queries
+            ], args.concurrency)
+    finally:
+        await app.router.shutdown()
+        cleanup(project_ids)
+
+    return {
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "stages": { name: stage.get_report() for name, stage in stats.items() },
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
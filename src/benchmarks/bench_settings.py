@@ -0,0 +1,62 @@
+# Measures the settings cost of building controllers and data models.
+#
+#   cd src && python -m benchmarks.bench_settings
+#
+# "uncached" clears the settings cache before every construction, which is what
+# every get_settings() call used to cost before settings were memoized.
+
+import os
+import timeit
+
+os.environ.setdefault("APP_NAME", "mini-RAG")
+os.environ.setdefault("APP_VERSION", "0.1")
+os.environ.setdefault("FILE_ALLOWED_TYPES", '["text/plain", "application/pdf"]')
+os.environ.setdefault("FILE_MAX_SIZE", "10")
+os.environ.setdefault("FILE_DEFAULT_CHUNK_SIZE", "512000")
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27007")
+os.environ.setdefault("MONGODB_DATABASE", "mini-rag")
+os.environ.setdefault("GENERATION_BACKEND", "OPENAI")
+os.environ.setdefault("EMBEDDING_BACKEND", "COHERE")
+os.environ.setdefault("VECTOR_DB_BACKEND", "QDRANT")
+os.environ.setdefault("VECTOR_DB_PATH", "qdrant_db")
+
+from helpers.config import get_settings
+from controllers.BaseController import BaseController
+from controllers import DataController, ProjectController
+from models.BaseDataModel import BaseDataModel
+
+
+# roughly what one /data/process request constructs
+REQUEST_OBJECTS = [
+    DataController,
+    ProjectController,
+    BaseController,
+    lambda: BaseDataModel(db_client={}),
+    lambda: BaseDataModel(db_client={}),
+    lambda: BaseDataModel(db_client={}),
+]
+
+
+def build_request_objects(clear_cache: bool = False):
+    for build in REQUEST_OBJECTS:
+        if clear_cache:
+            get_settings.cache_clear()
+        build()
+
+
+def run(number: int = 2000):
+    results = {}
+
+    for name, clear_cache in [("uncached", True), ("cached", False)]:
+        seconds = min(timeit.repeat(lambda: build_request_objects(clear_cache=clear_cache),
+                                    number=number, repeat=3))
+        results[name] = seconds / number * 1e6
+
+    for name, usec in results.items():
+        print(f"{name:>10}: {usec:10.2f} us per request")
+
+    print(f"{'speedup':>10}: {results['uncached'] / results['cached']:10.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+# Measures the prompt assembly cost of one RAG answer.
+#
+#   cd src && python -m benchmarks.bench_template_parser
+#
+# "legacy" replays what TemplateParser.get used to do on every call
+# (two os.path.exists and an __import__ per template), "compiled" is the
+# current parser with templates loaded once at construction.
+
+import os
+import timeit
+from stores.llm.templates.template_parser import TemplateParser
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "stores", "llm", "templates")
+
+
+def legacy_get(language: str, group: str, key: str, vars: dict={}):
+    group_path = os.path.join(TEMPLATES_PATH, "locales", language, f"{group}.py")
+    if not os.path.exists(group_path):
+        group_path = os.path.join(TEMPLATES_PATH, "locales", "en", f"{group}.py")
+
+    if not os.path.exists(group_path):
+        return None
+
+    module = __import__(f"stores.llm.templates.locales.{language}.{group}", fromlist=[group])
+    return getattr(module, key).substitute(vars)
+
+
+def legacy_prompt(query: str, docs: list):
+    system_prompt = legacy_get("en", "rag", "system_prompt")
+    document_prompt = "\n".join([
+        legacy_get("en", "rag", "document_prompt", {"doc_num": idx + 1, "chunk_text": doc})
+        for idx, doc in enumerate(docs)
+    ])
+    footer_prompt = legacy_get("en", "rag", "footer_prompt", {"query": query})
+    return system_prompt, "\n\n".join([document_prompt, footer_prompt])
+
+
+def compiled_prompt(template_parser: TemplateParser, query: str, docs: list):
+    system_prompt = template_parser.get("rag", "system_prompt")
+    document_prompt = "\n".join(template_parser.render_many("rag", "document_prompt", [
+        {"doc_num": idx + 1, "chunk_text": doc}
+        for idx, doc in enumerate(docs)
+    ]))
+    footer_prompt = template_parser.get("rag", "footer_prompt", {"query": query})
+    return system_prompt, "\n\n".join([document_prompt, footer_prompt])
+
+
+def run(number: int = 5000):
+    template_parser = TemplateParser(language="en", default_language="en")
+    query = "How do I reset the device to factory settings?"
+
+    for docs_count in [5, 10, 20]:
+        docs = [f"retrieved chunk number {i} " * 20 for i in range(docs_count)]
+        assert legacy_prompt(query, docs) == compiled_prompt(template_parser, query, docs)
+
+        legacy = min(timeit.repeat(lambda: legacy_prompt(query, docs), number=number, repeat=3))
+        compiled = min(timeit.repeat(lambda: compiled_prompt(template_parser, query, docs), number=number, repeat=3))
+
+        print(f"{docs_count:>3} docs: legacy {legacy / number * 1e6:8.2f} us"
+              f"  compiled {compiled / number * 1e6:8.2f} us  ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    run()
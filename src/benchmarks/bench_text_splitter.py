@@ -0,0 +1,95 @@
+# Compares the built-in TextSplitter with langchain's RecursiveCharacterTextSplitter.
+#
+#   cd src && python -m benchmarks.bench_text_splitter
+#
+# "txt" splits one large text file, "pdf" splits the pages of a generated PDF one
+# by one, the way PorcessController processes them. The PDF text is extracted once
+# up front, only the splitting is timed.
+
+import random
+import tempfile
+import time
+import os
+
+import fitz
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from helpers.text_splitter import TextSplitter, CHARACTER_UNIT, TOKEN_UNIT
+
+
+def get_text(rnd: random.Random, words: int):
+    vocabulary = [
+        "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(2, 10)))
+        for _ in range(5000)
+    ]
+
+    parts = []
+    for idx in range(words):
+        parts.append(rnd.choice(vocabulary))
+        if idx % 15 == 14:
+            parts.append(".\n\n" if rnd.random() < 0.2 else ". ")
+        else:
+            parts.append(" ")
+
+    return "".join(parts)
+
+
+def get_pdf_pages(rnd: random.Random, pages: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "bench.pdf")
+
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            lines = get_text(rnd, 500).replace("\n\n", " ").split(". ")
+            page.insert_text((40, 40), ".\n".join(lines), fontsize=7)
+        doc.save(file_path)
+        doc.close()
+
+        with fitz.open(file_path) as doc:
+            return [ page.get_text() for page in doc ]
+
+
+def time_split(split, texts: list, repeat: int = 3):
+    best, chunks = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = sum(len(split(text)) for text in texts)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    return best, chunks
+
+
+def run(chunk_size: int = 500, overlap_size: int = 50):
+    rnd = random.Random(7)
+
+    inputs = {
+        "txt": [ get_text(rnd, 2_000_000) ],
+        "pdf": get_pdf_pages(rnd, 1000),
+    }
+
+    splitters = {
+        "langchain": RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap_size,
+                                                    length_function=len).split_text,
+        "native": TextSplitter(chunk_size=chunk_size, chunk_overlap=overlap_size,
+                               length_unit=CHARACTER_UNIT).split_text,
+        # a budget in tokens close to the same chunk length (~4 characters per token)
+        "native-token": TextSplitter(chunk_size=chunk_size // 4, chunk_overlap=overlap_size // 4,
+                                     length_unit=TOKEN_UNIT).split_text,
+    }
+
+    for input_name, texts in inputs.items():
+        megabytes = sum(len(text) for text in texts) / 1e6
+        print(f"{input_name}: {megabytes:.1f} MB in {len(texts)} texts")
+
+        baseline = None
+        for splitter_name, split in splitters.items():
+            seconds, chunks = time_split(split, texts)
+            baseline = baseline or seconds
+
+            print(f"  {splitter_name:>13}: {seconds:7.3f} s  {megabytes / seconds:7.1f} MB/s"
+                  f"  {chunks:7d} chunks  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    run()
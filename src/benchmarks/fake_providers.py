@@ -0,0 +1,119 @@
+# Local stand-ins for the LLM providers used by the end to end benchmark.
+#
+# Embeddings are hashed bags of words: deterministic across runs and processes,
+# and texts sharing words land close to each other, so search results are meaningful.
+# Every call sleeps for a configurable latency to model the network round trip.
+
+from stores.llm.LLMInterface import LLMInterface
+from stores.llm.LLMEnum import OpenAIEnum
+import numpy as np
+import asyncio
+import time
+import zlib
+import re
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class FakeLLMProvider(LLMInterface):
+
+    def __init__(self, embedding_latency: float = 0.0, generation_latency: float = 0.0,
+                        default_input_max_input_characters: int = 1000,
+                        default_embedding_batch_size: int = 96):
+
+        self.embedding_latency = embedding_latency
+        self.generation_latency = generation_latency
+
+        self.default_input_max_input_characters = default_input_max_input_characters
+        self.default_embedding_batch_size = default_embedding_batch_size
+
+        self.generation_model_id = None
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        self.enums = OpenAIEnum
+
+    def set_generation_model(self, model_id: str):
+        self.generation_model_id = model_id
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+
+    def process_text(self, text: str):
+        return text[:self.default_input_max_input_characters].strip()
+
+    def get_answer(self, prompt: str):
+        return f"Answer built from a prompt of {len(prompt)} characters."
+
+    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                        temperature: float = None):
+        time.sleep(self.generation_latency)
+        return self.get_answer(prompt)
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                temperature: float = None):
+        await asyncio.sleep(self.generation_latency)
+        return self.get_answer(prompt)
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                      temperature: float = None):
+        await asyncio.sleep(self.generation_latency)
+        for token in self.get_answer(prompt).split(" "):
+            yield token + " "
+
+    def get_vectors(self, texts: list):
+        vectors = np.zeros((len(texts), self.embedding_size), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            for word in WORD_PATTERN.findall(self.process_text(text).lower()):
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.embedding_size] += 1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        return (vectors / norms).tolist()
+
+    def get_batches_count(self, texts: list, batch_size: int = None):
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+        return len(list(self.get_text_batches(texts=texts, batch_size=batch_size)))
+
+    def embed_text(self, text: str, document_type: str = None):
+        return self.embed_texts(texts=[text], document_type=document_type)[0]
+
+    async def aembed_text(self, text: str, document_type: str = None):
+        return (await self.aembed_texts(texts=[text], document_type=document_type))[0]
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        # one round trip per batch, like the real providers
+        time.sleep(self.embedding_latency * self.get_batches_count(texts, batch_size))
+        return self.get_vectors(texts)
+
+    async def aembed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        await asyncio.sleep(self.embedding_latency * self.get_batches_count(texts, batch_size))
+        return self.get_vectors(texts)
+
+    def construct_prompt(self, prompt:str , role:str):
+        return {
+            "role": role,
+            "content": self.process_text(prompt)
+        }
+
+
+class FakeLLMProviderFactory:
+
+    # replaces LLMProviderFactory, whatever backend the settings name
+
+    def __init__(self, config, embedding_latency: float = 0.0, generation_latency: float = 0.0):
+        self.config = config
+        self.embedding_latency = embedding_latency
+        self.generation_latency = generation_latency
+
+    def create(self, provide: str):
+        return FakeLLMProvider(
+            embedding_latency=self.embedding_latency,
+            generation_latency=self.generation_latency,
+            default_input_max_input_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS or 1000,
+            default_embedding_batch_size=self.config.EMBEDDING_DEFAULT_BATCH_SIZE or 96
+        )
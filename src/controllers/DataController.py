@@ -2,6 +2,9 @@ from .BaseController import BaseController
 from .ProjectController import ProjectController
 from fastapi import UploadFile
 from models import ResponseSignal
+from helpers.concurrency import run_in_thread_pool
+import aiofiles
+import hashlib
 import os
 import re
 
@@ -15,11 +18,49 @@ class DataController(BaseController):
         if file.content_type not in self.app_settings.FILE_ALLOWED_TYPES:
             return False, ResponseSignal.FILE_TYPE_NOT_SUPPORTED.value
 
-        if file.size > self.app_settings.FILE_MAX_SIZE * 1024 * 1024:
+        # the declared size is only a hint, the limit is enforced again while writing
+        if file.size is not None and file.size > self.get_max_file_size():
             return False, ResponseSignal.FILE_SIZE_EXCEEDED.value
 
         return True, ResponseSignal.FILE_UPLOADED_SUCCESS.value
 
+    def get_max_file_size(self):
+        return self.app_settings.FILE_MAX_SIZE * 1024 * 1024
+
+    async def write_uploaded_file(self, file: UploadFile, file_path: str):
+        # one pass over the upload: hash, count and write to a temporary file,
+        # which is renamed to file_path only once the whole upload is accepted.
+        # returns (signal, sha256 hex digest, size)
+        tmp_path = file_path + ".part"
+        max_file_size = self.get_max_file_size()
+
+        file_hash = hashlib.sha256()
+        file_size = 0
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > max_file_size:
+                        break
+
+                    # sha256 releases the GIL on large buffers
+                    await run_in_thread_pool(file_hash.update, chunk)
+                    await f.write(chunk)
+
+            if file_size > max_file_size:
+                os.remove(tmp_path)
+                return ResponseSignal.FILE_SIZE_EXCEEDED.value, None, file_size
+
+            os.replace(tmp_path, file_path)
+
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return ResponseSignal.FILE_UPLOADED_SUCCESS.value, file_hash.hexdigest(), file_size
+
     def generate_unique_file_name(self, org_file_name: str, project_id: str):
 
         random_key= self.generate_random_string()  # generate random prefix
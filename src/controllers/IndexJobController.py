@@ -0,0 +1,331 @@
+from .BaseController import BaseController
+from .NLPController import NLPController
+from models import ModelRegistry, IndexJobModel, IndexJobStatusEnum
+from models.db_schemes import Project, IndexJob
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+
+# chunk fields read while indexing, the text and metadata are sent to the vector db and
+# NLPController.get_chunk_record_id needs the asset, order and text
+INDEXED_CHUNK_FIELDS = [ "chunk_text", "chunk_metadata", "chunk_order", "chunk_asset_id" ]
+RECORD_ID_CHUNK_FIELDS = [ "chunk_text", "chunk_order", "chunk_asset_id" ]
+
+
+class IndexJobController(BaseController):
+
+    def __init__(self, model_registry: ModelRegistry, vector_db_client, generation_client, embedding_client,
+                       template_parser):
+        super().__init__()
+
+        self.model_registry = model_registry
+        self.vector_db_client = vector_db_client
+        self.generation_client = generation_client
+        self.embedding_client = embedding_client
+        self.template_parser = template_parser
+
+        self.queue = asyncio.Queue()
+        self.workers = []
+
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+
+        self.workers = [
+            asyncio.create_task(self.worker())
+            for _ in range(self.app_settings.INDEX_JOB_WORKERS)
+        ]
+
+        # pick up the jobs that were still waiting when the app went down, and the running
+        # ones whose lease expired because their worker died
+        job_model = self.model_registry.index_job_model
+
+        requeued = await job_model.requeue_expired_jobs(updated_before=self.get_lease_expiry())
+        if requeued > 0:
+            self.logger.warning(f"Requeued {requeued} index jobs with an expired lease")
+
+        queued_jobs = await job_model.get_jobs_by_status(job_status=IndexJobStatusEnum.QUEUED.value)
+
+        for job in queued_jobs:
+            self.queue.put_nowait(job.id)
+
+    def get_lease_expiry(self):
+        # a running job not updated since then has lost its lease
+        return datetime.utcnow() - timedelta(seconds=self.app_settings.INDEX_JOB_LEASE_SECONDS)
+
+    async def heartbeat(self, job_id: ObjectId, job_model: IndexJobModel):
+        # renews the lease of a running job while a page is embedded or pushed, which can
+        # take longer than the lease on its own
+        interval = max(self.app_settings.INDEX_JOB_LEASE_SECONDS / 3, 1)
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                await job_model.touch_job(job_id=job_id)
+            except Exception as e:
+                self.logger.error(f"Heartbeat of index job {job_id} failed: {e}")
+
+    async def stop(self):
+
+        for worker in self.workers:
+            worker.cancel()
+
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def worker(self):
+
+        while True:
+            job_id = await self.queue.get()
+
+            try:
+                await self.run_job(job_id=job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Index job {job_id} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def submit_job(self, project: Project, do_reset: bool = False, do_delta: bool = False):
+
+        job_model = self.model_registry.index_job_model
+
+        job = await job_model.create_job(job=IndexJob(
+            job_project_id=project.id,
+            job_status=IndexJobStatusEnum.QUEUED.value,
+            job_do_reset=bool(do_reset),
+            job_do_delta=bool(do_delta),
+        ))
+
+        self.queue.put_nowait(job.id)
+
+        return job
+
+    async def get_job(self, job_id: str):
+
+        if not ObjectId.is_valid(job_id):
+            return None
+
+        job_model = self.model_registry.index_job_model
+        return await job_model.get_job(job_id=ObjectId(job_id))
+
+    async def cancel_job(self, job_id: str):
+
+        if not ObjectId.is_valid(job_id):
+            return None
+
+        job_model = self.model_registry.index_job_model
+
+        # a queued job is cancelled right away, a running one stops after its current page
+        job = await job_model.update_job(
+            job_id=ObjectId(job_id),
+            fields={ "job_status": IndexJobStatusEnum.CANCELLED.value },
+            from_status=[ IndexJobStatusEnum.QUEUED.value ]
+        )
+
+        if job is None:
+            job = await job_model.update_job(
+                job_id=ObjectId(job_id),
+                fields={ "job_status": IndexJobStatusEnum.CANCELLING.value },
+                from_status=[ IndexJobStatusEnum.RUNNING.value ]
+            )
+
+        return job
+
+    async def resume_job(self, job_id: str):
+
+        if not ObjectId.is_valid(job_id):
+            return None
+
+        job_model = self.model_registry.index_job_model
+
+        job = await job_model.update_job(
+            job_id=ObjectId(job_id),
+            fields={ "job_status": IndexJobStatusEnum.QUEUED.value },
+            from_status=[ IndexJobStatusEnum.FAILED.value, IndexJobStatusEnum.CANCELLED.value ]
+        )
+
+        if job is None:
+            # a running job is only resumed once its lease expired, its worker is gone
+            job = await job_model.update_job(
+                job_id=ObjectId(job_id),
+                fields={ "job_status": IndexJobStatusEnum.QUEUED.value },
+                from_status=[ IndexJobStatusEnum.RUNNING.value ],
+                updated_before=self.get_lease_expiry()
+            )
+
+        if job is not None:
+            self.queue.put_nowait(job.id)
+
+        return job
+
+    async def run_job(self, job_id: ObjectId):
+
+        job_model = self.model_registry.index_job_model
+
+        job = await job_model.claim_job(job_id=job_id)
+        if job is None:
+            # cancelled while queued or already taken by another worker
+            return
+
+        heartbeat = asyncio.create_task(self.heartbeat(job_id=job.id, job_model=job_model))
+
+        try:
+            await self.index_project_pages(job=job, job_model=job_model)
+        except asyncio.CancelledError:
+            # the app is shutting down, put the job back so it resumes on the next start
+            await job_model.update_job(
+                job_id=job.id,
+                fields={ "job_status": IndexJobStatusEnum.QUEUED.value },
+                from_status=[ IndexJobStatusEnum.RUNNING.value ]
+            )
+            await job_model.update_job(
+                job_id=job.id,
+                fields={ "job_status": IndexJobStatusEnum.CANCELLED.value },
+                from_status=[ IndexJobStatusEnum.CANCELLING.value ]
+            )
+            raise
+        except Exception as e:
+            await job_model.update_job(
+                job_id=job.id,
+                fields={ "job_status": IndexJobStatusEnum.FAILED.value, "job_error": str(e) }
+            )
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def index_project_pages(self, job: IndexJob, job_model: IndexJobModel):
+
+        project_model = self.model_registry.project_model
+        chunk_model = self.model_registry.chunk_model
+
+        project = await project_model.get_project_by_id(project_id=job.job_project_id)
+        if project is None:
+            await job_model.update_job(
+                job_id=job.id,
+                fields={ "job_status": IndexJobStatusEnum.FAILED.value, "job_error": "Project not found" }
+            )
+            return
+
+        nlp_controller = NLPController(
+            vector_db_client=self.vector_db_client,
+            generation_client=self.generation_client,
+            embedding_client=self.embedding_client,
+            template_parser=self.template_parser
+        )
+
+        total_chunks = await chunk_model.count_project_chunks(project_id=project.id)
+        job = await job_model.update_job(job_id=job.id, fields={ "job_total_chunks": total_chunks })
+
+        # in delta mode only the chunks without a point in the collection are embedded
+        do_delta = job.job_do_delta and not job.job_do_reset
+        existing_ids = set()
+        if do_delta:
+            existing_ids = await nlp_controller.get_vector_db_record_ids(project=project)
+
+        # resume right after the last committed chunk
+        page_no = job.job_last_page + 1
+        last_chunk_id = job.job_last_chunk_id
+        idx = job.job_indexed_chunks
+        skipped = job.job_skipped_chunks
+
+        while True:
+            page_chunks = await chunk_model.get_project_chunks_after(project_id=project.id,
+                                                                     last_chunk_id=last_chunk_id,
+                                                                     page_size=self.app_settings.INDEX_JOB_PAGE_SIZE,
+                                                                     fields=INDEXED_CHUNK_FIELDS)
+            if not page_chunks or len(page_chunks) == 0:
+                break
+
+            chunks, chunk_ids = [], []
+            for chunk in page_chunks:
+                chunk_id = nlp_controller.get_chunk_record_id(chunk)
+                if chunk_id not in existing_ids:
+                    chunks.append(chunk)
+                    chunk_ids.append(chunk_id)
+
+            is_inserted = True
+            if len(chunks) > 0:
+                is_inserted = await nlp_controller.index_into_vector_db(
+                    project=project,
+                    chunks=chunks,
+                    chunks_ids=chunk_ids,
+                    do_reset=job.job_do_reset and page_no == 1
+                )
+                await project_model.increment_index_version(project_id=project.id)
+
+            if not is_inserted:
+                await job_model.update_job(
+                    job_id=job.id,
+                    fields={ "job_status": IndexJobStatusEnum.FAILED.value,
+                             "job_error": f"Insert into vector db failed at page {page_no}" }
+                )
+                return
+
+            idx += len(page_chunks)
+            skipped += len(page_chunks) - len(chunks)
+            last_chunk_id = page_chunks[-1].id
+            job = await job_model.commit_job_page(job_id=job.id, page_no=page_no,
+                                                  last_chunk_id=last_chunk_id, indexed_chunks=idx,
+                                                  skipped_chunks=skipped)
+
+            if job.job_status == IndexJobStatusEnum.CANCELLING.value:
+                await job_model.update_job(
+                    job_id=job.id,
+                    fields={ "job_status": IndexJobStatusEnum.CANCELLED.value }
+                )
+                return
+
+            page_no += 1
+
+        deleted = 0
+        if do_delta and len(existing_ids) > 0:
+            deleted = await self.delete_stale_records(project=project, nlp_controller=nlp_controller,
+                                                      existing_ids=existing_ids)
+
+        await job_model.update_job(
+            job_id=job.id,
+            fields={ "job_status": IndexJobStatusEnum.COMPLETED.value, "job_deleted_chunks": deleted }
+        )
+
+    async def delete_stale_records(self, project: Project, nlp_controller: NLPController, existing_ids: set):
+        # points whose chunk no longer exists in the project (removed or changed)
+
+        current_ids = set()
+        async for chunks in self.model_registry.chunk_model.iterate_project_chunks(project_id=project.id,
+                                                                                   fields=RECORD_ID_CHUNK_FIELDS):
+            current_ids.update([ nlp_controller.get_chunk_record_id(chunk) for chunk in chunks ])
+
+        stale_ids = list(existing_ids - current_ids)
+        if len(stale_ids) > 0:
+            await nlp_controller.delete_vector_db_records(project=project, record_ids=stale_ids)
+            await self.model_registry.project_model.increment_index_version(project_id=project.id)
+
+        return len(stale_ids)
+
+    def get_job_progress(self, job: IndexJob):
+
+        progress = 0.0
+        if job.job_total_chunks > 0:
+            progress = round(min(job.job_indexed_chunks / job.job_total_chunks, 1.0) * 100, 2)
+
+        return {
+            "job_id": str(job.id),
+            "status": job.job_status,
+            "do_reset": job.job_do_reset,
+            "do_delta": job.job_do_delta,
+            "total_chunks": job.job_total_chunks,
+            "indexed_chunks": job.job_indexed_chunks,
+            "skipped_chunks": job.job_skipped_chunks,
+            "deleted_chunks": job.job_deleted_chunks,
+            "last_page": job.job_last_page,
+            "last_chunk_id": str(job.job_last_chunk_id) if job.job_last_chunk_id else None,
+            "progress": progress,
+            "error": job.job_error,
+            "created_at": job.job_created_at.isoformat(),
+            "updated_at": job.job_updated_at.isoformat(),
+        }
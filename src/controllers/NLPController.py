@@ -1,61 +1,99 @@
 from .BaseController import BaseController
-from models.db_schemes import Project, DataChunk
+from models.db_schemes import Project, DataChunk, RetrievedDocument
 from stores.llm.LLMEnum import DocumentTypeEnum
+from stores.lexical.LexicalEnum import SearchModeEnum
+from helpers.tracing import span, traced
 from typing import List
+import asyncio
 import json
+import hashlib
+import uuid
 
 
 class NLPController(BaseController):
     
 
-    def __init__(self, vector_db_client, generation_client, embedding_client, template_parser):
+    def __init__(self, vector_db_client, generation_client, embedding_client, template_parser,
+                       answer_cache=None, lexical_index=None):
         super().__init__()
 
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.vector_db_client = vector_db_client
         self.template_parser = template_parser
+        self.answer_cache = answer_cache
+        self.lexical_index = lexical_index
 
     def create_collection_name(self, project_id: str):
         return f"collection_{project_id}".strip()
     
-    def reset_vector_db_collection(self, project: Project):
+    def get_collection_quantization(self, project: Project):
+        # only applied when the collection is created, reset the project index to change it
+        project_quantization = self.app_settings.VECTOR_DB_PROJECT_QUANTIZATION or {}
+        quantization = project_quantization.get(str(project.project_id), self.app_settings.VECTOR_DB_QUANTIZATION)
+
+        return quantization or None
+
+    async def reset_vector_db_collection(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
-        return self.vector_db_client.delete_collection(collection_name=collection_name)
+        return await self.vector_db_client.adelete_collection(collection_name=collection_name)
     
-    def get_vector_db_collection_info(self, project: Project):
+    async def get_vector_db_collection_info(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
-        collection_info = self.vector_db_client.get_collection_info(collection_name=collection_name)
+        collection_info = await self.vector_db_client.aget_collection_info(collection_name=collection_name)
         return json.loads(
             json.dumps(collection_info, default=lambda x: x.__dict__)
         )
 
 
-    def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
-                                   chunks_ids: List[int], 
+    def get_chunk_record_id(self, chunk: DataChunk):
+        # the same text at the same position of the same asset always maps to the same
+        # point id, whatever page it is indexed in, so unchanged chunks can be skipped
+        text_hash = hashlib.sha256(chunk.chunk_text.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{chunk.chunk_asset_id}:{chunk.chunk_order}:{text_hash}"))
+
+    async def get_vector_db_record_ids(self, project: Project):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        if not await self.vector_db_client.ais_collection_existed(collection_name=collection_name):
+            return set()
+
+        return set(await self.vector_db_client.alist_record_ids(collection_name=collection_name))
+
+    async def delete_vector_db_records(self, project: Project, record_ids: list):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.adelete_records(collection_name=collection_name,
+                                                           record_ids=record_ids)
+
+    async def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
+                                   chunks_ids: List[str] = None, 
                                    do_reset: bool = False):
         
         # step1: get collection name
         collection_name = self.create_collection_name(project_id=project.project_id)
 
+        if chunks_ids is None:
+            chunks_ids = [ self.get_chunk_record_id(c) for c in chunks ]
+
         # step2: manage items
         texts = [ c.chunk_text for c in chunks ]
         metadata = [ c.chunk_metadata for c in  chunks]
-        vectors = [
-            self.embedding_client.embed_text(text=text, 
-                                             document_type=DocumentTypeEnum.DOCUMENT.value)
-            for text in texts
-        ]
+        vectors = await self.embedding_client.aembed_texts(texts=texts, 
+                                                           document_type=DocumentTypeEnum.DOCUMENT.value)
+
+        if not vectors or len(vectors) != len(texts):
+            return False
 
         # step3: create collection if not exists
-        _ = self.vector_db_client.create_collection(
+        _ = await self.vector_db_client.acreate_collection(
             collection_name=collection_name,
             embedding_size=self.embedding_client.embedding_size,
             do_reset=do_reset,
+            quantization=self.get_collection_quantization(project=project),
         )
 
         # step4: insert into vector db
-        _ = self.vector_db_client.insert_many(
+        _ = await self.vector_db_client.ainsert_many(
             collection_name=collection_name,
             texts=texts,
             metadata=metadata,
@@ -65,15 +103,61 @@ class NLPController(BaseController):
 
         return True
 
-    def search_vector_db_collection(self, project: Project, query: str, limit: int = 5):
+    @traced("rag.retrieve")
+    async def search_vector_db_collection(self, project: Project, query: str, limit: int = 5,
+                                          vector: list = None, mode: str = SearchModeEnum.DENSE.value):
+
+        if self.lexical_index is None and mode == SearchModeEnum.HYBRID.value:
+            mode = SearchModeEnum.DENSE.value
+
+        if mode == SearchModeEnum.SPARSE.value:
+            if self.lexical_index is None:
+                return False
+
+            # exact term matching, no embedding round trip
+            results = await self.lexical_index.search(project=project, query=query, limit=limit)
+            return results if results else False
+
+        if mode == SearchModeEnum.HYBRID.value:
+            candidates = max(limit, self.app_settings.HYBRID_SEARCH_CANDIDATES)
+
+            dense_results, sparse_results = await asyncio.gather(
+                self.search_dense_collection(project=project, query=query, limit=candidates, vector=vector),
+                self.lexical_index.search(project=project, query=query, limit=candidates)
+            )
+
+            results = self.fuse_results(result_lists=[ dense_results or [], sparse_results or [] ], limit=limit)
+            return results if results else False
+
+        return await self.search_dense_collection(project=project, query=query, limit=limit, vector=vector)
+
+    def fuse_results(self, result_lists: list, limit: int):
+        # reciprocal rank fusion, documents are matched across retrievers by their text
+        rrf_k = self.app_settings.HYBRID_RRF_K
+        scores = {}
+
+        for results in result_lists:
+            for rank, result in enumerate(results):
+                scores[result.text] = scores.get(result.text, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+        return [
+            RetrievedDocument(text=text, score=score)
+            for text, score in ranked
+        ]
+
+    async def search_dense_collection(self, project: Project, query: str, limit: int = 5,
+                                      vector: list = None):
         collection_name = self.create_collection_name(project_id=project.project_id)
 
-        vector = self.embedding_client.embed_text(text=query, document_type=DocumentTypeEnum.QUERY.value)
+        if vector is None:
+            vector = await self.embedding_client.aembed_text(text=query, document_type=DocumentTypeEnum.QUERY.value)
 
         if not vector or len(vector) == 0:
             return False
 
-        results = self.vector_db_client.search_by_vector(
+        results = await self.vector_db_client.asearch_by_vector(
             collection_name=collection_name,
             vector=vector,
             limit=limit,
@@ -84,28 +168,98 @@ class NLPController(BaseController):
 
         return results
 
-    def answer_rag_question(self, project: Project, query: str, limit: int = 5):
+    async def search_vector_db_collection_batch(self, project: Project, queries: List[str], limit: int = 5):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        # one embedding call and one multi-vector search for the whole batch
+        vectors = await self.embedding_client.aembed_texts(texts=queries,
+                                                           document_type=DocumentTypeEnum.QUERY.value)
+
+        if not vectors or len(vectors) != len(queries):
+            return False
+
+        results = await self.vector_db_client.asearch_batch(
+            collection_name=collection_name,
+            vectors=vectors,
+            limit=limit,
+        )
+
+        if results is None:
+            return False
+
+        return [ query_results or [] for query_results in results ]
+
+    @traced("rag.answer")
+    async def answer_rag_question(self, project: Project, query: str, limit: int = 5,
+                                  mode: str = SearchModeEnum.DENSE.value):
         
 
         answer, full_prompt, chat_history = None, None , None
-        retrieved_docs = self.search_vector_db_collection(
+
+        # sparse retrieval only needs the query embedding for the answer cache
+        vector = None
+        if mode != SearchModeEnum.SPARSE.value or self.answer_cache is not None:
+            vector = await self.embedding_client.aembed_text(text=query, document_type=DocumentTypeEnum.QUERY.value)
+
+            if not vector or len(vector) == 0:
+                return answer, full_prompt, chat_history
+
+        if self.answer_cache is not None:
+            with span("rag.answer_cache_lookup"):
+                cached_answer = self.answer_cache.lookup(
+                    project_id=project.project_id,
+                    index_version=project.project_index_version,
+                    vector=vector,
+                    limit=limit,
+                    mode=mode,
+                )
+
+            if cached_answer is not None:
+                return cached_answer["answer"], cached_answer["full_prompt"], cached_answer["chat_history"]
+
+        retrieved_docs = await self.search_vector_db_collection(
             project=project,
             query=query,
             limit=limit,
+            vector=vector,
+            mode=mode,
         )
 
         if not retrieved_docs or len(retrieved_docs) == 0:
             return answer, full_prompt, chat_history
 
+        full_prompt, chat_history = self.construct_rag_prompt(query=query, retrieved_docs=retrieved_docs)
+
+        answer = await self.generation_client.agenerate_text(
+            prompt=full_prompt,
+            chat_history=chat_history
+        )
+
+        if answer and self.answer_cache is not None:
+            self.answer_cache.store(
+                project_id=project.project_id,
+                index_version=project.project_index_version,
+                vector=vector,
+                limit=limit,
+                answer=answer,
+                full_prompt=full_prompt,
+                chat_history=chat_history,
+                mode=mode,
+            )
+        
+        return answer, full_prompt, chat_history
+
+    @traced("rag.construct_prompt")
+    def construct_rag_prompt(self, query: str, retrieved_docs: list):
+
         system_prompt = self.template_parser.get("rag" , "system_prompt")
 
-        document_prompt = "\n".join([
-            self.template_parser.get(
-                "rag" , "document_prompt" , 
+        document_prompt = "\n".join(
+            self.template_parser.render_many("rag" , "document_prompt" , [
                 {"doc_num": idx + 1, "chunk_text": doc.text}
-            ) 
-            for idx , doc in enumerate(retrieved_docs)
-        ])
+                for idx , doc in enumerate(retrieved_docs)
+            ])
+        )
 
         footer_prompt = self.template_parser.get("rag", "footer_prompt", {
             "query": query
@@ -120,13 +274,15 @@ class NLPController(BaseController):
 
         full_prompt = "\n\n".join([document_prompt, footer_prompt])
 
-        answer = self.generation_client.generate_text(
-            prompt=full_prompt,
-            chat_history=chat_history
-        )
-        
-        return answer, full_prompt, chat_history
+        return full_prompt, chat_history
 
+    async def stream_rag_answer(self, query: str, retrieved_docs: list):
+        # yields the answer tokens as the generation model produces them
 
+        full_prompt, chat_history = self.construct_rag_prompt(query=query, retrieved_docs=retrieved_docs)
 
-    
\ No newline at end of file
+        async for token in self.generation_client.generate_text_stream(
+            prompt=full_prompt,
+            chat_history=chat_history
+        ):
+            yield token
@@ -1,10 +1,14 @@
 from .BaseController import BaseController 
 from .ProjectController import ProjectController
 import os
+import time
+import asyncio
 from langchain_community.document_loaders import TextLoader
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from models import ProcessingEnum
+from models import ProcessingEnum, ChunkUnitEnum
+from helpers.concurrency import run_in_process_pool, run_in_thread_pool
+from helpers.text_splitter import TextSplitter
+import fitz
 
 
 
@@ -43,35 +47,202 @@ class PorcessController(BaseController):
             
         return loader.load()
 
-    def process_file_content(self, file_content: list , file_id:str,
-                            chunck_size: int=100, overlap_size: int=20):
-        
-        text_splitter = RecursiveCharacterTextSplitter(
+    def get_text_splitter(self, chunck_size: int=100, overlap_size: int=20,
+                          chunk_unit: str = ChunkUnitEnum.CHARACTER.value):
+        return TextSplitter(
             chunk_size=chunck_size,
             chunk_overlap=overlap_size,
-            length_function=len,
+            length_unit=chunk_unit,
+            # longer chunks would be cut before being embedded
+            max_characters=self.app_settings.INPUT_DAFAULT_MAX_CHARACTERS,
         )
 
-        file_content_texts = [
-            rec.page_content
-            for rec in file_content
-        ]
+    def process_file_content(self, file_content: list , file_id:str,
+                            chunck_size: int=100, overlap_size: int=20,
+                            chunk_unit: str = ChunkUnitEnum.CHARACTER.value):
+        # (text, metadata) pairs, start_index and end_index locate the chunk in its document
 
-        file_content_metadata = [
-            rec.metadata
+        text_splitter = self.get_text_splitter(chunck_size=chunck_size, overlap_size=overlap_size,
+                                               chunk_unit=chunk_unit)
+
+        return [
+            chunk
             for rec in file_content
+            for chunk in text_splitter.create_chunks(text=rec.page_content, metadata=rec.metadata)
         ]
 
-        chunks = text_splitter.create_documents(
-            texts=file_content_texts,
-            metadatas=file_content_metadata   
-        )
+    def is_pdf_file(self, file_id: str):
+        return self.get_file_extnestion(file_id=file_id) == ProcessingEnum.PDF.value
+
+    def get_pdf_pages_count(self, file_id: str):
+        file_path = os.path.join(self.project_path , file_id)
+        if not os.path.exists(file_path):
+            return None
+
+        # opening only reads the document structure, not the page contents
+        with fitz.open(file_path) as doc:
+            return len(doc)
+
+    def iterate_pdf_pages(self, file_id: str, page_start: int = 0, page_end: int = None):
+        # yields (text, metadata) one page at a time, with the metadata PyMuPDFLoader sets
+        file_path = os.path.join(self.project_path , file_id)
+
+        with fitz.open(file_path) as doc:
+            doc_metadata = {
+                key: value
+                for key, value in doc.metadata.items()
+                if type(value) in [str, int]
+            }
+
+            page_end = len(doc) if page_end is None else min(page_end, len(doc))
+
+            for page_number in range(page_start, page_end):
+                page = doc.load_page(page_number)
+
+                yield page.get_text(), {
+                    "source": file_path,
+                    "file_path": file_path,
+                    "page": page_number,
+                    "total_pages": len(doc),
+                    **doc_metadata,
+                }
+
+    def get_pdf_chunks(self, file_id: str, chunck_size: int=100, overlap_size: int=20,
+                       chunk_unit: str = ChunkUnitEnum.CHARACTER.value,
+                       page_start: int = 0, page_end: int = None):
+        # split each page as it is extracted, only the chunks outlive their page
+        file_path = os.path.join(self.project_path , file_id)
+        if not os.path.exists(file_path):
+            return None
+
+        text_splitter = self.get_text_splitter(chunck_size=chunck_size, overlap_size=overlap_size,
+                                               chunk_unit=chunk_unit)
+
+        chunks = []
+        for page_text, page_metadata in self.iterate_pdf_pages(file_id=file_id, page_start=page_start,
+                                                               page_end=page_end):
+            chunks.extend(text_splitter.create_chunks(text=page_text, metadata=page_metadata))
 
         return chunks
 
-        
-    
+    def get_pdf_page_ranges(self, pages_count: int):
+        pages_per_shard = max(self.app_settings.PROCESS_PDF_PAGES_PER_SHARD, 1)
+        return [
+            (page_start, min(page_start + pages_per_shard, pages_count))
+            for page_start in range(0, pages_count, pages_per_shard)
+        ]
 
+    def get_file_chunks(self, file_id: str, chunck_size: int=100, overlap_size: int=20,
+                        chunk_unit: str = ChunkUnitEnum.CHARACTER.value,
+                        page_start: int = 0, page_end: int = None):
+        # load and split one file, returns plain (text, metadata) pairs that are cheap to pickle.
+        # for PDFs page_start and page_end select a shard of the pages
 
-    
+        if self.is_pdf_file(file_id=file_id):
+            return self.get_pdf_chunks(file_id=file_id, chunck_size=chunck_size, overlap_size=overlap_size,
+                                       chunk_unit=chunk_unit, page_start=page_start, page_end=page_end)
+
+        file_content = self.get_file_content(file_id=file_id)
+        if file_content is None:
+            return None
+
+        return self.process_file_content(
+            file_content=file_content,
+            file_id=file_id,
+            chunck_size=chunck_size,
+            overlap_size=overlap_size,
+            chunk_unit=chunk_unit
+        )
+
+    async def load_file_chunks_sharded(self, file_id: str, chunck_size: int=100, overlap_size: int=20,
+                                       chunk_unit: str = ChunkUnitEnum.CHARACTER.value):
+        # a large PDF is split into page ranges processed in parallel on the process pool,
+        # the chunks are put back in page order
+
+        page_ranges = [ (0, None) ]
+        if self.is_pdf_file(file_id=file_id):
+            pages_count = await run_in_thread_pool(self.get_pdf_pages_count, file_id=file_id)
+            if pages_count is None:
+                return None
+
+            page_ranges = self.get_pdf_page_ranges(pages_count=pages_count) or page_ranges
+
+        shards_chunks = await asyncio.gather(*[
+            run_in_process_pool(
+                load_file_chunks,
+                project_id=self.project_id,
+                file_id=file_id,
+                chunck_size=chunck_size,
+                overlap_size=overlap_size,
+                chunk_unit=chunk_unit,
+                page_start=page_start,
+                page_end=page_end
+            )
+            for page_start, page_end in page_ranges
+        ])
+
+        if any(chunks is None for chunks in shards_chunks):
+            return None
+
+        return [ chunk for chunks in shards_chunks for chunk in chunks ]
+
+    async def process_files(self, project_files_ids: dict, chunck_size: int=100, overlap_size: int=20,
+                            chunk_unit: str = ChunkUnitEnum.CHARACTER.value):
+        # fan the files out to the process pool and yield a result per file as soon as
+        # it is ready. A slot is only freed once the caller has consumed the result,
+        # so at most PROCESS_MAX_INFLIGHT_FILES files are held in memory at once.
+
+        slots = asyncio.Semaphore(self.app_settings.PROCESS_MAX_INFLIGHT_FILES)
+
+        async def process_file(asset_id, file_id: str):
+            await slots.acquire()
+
+            started_at = time.perf_counter()
+            file_chunks, error = None, None
+
+            try:
+                file_chunks = await self.load_file_chunks_sharded(
+                    file_id=file_id,
+                    chunck_size=chunck_size,
+                    overlap_size=overlap_size,
+                    chunk_unit=chunk_unit
+                )
+            except Exception as e:
+                error = str(e)
+
+            return {
+                "asset_id": asset_id,
+                "file_id": file_id,
+                "chunks": file_chunks,
+                "error": error,
+                "seconds": time.perf_counter() - started_at,
+            }
+
+        tasks = [
+            asyncio.create_task(process_file(asset_id=asset_id, file_id=file_id))
+            for asset_id, file_id in project_files_ids.items()
+        ]
 
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                try:
+                    yield result
+                finally:
+                    slots.release()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def load_file_chunks(project_id: str, file_id: str, chunck_size: int=100, overlap_size: int=20,
+                     chunk_unit: str = ChunkUnitEnum.CHARACTER.value, page_start: int = 0, page_end: int = None):
+    # process pool entry point, it has to live at module level to be picklable
+    return PorcessController(project_id=project_id).get_file_chunks(
+        file_id=file_id,
+        chunck_size=chunck_size,
+        overlap_size=overlap_size,
+        chunk_unit=chunk_unit,
+        page_start=page_start,
+        page_end=page_end
+    )
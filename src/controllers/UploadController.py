@@ -0,0 +1,193 @@
+from .BaseController import BaseController
+from .ProjectController import ProjectController
+from .DataController import DataController
+from models import ResponseSignal
+from helpers.concurrency import run_in_thread_pool
+import aiofiles
+import hashlib
+import json
+import time
+import os
+import re
+
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+# resumable uploads: a session is created with the expected size, the bytes are sent as
+# ranges (PUT with a Content-Range header) in any number of requests, and completing the
+# session turns the received file into a regular upload. The session state lives on disk
+# next to the partial file, a client that lost a connection asks how much was received
+# and sends the rest.
+class UploadController(BaseController):
+
+    def __init__(self, project_id: str):
+        super().__init__()
+
+        self.project_id = project_id
+        self.project_path = ProjectController().get_project_dir(project_id=project_id)
+
+        self.uploads_path = os.path.join(self.project_path, ".uploads")
+        if not os.path.exists(self.uploads_path):
+            os.makedirs(self.uploads_path)
+
+    def get_session_paths(self, upload_id: str):
+        # (session metadata, partial file)
+        session_path = os.path.join(self.uploads_path, upload_id)
+        return session_path + ".json", session_path + ".part"
+
+    def get_session(self, upload_id: str):
+
+        if not re.fullmatch(r"[a-z0-9]+", upload_id):
+            return None
+
+        meta_path, part_path = self.get_session_paths(upload_id)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, "r") as f:
+            session = json.load(f)
+
+        session["received_size"] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        return session
+
+    def remove_session(self, upload_id: str):
+        for path in self.get_session_paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_mtime(self, path: str):
+        # None when the file is gone, sessions are removed by other requests at any time
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+    def remove_expired_sessions(self):
+        # a session expires FILE_UPLOAD_SESSION_TTL_SECONDS after its last received range
+        expire_before = time.time() - self.app_settings.FILE_UPLOAD_SESSION_TTL_SECONDS
+
+        for file_name in os.listdir(self.uploads_path):
+            if not file_name.endswith(".json"):
+                continue
+
+            upload_id = file_name[:-len(".json")]
+            mtimes = [ self.get_mtime(path) for path in self.get_session_paths(upload_id) ]
+            last_used_at = max([ mtime for mtime in mtimes if mtime is not None ], default=None)
+
+            # removed by a concurrent request since the listing
+            if last_used_at is None:
+                continue
+
+            if last_used_at < expire_before:
+                self.remove_session(upload_id)
+
+    def create_session(self, file_name: str, file_size: int, content_type: str):
+        # returns (session, signal)
+
+        if content_type not in self.app_settings.FILE_ALLOWED_TYPES:
+            return None, ResponseSignal.FILE_TYPE_NOT_SUPPORTED.value
+
+        if file_size <= 0 or file_size > DataController().get_max_file_size():
+            return None, ResponseSignal.FILE_SIZE_EXCEEDED.value
+
+        self.remove_expired_sessions()
+
+        upload_id = self.generate_random_string(length=24)
+        while self.get_session(upload_id) is not None:
+            upload_id = self.generate_random_string(length=24)
+
+        session = {
+            "upload_id": upload_id,
+            "file_name": file_name,
+            "file_size": file_size,
+            "content_type": content_type,
+        }
+
+        meta_path, part_path = self.get_session_paths(upload_id)
+        open(part_path, "wb").close()
+        with open(meta_path, "w") as f:
+            json.dump(session, f)
+
+        session["received_size"] = 0
+
+        return session, ResponseSignal.UPLOAD_SESSION_CREATED.value
+
+    def parse_content_range(self, content_range: str, session: dict):
+        # returns (start, end) inclusive, or None when the range does not fit the session
+
+        match = CONTENT_RANGE_PATTERN.match(content_range.strip()) if content_range else None
+        if match is None:
+            return None
+
+        start, end, total = [ int(value) for value in match.groups() ]
+
+        # a range may overlap what was received (re-sent after a failure), but not leave a gap
+        if total != session["file_size"] or start > end or end >= total or start > session["received_size"]:
+            return None
+
+        return start, end
+
+    async def write_range(self, session: dict, start: int, end: int, stream, content_length: int = None):
+        # writes the request body at start, buffered to FILE_DEFAULT_CHUNK_SIZE writes.
+        # whatever arrived before an interruption stays on disk and counts as received,
+        # a body that does not match the range is not kept. returns the signal
+        _, part_path = self.get_session_paths(session["upload_id"])
+        expected_size = end - start + 1
+
+        if content_length is not None and content_length != expected_size:
+            return ResponseSignal.UPLOAD_RANGE_INVALID.value
+
+        written = 0
+        buffer = bytearray()
+
+        async with aiofiles.open(part_path, "r+b") as f:
+            await f.seek(start)
+
+            async for data in stream:
+                if written + len(buffer) + len(data) > expected_size:
+                    break
+
+                buffer.extend(data)
+                if len(buffer) >= self.app_settings.FILE_DEFAULT_CHUNK_SIZE:
+                    await f.write(buffer)
+                    written += len(buffer)
+                    buffer = bytearray()
+            else:
+                if buffer:
+                    await f.write(buffer)
+                    written += len(buffer)
+
+                if written == expected_size:
+                    return ResponseSignal.UPLOAD_RANGE_SUCCESS.value
+
+            # drop the flushed part of the rejected body
+            await f.truncate(session["received_size"])
+
+        return ResponseSignal.UPLOAD_RANGE_INVALID.value
+
+    def get_file_hash(self, file_path: str):
+        file_hash = hashlib.sha256()
+
+        with open(file_path, "rb") as f:
+            while chunk := f.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    async def complete_session(self, session: dict, file_path: str):
+        # moves the received file to file_path, returns (signal, sha256 hex digest, size)
+
+        if session["received_size"] != session["file_size"]:
+            return ResponseSignal.UPLOAD_INCOMPLETE.value, None, session["received_size"]
+
+        _, part_path = self.get_session_paths(session["upload_id"])
+
+        file_hash = await run_in_thread_pool(self.get_file_hash, part_path)
+        os.replace(part_path, file_path)
+        self.remove_session(session["upload_id"])
+
+        return ResponseSignal.FILE_UPLOADED_SUCCESS.value, file_hash, session["file_size"]
@@ -2,4 +2,5 @@ from .DataController import DataController
 from .ProjectController import ProjectController
 from .ProcessController import PorcessController
 from .NLPController import NLPController
-
+from .IndexJobController import IndexJobController
+from .UploadController import UploadController
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .config import get_settings
+import asyncio
+import functools
+import contextvars
+
+_thread_pool = None
+_process_pool = None
+
+
+def get_thread_pool():
+    global _thread_pool
+
+    if _thread_pool is None:
+        settings = get_settings()
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.THREAD_POOL_MAX_WORKERS,
+            thread_name_prefix="mini-rag-worker"
+        )
+
+    return _thread_pool
+
+
+async def run_in_thread_pool(func, *args, executor: ThreadPoolExecutor = None, **kwargs):
+    # run a blocking call on a bounded thread pool so it does not stall the event loop,
+    # the call sees the context variables of the caller (request trace)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor if executor else get_thread_pool(),
+        functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def shutdown_thread_pool():
+    global _thread_pool
+
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False)
+        _thread_pool = None
+
+
+def get_process_pool():
+    global _process_pool
+
+    if _process_pool is None:
+        settings = get_settings()
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_MAX_WORKERS
+        )
+
+    return _process_pool
+
+
+async def run_in_process_pool(func, *args, **kwargs):
+    # run a CPU bound call in a worker process, func and its arguments must be picklable
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_pool(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_process_pool():
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
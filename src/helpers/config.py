@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from functools import lru_cache
 
 class Setting(BaseSettings):
 
@@ -7,6 +8,9 @@ class Setting(BaseSettings):
     FILE_ALLOWED_TYPES: list
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNK_SIZE: int
+    FILE_BULK_MAX_FILES: int = 100
+    FILE_UPLOAD_MAX_CONCURRENCY: int = 8
+    FILE_UPLOAD_SESSION_TTL_SECONDS: int = 86400
     MONGODB_URL: str
     MONGODB_DATABASE: str
 
@@ -21,6 +25,25 @@ class Setting(BaseSettings):
     GENERATION_MODEL_ID: str = None
     EMBEDDING_MODEL_ID: str = None
     EMBEDDING_MODEL_SIZE: int = None
+    EMBEDDING_DEFAULT_BATCH_SIZE: int = None
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_STORE_MAX_ENTRIES: int = 1000000
+
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+
+    SEARCH_BATCH_MAX_QUERIES: int = 500
+
+    LEXICAL_INDEX_ENABLED: bool = True
+    LEXICAL_INDEX_PATH: str = "lexical_index"
+    LEXICAL_BM25_K1: float = 1.2
+    LEXICAL_BM25_B: float = 0.75
+    HYBRID_SEARCH_CANDIDATES: int = 20
+    HYBRID_RRF_K: int = 60
 
     INPUT_DAFAULT_MAX_CHARACTERS: int = None
     GENERATION_DAFAULT_MAX_TOKENS: int = None
@@ -29,6 +52,39 @@ class Setting(BaseSettings):
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str 
     VECTOR_DB_DISTANCE_METHOD: str = None
+    VECTOR_DB_IVF_NLIST: int = 0
+    VECTOR_DB_IVF_NPROBE: int = 16
+
+    VECTOR_DB_URL: str = None
+    VECTOR_DB_API_KEY: str = None
+    VECTOR_DB_PREFER_GRPC: bool = False
+    VECTOR_DB_GRPC_PORT: int = 6334
+    VECTOR_DB_TIMEOUT: int = None
+    VECTOR_DB_UPSERT_PARALLEL: int = 4
+    VECTOR_DB_UPSERT_WAIT: bool = False
+    VECTOR_DB_HNSW_M: int = None
+    VECTOR_DB_HNSW_EF_CONSTRUCT: int = None
+    VECTOR_DB_HNSW_EF: int = None
+    VECTOR_DB_INDEXING_THRESHOLD: int = None
+
+    VECTOR_DB_QUANTIZATION: str = None
+    VECTOR_DB_PROJECT_QUANTIZATION: dict = {}
+    VECTOR_DB_QUANTIZATION_OVERSAMPLING: float = 2.0
+    VECTOR_DB_BINARY_QUANTIZATION_OVERSAMPLING: float = 64.0
+    VECTOR_DB_QUANTIZATION_MIN_CANDIDATES: int = 100
+    VECTOR_DB_QUANTIZATION_RESCORE: bool = True
+    VECTOR_DB_QUANTIZATION_ALWAYS_RAM: bool = True
+
+    THREAD_POOL_MAX_WORKERS: int = 8
+    PROCESS_POOL_MAX_WORKERS: int = None
+    PROCESS_MAX_INFLIGHT_FILES: int = 4
+    PROCESS_PDF_PAGES_PER_SHARD: int = 100
+
+    INDEX_JOB_WORKERS: int = 2
+    INDEX_JOB_PAGE_SIZE: int = 200
+    INDEX_JOB_LEASE_SECONDS: int = 300
+
+    TRACING_RESPONSE_TIMINGS: bool = False
 
     DEFAULT_LANG: str = "en"
     PRIMARY_LANG: str = "en"
@@ -38,5 +94,12 @@ class Setting(BaseSettings):
 
 
 
+@lru_cache(maxsize=1)
 def get_settings():
-    return Setting()
\ No newline at end of file
+    # parsed once per process, call reload_settings() to pick up .env changes
+    return Setting()
+
+
+def reload_settings():
+    get_settings.cache_clear()
+    return get_settings()
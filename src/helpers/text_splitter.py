@@ -0,0 +1,219 @@
+from bisect import bisect_left
+import numpy as np
+import re
+
+
+SPACE_PATTERN = re.compile(r"\s")
+NON_SPACE_PATTERN = re.compile(r"\S")
+# whitespace allowed between the two newlines of a paragraph break
+BLANK_CHARACTERS = " \t\r"
+
+# character classes for the token count
+SPACE_CHARACTER = 0
+WORD_CHARACTER = 1
+PUNCTUATION_CHARACTER = 2
+
+
+def get_character_classes():
+    # indexed by code point, every code point above 255 uses the last entry.
+    # ASCII letters, digits and underscore, and any non space character beyond ASCII,
+    # are word characters
+    classes = np.full(257, WORD_CHARACTER, dtype=np.int8)
+
+    for code in range(256):
+        char = chr(code)
+        if char.isspace():
+            classes[code] = SPACE_CHARACTER
+        elif code < 128 and not (char.isalnum() or char == "_"):
+            classes[code] = PUNCTUATION_CHARACTER
+
+    return classes
+
+
+CHARACTER_CLASSES = get_character_classes()
+# whitespace beyond the table, as str.isspace() sees it
+UNICODE_SPACES = np.array([ 0x1680, *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F, 0x205F, 0x3000 ],
+                          dtype=np.uint32)
+
+CHARACTER_UNIT = "character"
+TOKEN_UNIT = "token"
+
+# average length of a token for budgets given in tokens, as the usual estimate for English prose
+CHARACTERS_PER_TOKEN = 4
+
+
+class TextSplitter:
+
+    # Splits a text into chunks of at most chunk_size characters or (approximate) tokens,
+    # consecutive chunks sharing up to chunk_overlap of the same unit.
+    #
+    # Chunks are offsets into the text, found one after the other by searching backwards
+    # from the largest allowed end: the last paragraph break that keeps the chunk at least
+    # half full, else the last line break, else the last space. The searches run inside
+    # str.rfind and compiled patterns, so the cost grows with the number of chunks rather
+    # than with the number of words, and the text is only sliced for the chunks returned.
+    # A word larger than a chunk is cut.
+    #
+    # Tokens are approximated as runs of word characters and single punctuation marks,
+    # which is close to what subword tokenizers produce for prose and never fewer.
+    # max_characters caps the length of a chunk whatever its unit, a chunk within its token
+    # budget can still be longer when its words are.
+
+    def __init__(self, chunk_size: int = 100, chunk_overlap: int = 20, length_unit: str = CHARACTER_UNIT,
+                 max_characters: int = None):
+
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        if length_unit not in [CHARACTER_UNIT, TOKEN_UNIT]:
+            raise ValueError(f"Unknown length unit: {length_unit}")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = min(max(chunk_overlap, 0), chunk_size - 1)
+        self.length_unit = length_unit
+        self.max_characters = max_characters
+
+    @staticmethod
+    def get_token_starts(text: str):
+        # classified over the code points at once, array indexes are the str indexes
+        code_points = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+        classes = CHARACTER_CLASSES[np.minimum(code_points, 256)]
+
+        high = np.flatnonzero(code_points >= UNICODE_SPACES[0])
+        if len(high):
+            classes[high[np.isin(code_points[high], UNICODE_SPACES)]] = SPACE_CHARACTER
+
+        # a token starts on every punctuation mark and on the first character of every word
+        is_word = classes == WORD_CHARACTER
+        is_start = classes == PUNCTUATION_CHARACTER
+        is_start[:1] |= is_word[:1]
+        is_start[1:] |= is_word[1:] & ~is_word[:-1]
+
+        return np.flatnonzero(is_start).tolist()
+
+    @staticmethod
+    def skip_spaces(text: str, position: int):
+        match = NON_SPACE_PATTERN.search(text, position)
+        return match.start() if match else len(text)
+
+    @staticmethod
+    def strip_end(text: str, position: int):
+        while position > 0 and text[position - 1].isspace():
+            position -= 1
+        return position
+
+    @staticmethod
+    def find_break(text: str, low: int, high: int):
+        # rightmost break position in [low, high], paragraph breaks first, then line breaks, then spaces
+        line_break = -1
+
+        newline = text.rfind("\n", low, high + 1)
+        while newline >= 0:
+            if line_break < 0:
+                line_break = newline
+
+            previous = newline - 1
+            while previous >= 0 and text[previous] in BLANK_CHARACTERS:
+                previous -= 1
+
+            if previous >= 0 and text[previous] == "\n":
+                return newline
+
+            newline = text.rfind("\n", low, newline)
+
+        if line_break >= 0:
+            return line_break
+
+        return max(text.rfind(" ", low, high + 1), text.rfind("\t", low, high + 1))
+
+    def get_limit(self, token_starts: list, position: int, units: int, text_end: int):
+        # the furthest offset a chunk starting at position can end at with units to spend
+        if self.length_unit == CHARACTER_UNIT:
+            limit = position + units
+        else:
+            idx = bisect_left(token_starts, position) + units
+            limit = token_starts[idx] if idx < len(token_starts) else text_end
+
+        if self.max_characters:
+            limit = min(limit, position + self.max_characters)
+
+        return limit
+
+    def get_overlap_start(self, token_starts: list, position: int, units: int):
+        # the offset units before position
+        if self.length_unit == CHARACTER_UNIT:
+            return position - units
+
+        idx = bisect_left(token_starts, position) - units
+        return token_starts[idx] if idx >= 0 else 0
+
+    def split_text_spans(self, text: str):
+        # returns the [start, end) offsets of the chunks in the text
+
+        text_end = self.strip_end(text, len(text))
+        token_starts = self.get_token_starts(text) if self.length_unit == TOKEN_UNIT else None
+
+        spans = []
+        start = self.skip_spaces(text, 0)
+        # a chunk has to end past the previous one, or it would be contained in it
+        min_break = start + 1
+
+        while start < text_end:
+            limit = self.get_limit(token_starts, start, self.chunk_size, text_end)
+
+            if limit >= text_end:
+                spans.append((start, text_end))
+                break
+
+            position = -1
+            if min_break <= limit:
+                half_full = self.get_limit(token_starts, start, self.chunk_size // 2, text_end)
+                if self.max_characters and limit == start + self.max_characters:
+                    # the chunk is capped in characters, half full is half of the cap
+                    half_full = min(half_full, start + self.max_characters // 2)
+                position = self.find_break(text, max(half_full, min_break), limit)
+
+                if position < 0 and half_full > min_break:
+                    position = self.find_break(text, min_break, limit)
+
+            if position < 0:
+                if start < min_break - 1:
+                    # the overlap leaves no room for the next word, start after the previous chunk
+                    start = min_break - 1
+                    continue
+
+                # a word larger than a chunk
+                spans.append((start, limit))
+                start, min_break = limit, limit + 1
+                continue
+
+            end = self.strip_end(text, position)
+            spans.append((start, end))
+
+            next_start = self.skip_spaces(text, end)
+            min_break = next_start + 1
+
+            if self.chunk_overlap > 0:
+                overlap_start = self.get_overlap_start(token_starts, end, self.chunk_overlap)
+
+                if overlap_start > start:
+                    # moved forward to the start of a word
+                    if not text[overlap_start - 1].isspace():
+                        match = SPACE_PATTERN.search(text, overlap_start, end)
+                        overlap_start = match.start() if match else end
+
+                    next_start = min(next_start, self.skip_spaces(text, overlap_start))
+
+            start = next_start
+
+        return spans
+
+    def split_text(self, text: str):
+        return [ text[start:end] for start, end in self.split_text_spans(text) ]
+
+    def create_chunks(self, text: str, metadata: dict = None):
+        # (chunk_text, metadata) pairs, the metadata carries the offsets of the chunk in the text
+        return [
+            (text[start:end], { **(metadata or {}), "start_index": start, "end_index": end })
+            for start, end in self.split_text_spans(text)
+        ]
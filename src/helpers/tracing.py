@@ -0,0 +1,227 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .config import get_settings
+import functools
+import threading
+import inspect
+import time
+
+
+SPAN_METRIC = "rag_span_duration_seconds"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsRegistry:
+
+    # in-process histograms and counters rendered in the Prometheus text format,
+    # collectors are called at scrape time for values owned by other objects (cache stats)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        # {name: {"help": str, "series": {labels: {"buckets": list, "sum": float, "count": int}}}}
+        self.histograms = {}
+        # {name: {"help": str, "series": {labels: float}}}
+        self.counters = {}
+        self.collectors = []
+
+    def observe(self, name: str, value: float, labels: dict = None, description: str = ""):
+        key = tuple(sorted((labels or {}).items()))
+
+        with self.lock:
+            histogram = self.histograms.setdefault(name, { "help": description, "series": {} })
+            series = histogram["series"].get(key)
+            if series is None:
+                series = { "buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0 }
+                histogram["series"][key] = series
+
+            for idx, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    series["buckets"][idx] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def increment(self, name: str, value: float = 1, labels: dict = None, description: str = ""):
+        key = tuple(sorted((labels or {}).items()))
+
+        with self.lock:
+            counter = self.counters.setdefault(name, { "help": description, "series": {} })
+            counter["series"][key] = counter["series"].get(key, 0) + value
+
+    def register_collector(self, collector):
+        # collector() returns [(name, labels, value, description)] gauges, registering
+        # the same collector again (app restarted in the same process) is a no-op
+        with self.lock:
+            if collector not in self.collectors:
+                self.collectors.append(collector)
+
+    @staticmethod
+    def format_labels(labels, extra: tuple = ()):
+        labels = tuple(labels) + extra
+        if len(labels) == 0:
+            return ""
+
+        escaped = [
+            (key, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+            for key, value in labels
+        ]
+        return "{" + ",".join([ f'{key}="{value}"' for key, value in escaped ]) + "}"
+
+    def render(self):
+        lines = []
+
+        with self.lock:
+            for name, histogram in self.histograms.items():
+                lines.append(f"# HELP {name} {histogram['help']}")
+                lines.append(f"# TYPE {name} histogram")
+
+                for labels, series in histogram["series"].items():
+                    for bound, count in zip(LATENCY_BUCKETS, series["buckets"]):
+                        lines.append(f"{name}_bucket{self.format_labels(labels, (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{self.format_labels(labels, (('le', '+Inf'),))} {series['count']}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {series['sum']}")
+                    lines.append(f"{name}_count{self.format_labels(labels)} {series['count']}")
+
+            for name, counter in self.counters.items():
+                lines.append(f"# HELP {name} {counter['help']}")
+                lines.append(f"# TYPE {name} counter")
+
+                for labels, value in counter["series"].items():
+                    lines.append(f"{name}{self.format_labels(labels)} {value}")
+
+        gauges = {}
+        for collector in self.collectors:
+            for name, labels, value, description in collector():
+                gauges.setdefault(name, (description, []))[1].append((tuple(sorted(labels.items())), value))
+
+        for name, (description, series) in gauges.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+
+            for labels, value in series:
+                lines.append(f"{name}{self.format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+class RequestTrace:
+
+    # span durations of one request, summed per span name
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {}
+
+    def add(self, name: str, seconds: float):
+        with self.lock:
+            calls, total = self.spans.get(name, (0, 0.0))
+            self.spans[name] = (calls + 1, total + seconds)
+
+    def get_timings(self):
+        with self.lock:
+            return {
+                name: { "calls": calls, "ms": round(total * 1000, 3) }
+                for name, (calls, total) in self.spans.items()
+            }
+
+
+_request_trace = ContextVar("request_trace", default=None)
+
+
+def start_request_trace():
+    return _request_trace.set(RequestTrace())
+
+
+def end_request_trace(token):
+    _request_trace.reset(token)
+
+
+def get_request_timings():
+    trace = _request_trace.get()
+    return trace.get_timings() if trace is not None else {}
+
+
+def add_request_timings(content: dict):
+    # the timings block is opt-in, it exposes internals of the pipeline
+    if get_settings().TRACING_RESPONSE_TIMINGS:
+        content["timings"] = get_request_timings()
+
+    return content
+
+
+def record_span(name: str, seconds: float, labels: dict = None):
+    metrics_registry.observe(SPAN_METRIC, seconds, labels={ "span": name, **(labels or {}) },
+                             description="Duration of the traced RAG pipeline steps")
+
+    trace = _request_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def span(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start, labels)
+
+
+def traced(name: str, **labels):
+    # wraps sync functions, coroutines and async generators (timed until exhausted)
+
+    def decorator(func):
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            wrapper = async_gen_wrapper
+
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            wrapper = async_wrapper
+
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return func(*args, **kwargs)
+            wrapper = sync_wrapper
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def instrument_class(cls, prefix: str, method_names: set = None):
+    # trace the public methods the class defines itself, inherited ones are traced where they are defined.
+    # Without method_names only the async methods are traced, sync helpers are too cheap to be worth a span
+    for attr_name, value in list(vars(cls).items()):
+        if attr_name.startswith("_") or not inspect.isfunction(value) or getattr(value, "__traced__", False):
+            continue
+
+        if method_names is not None and attr_name not in method_names:
+            continue
+
+        if method_names is None and not (inspect.iscoroutinefunction(value) or inspect.isasyncgenfunction(value)):
+            continue
+
+        setattr(cls, attr_name, traced(f"{prefix}.{attr_name}", **{ "class": cls.__name__ })(value))
+
+
+def record_tokens(provider: str, kind: str, count: int):
+    if not count:
+        return
+
+    metrics_registry.increment("rag_llm_tokens_total", count, labels={ "provider": provider, "kind": kind },
+                               description="Tokens billed by the LLM providers")
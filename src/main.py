@@ -1,19 +1,75 @@
-from fastapi import FastAPI
-from routes import base, data, nlp
+from fastapi import FastAPI, Request
+from routes import base, data, nlp, metrics
 from motor.motor_asyncio import AsyncIOMotorClient
 from helpers.config import get_settings
-from stores.llm import LLMProviderFactory
+from stores.llm import LLMProviderFactory, EmbeddingCache, CachedEmbeddingProvider, SemanticAnswerCache
 from stores.vectordb import VectorDBProviderFactory
+from stores.lexical import LexicalIndexStore
+from controllers.BaseController import BaseController
 from stores.llm.templates.template_parser import TemplateParser
+from helpers.concurrency import shutdown_thread_pool, shutdown_process_pool
+from helpers.tracing import metrics_registry, start_request_trace, end_request_trace
+from controllers import IndexJobController
+from models import ModelRegistry
+import time
 
 app = FastAPI()
 
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    # spans recorded while serving the request are collected into its trace
+    token = start_request_trace()
+    start = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        end_request_trace(token)
+
+    route = request.scope.get("route")
+    metrics_registry.observe(
+        "rag_http_request_duration_seconds",
+        time.perf_counter() - start,
+        labels={
+            "method": request.method,
+            "path": route.path if route else "unmatched",
+            "status": response.status_code,
+        },
+        description="Duration of the HTTP requests until the response starts"
+    )
+
+    return response
+
+
+def collect_cache_stats():
+    gauges = []
+
+    caches = [
+        ("embedding", getattr(app, "embedding_cache", None)),
+        ("answer", getattr(app, "answer_cache", None)),
+    ]
+
+    for cache_name, cache in caches:
+        if cache is None:
+            continue
+
+        for stat_name, value in cache.get_stats().items():
+            gauges.append(("rag_cache_" + stat_name, { "cache": cache_name }, value,
+                           f"{stat_name.replace('_', ' ')} of the caches"))
+
+    return gauges
+
+
 @app.on_event("startup")
 async def startup_span():
     settings = get_settings()
     app.mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
     app.db_client = app.mongo_conn[settings.MONGODB_DATABASE]
 
+    # ensure collections and indexes once, handlers share these model instances
+    app.model_registry = await ModelRegistry.create_instance(db_client=app.db_client)
+
     llm_provider_factory = LLMProviderFactory(settings)
     vector_db_provider_factory = VectorDBProviderFactory(settings)
 
@@ -26,22 +82,67 @@ async def startup_span():
         embedding_size=settings.EMBEDDING_MODEL_SIZE
     )
 
+    if settings.EMBEDDING_CACHE_ENABLED:
+        app.embedding_cache = EmbeddingCache(
+            cache_model=app.model_registry.embedding_cache_model,
+            memory_max_entries=settings.EMBEDDING_CACHE_MEMORY_MAX_ENTRIES,
+            store_max_entries=settings.EMBEDDING_CACHE_STORE_MAX_ENTRIES
+        )
+        app.embedding_client = CachedEmbeddingProvider(
+            provider=app.embedding_client,
+            embedding_cache=app.embedding_cache
+        )
+
     app.vector_db_client = vector_db_provider_factory.create(
         provide=settings.VECTOR_DB_BACKEND
     )  
 
     app.vector_db_client.connect()
 
+    app.answer_cache = None
+    if settings.ANSWER_CACHE_ENABLED:
+        app.answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES
+        )
+
+    app.lexical_index = None
+    if settings.LEXICAL_INDEX_ENABLED:
+        app.lexical_index = LexicalIndexStore(
+            db_path=BaseController().get_database_path(settings.LEXICAL_INDEX_PATH),
+            chunk_model=app.model_registry.chunk_model,
+            k1=settings.LEXICAL_BM25_K1,
+            b=settings.LEXICAL_BM25_B
+        )
+
     app.template_parser = TemplateParser(language=settings.PRIMARY_LANG, default_language=settings.DEFAULT_LANG)
 
+    app.index_job_controller = IndexJobController(
+        model_registry=app.model_registry,
+        vector_db_client=app.vector_db_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser
+    )
+    await app.index_job_controller.start()
+
+    metrics_registry.register_collector(collect_cache_stats)
+
 @app.on_event("shutdown") 
 async def shutdown_span():
+    await app.index_job_controller.stop()
+    if getattr(app, "embedding_cache", None) is not None:
+        await app.embedding_cache.flush_touched()
     app.mongo_conn.close()
-    app.vector_db_client.disconnect()
+    await app.vector_db_client.adisconnect()
+    shutdown_thread_pool()
+    shutdown_process_pool()
     
 
 
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(metrics.metrics_router)
 
@@ -1,7 +1,8 @@
 from .BaseDataModel import BaseDataModel
-from .db_schemes import Asset
+from .db_schemes import Asset, AssetRecord
 from .enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 class AssetModel(BaseDataModel):
 
@@ -16,37 +17,53 @@ class AssetModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-
-        if DataBaseEnum.COLLECTION_ASSET_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_ASSET_NAME.value]
-            
-            indexes = Asset.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = Asset.get_indexes()
+        for index in indexes:
+            options = {}
+            if index.get("partial_filter"):
+                options["partialFilterExpression"] = index["partial_filter"]
+
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"],
+                **options
+            )
 
     async def create_asset(self, asset: Asset):
+        # an asset with the hash of an existing one of the project is not inserted, the
+        # existing asset is returned instead. Compare the asset names to tell them apart
+
+        try:
+            result = await self.collection.insert_one(asset.dict(by_alias=True, exclude_unset=True))
+        except DuplicateKeyError:
+            if asset.asset_hash is None:
+                raise
+
+            existing_asset = await self.get_asset_by_hash(asset_project_id=asset.asset_project_id,
+                                                          asset_hash=asset.asset_hash)
+            if existing_asset is None:
+                raise
+
+            return existing_asset
 
-        result = await self.collection.insert_one(asset.dict(by_alias=True, exclude_unset=True))
         asset.id = result.inserted_id
 
         return asset
 
-    async def get_all_project_assets(self, asset_project_id: str, asset_type: str):
+    async def get_all_project_assets(self, asset_project_id: str, asset_type: str, fields: list = None):
+        # fields limits the returned fields, _id is always returned
 
         records = await self.collection.find(
             {
                 "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
                 "asset_type": asset_type
-            }
+            },
+            { field: 1 for field in fields } if fields else None
         ).to_list(length=None)
 
         return [
-            Asset(**record)
+            AssetRecord(record)
             for record in records
         ]
 
@@ -61,4 +78,15 @@ class AssetModel(BaseDataModel):
             return Asset(**record)
         
         return None
-        
\ No newline at end of file
+
+    async def get_asset_by_hash(self, asset_project_id: str, asset_hash: str):
+
+        record = await self.collection.find_one({
+            "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
+            "asset_hash": asset_hash,
+        })
+
+        if record:
+            return Asset(**record)
+
+        return None
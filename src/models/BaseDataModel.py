@@ -1,7 +1,13 @@
 from helpers.config import get_settings
+from helpers.tracing import instrument_class
 
 
 class BaseDataModel:
+
+    def __init_subclass__(cls, **kwargs):
+        # every public query method of the models is timed by the tracing layer
+        super().__init_subclass__(**kwargs)
+        instrument_class(cls, prefix="mongo")
     
     def __init__(self , db_client: object):
         self.db_client = db_client
@@ -1,5 +1,5 @@
 from .BaseDataModel import BaseDataModel
-from .db_schemes import DataChunk
+from .db_schemes import DataChunk, DataChunkRecord
 from .enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
 from pymongo import InsertOne
@@ -17,18 +17,13 @@ class ChunkModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-
-        if DataBaseEnum.COLLECTION_CHUNK_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
-            
-            indexes = DataChunk.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = DataChunk.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
 
     async def create_chunk(self, chunk: DataChunk):
         result = await self.collection.insert_one(chunk.dict(by_alias=True, exclude_unset=True))
@@ -50,15 +45,36 @@ class ChunkModel(BaseDataModel):
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i:i+batch_size]
 
-            operations = [
-                InsertOne(chunk.dict(by_alias=True, exclude_unset=True))
+            documents = [
+                chunk.to_record()
                 for chunk in batch
             ]
 
-            await self.collection.bulk_write(operations)
+            await self.collection.bulk_write([ InsertOne(document) for document in documents ])
+
+            # the driver fills in the generated _id of every inserted document
+            for chunk, document in zip(batch, documents):
+                chunk.id = document["_id"]
         
         return len(chunks)
 
+    def get_projection(self, fields: list = None):
+        # fields to read, _id is always returned. None reads whole documents
+        if not fields:
+            return None
+
+        return { field: 1 for field in fields }
+
+    async def get_chunks_by_ids(self, chunk_ids: list, fields: list = None):
+        records = await self.collection.find({
+            "_id": { "$in": chunk_ids }
+        }, self.get_projection(fields)).to_list(length=None)
+
+        return [
+            DataChunkRecord(record)
+            for record in records
+        ]
+
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
         result = await self.collection.delete_many({
             "chunk_project_id": project_id
@@ -66,14 +82,62 @@ class ChunkModel(BaseDataModel):
 
         return result.deleted_count
 
-    async def get_poject_chunks(self, project_id: ObjectId, page_no: int=1, page_size: int=50):
+    async def count_project_chunks(self, project_id: ObjectId):
+        return await self.collection.count_documents({
+            "chunk_project_id": project_id
+        })
+
+    async def get_poject_chunks(self, project_id: ObjectId, page_no: int=1, page_size: int=50,
+                                fields: list = None):
         records = await self.collection.find({
                     "chunk_project_id": project_id
-                }).skip(
+                }, self.get_projection(fields)).skip(
                     (page_no-1) * page_size
                 ).limit(page_size).to_list(length=None)
 
         return [
-            DataChunk(**record)
+            DataChunkRecord(record)
             for record in records
-        ]
\ No newline at end of file
+        ]
+
+    async def get_project_chunks_after(self, project_id: ObjectId, last_chunk_id: ObjectId = None,
+                                       page_size: int=50, fields: list = None):
+        # keyset pagination on (chunk_project_id, _id), every page is a single index seek
+        query = {
+            "chunk_project_id": project_id
+        }
+
+        if last_chunk_id is not None:
+            query["_id"] = { "$gt": last_chunk_id }
+
+        records = await self.collection.find(query, self.get_projection(fields)).sort(
+                    "_id", 1
+                ).limit(page_size).to_list(length=None)
+
+        return [
+            DataChunkRecord(record)
+            for record in records
+        ]
+
+    async def iterate_project_chunks(self, project_id: ObjectId, last_chunk_id: ObjectId = None,
+                                     batch_size: int=500, fields: list = None):
+        # stream all project chunks over a single cursor, yielding lists of batch_size chunks
+        query = {
+            "chunk_project_id": project_id
+        }
+
+        if last_chunk_id is not None:
+            query["_id"] = { "$gt": last_chunk_id }
+
+        cursor = self.collection.find(query, self.get_projection(fields)).sort("_id", 1).batch_size(batch_size)
+
+        batch = []
+        async for record in cursor:
+            batch.append(DataChunkRecord(record))
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
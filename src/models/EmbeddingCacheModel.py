@@ -0,0 +1,85 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import EmbeddingCacheEntry
+from .enums.DataBaseEnum import DataBaseEnum
+from pymongo import UpdateOne
+from datetime import datetime
+
+class EmbeddingCacheModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_EMBEDDING_CACHE_NAME.value]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = EmbeddingCacheEntry.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
+
+    async def get_vectors(self, keys: list):
+        # returns {key: packed vector} for the keys found in the store
+        records = await self.collection.find(
+            { "_id": { "$in": keys } },
+            { "cache_vector": 1 }
+        ).to_list(length=None)
+
+        return {
+            record["_id"]: record["cache_vector"]
+            for record in records
+        }
+
+    async def insert_many_entries(self, entries: list):
+
+        if len(entries) == 0:
+            return 0
+
+        # upsert so concurrent writers of the same key do not fail the batch
+        operations = [
+            UpdateOne(
+                { "_id": entry.id },
+                { "$setOnInsert": entry.dict(by_alias=True, exclude={"id"}) },
+                upsert=True
+            )
+            for entry in entries
+        ]
+
+        await self.collection.bulk_write(operations, ordered=False)
+
+        return len(entries)
+
+    async def touch_entries(self, keys: list):
+
+        if len(keys) == 0:
+            return 0
+
+        result = await self.collection.update_many(
+            { "_id": { "$in": keys } },
+            { "$set": { "cache_last_used_at": datetime.utcnow() } }
+        )
+
+        return result.modified_count
+
+    async def evict_entries(self, max_entries: int):
+        # drop the least recently used entries above max_entries
+        total_entries = await self.collection.estimated_document_count()
+        if total_entries <= max_entries:
+            return 0
+
+        records = await self.collection.find({}, { "_id": 1 }).sort(
+                    "cache_last_used_at", 1
+                ).limit(total_entries - max_entries).to_list(length=None)
+
+        result = await self.collection.delete_many({
+            "_id": { "$in": [ record["_id"] for record in records ] }
+        })
+
+        return result.deleted_count
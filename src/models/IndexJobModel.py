@@ -0,0 +1,119 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import IndexJob
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.IndexJobStatusEnum import IndexJobStatusEnum
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime
+
+class IndexJobModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_INDEX_JOB_NAME.value]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = IndexJob.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
+
+    async def create_job(self, job: IndexJob):
+
+        # all fields, the default_factory timestamps included, so the creation time is stored once
+        result = await self.collection.insert_one(job.dict(by_alias=True, exclude={"id"}))
+        job.id = result.inserted_id
+
+        return job
+
+    async def get_job(self, job_id: ObjectId):
+
+        record = await self.collection.find_one({
+            "_id": ObjectId(job_id) if isinstance(job_id, str) else job_id
+        })
+
+        if record is None:
+            return None
+
+        return IndexJob(**record)
+
+    async def get_jobs_by_status(self, job_status: str):
+
+        records = await self.collection.find({
+            "job_status": job_status
+        }).to_list(length=None)
+
+        return [
+            IndexJob(**record)
+            for record in records
+        ]
+
+    async def update_job(self, job_id: ObjectId, fields: dict, from_status: list = None,
+                         updated_before: datetime = None):
+        # atomically update the job, optionally only when it is in one of the given states
+        # and, with updated_before, only when it was not updated since
+        query = { "_id": job_id }
+        if from_status:
+            query["job_status"] = { "$in": from_status }
+
+        if updated_before is not None:
+            query["job_updated_at"] = { "$lt": updated_before }
+
+        record = await self.collection.find_one_and_update(
+            query,
+            { "$set": { **fields, "job_updated_at": datetime.utcnow() } },
+            return_document=ReturnDocument.AFTER
+        )
+
+        if record is None:
+            return None
+
+        return IndexJob(**record)
+
+    async def touch_job(self, job_id: ObjectId):
+        # the heartbeat of a running job, renews its lease
+        return await self.update_job(
+            job_id=job_id,
+            fields={},
+            from_status=[ IndexJobStatusEnum.RUNNING.value, IndexJobStatusEnum.CANCELLING.value ]
+        )
+
+    async def requeue_expired_jobs(self, updated_before: datetime):
+        # running jobs whose worker stopped sending heartbeats (killed or crashed) go back to the queue
+        result = await self.collection.update_many(
+            {
+                "job_status": IndexJobStatusEnum.RUNNING.value,
+                "job_updated_at": { "$lt": updated_before }
+            },
+            { "$set": { "job_status": IndexJobStatusEnum.QUEUED.value, "job_updated_at": datetime.utcnow() } }
+        )
+
+        return result.modified_count
+
+    async def claim_job(self, job_id: ObjectId):
+        return await self.update_job(
+            job_id=job_id,
+            fields={ "job_status": IndexJobStatusEnum.RUNNING.value, "job_error": None },
+            from_status=[ IndexJobStatusEnum.QUEUED.value ]
+        )
+
+    async def commit_job_page(self, job_id: ObjectId, page_no: int, last_chunk_id: ObjectId,
+                              indexed_chunks: int, skipped_chunks: int = 0):
+        return await self.update_job(
+            job_id=job_id,
+            fields={
+                "job_last_page": page_no,
+                "job_last_chunk_id": last_chunk_id,
+                "job_indexed_chunks": indexed_chunks,
+                "job_skipped_chunks": skipped_chunks
+            }
+        )
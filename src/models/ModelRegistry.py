@@ -0,0 +1,38 @@
+from .ProjectModel import ProjectModel
+from .AssetModel import AssetModel
+from .ChunkModel import ChunkModel
+from .IndexJobModel import IndexJobModel
+from .EmbeddingCacheModel import EmbeddingCacheModel
+
+
+class ModelRegistry:
+
+    def __init__(self, db_client: object):
+        self.db_client = db_client
+
+        self.project_model = ProjectModel(db_client=db_client)
+        self.asset_model = AssetModel(db_client=db_client)
+        self.chunk_model = ChunkModel(db_client=db_client)
+        self.index_job_model = IndexJobModel(db_client=db_client)
+        self.embedding_cache_model = EmbeddingCacheModel(db_client=db_client)
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client=db_client)
+        await instance.bootstrap()
+        return instance
+
+    def get_models(self):
+        return [
+            self.project_model,
+            self.asset_model,
+            self.chunk_model,
+            self.index_job_model,
+            self.embedding_cache_model,
+        ]
+
+    async def bootstrap(self):
+        # runs once at startup, create_index is idempotent so every get_indexes()
+        # definition is ensured, including ones added to existing collections
+        for model in self.get_models():
+            await model.init_collection()
@@ -1,6 +1,7 @@
 from .BaseDataModel import BaseDataModel
 from .db_schemes import Project
 from .enums.DataBaseEnum import DataBaseEnum
+from bson.objectid import ObjectId
 
 class ProjectModel(BaseDataModel):
 
@@ -15,18 +16,13 @@ class ProjectModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-
-        if DataBaseEnum.COLLECTION_PROJECT_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value]
-            
-            indexes = Project.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = Project.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
 
     async def create_project(self, project: Project):
 
@@ -50,6 +46,26 @@ class ProjectModel(BaseDataModel):
         
         return Project(**record)
 
+    async def get_project_by_id(self, project_id: ObjectId):
+
+        record = await self.collection.find_one({
+            "_id": project_id
+        })
+
+        if record is None:
+            return None
+        
+        return Project(**record)
+
+    async def increment_index_version(self, project_id: ObjectId):
+        # bumped whenever the project vector or lexical index changes, cached answers of older versions are stale
+        result = await self.collection.update_one(
+            { "_id": project_id },
+            { "$inc": { "project_index_version": 1 } }
+        )
+
+        return result.modified_count
+
     async def get_all_projects(self, page: int=1, page_size: int=10):
 
         # count total number of documents
@@ -1,7 +1,11 @@
 from .enums.ResponseEnum import ResponseSignal
 from .enums.ProcessingEnum import ProcessingEnum
+from .enums.ChunkUnitEnum import ChunkUnitEnum
 from .ProjectModel import ProjectModel
 from .ChunkModel import ChunkModel
 from .AssetModel import AssetModel
 from .enums.AssetTypeEnum import AssetTypeEnum
-
+from .IndexJobModel import IndexJobModel
+from .enums.IndexJobStatusEnum import IndexJobStatusEnum
+from .EmbeddingCacheModel import EmbeddingCacheModel
+from .ModelRegistry import ModelRegistry
@@ -1,3 +1,5 @@
 from .project import Project
-from .data_chunk import DataChunk, RetrievedDocument
-from .asset import Asset
+from .data_chunk import DataChunk, DataChunkRecord, RetrievedDocument
+from .asset import Asset, AssetRecord
+from .index_job import IndexJob
+from .embedding_cache import EmbeddingCacheEntry
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from bson.objectid import ObjectId
 from datetime import datetime
+from .record import Record
 
 
 class Asset(BaseModel):
@@ -12,6 +13,7 @@ class Asset(BaseModel):
     asset_size: int = Field(gt=0, default=None)
     asset_pushed_at: datetime = Field(default=datetime.utcnow)
     asset_config: dict = Field(default=None)
+    asset_hash: Optional[str] = Field(default=None)
 
     class Config:
         arbitrary_types_allowed = True
@@ -33,5 +35,19 @@ class Asset(BaseModel):
                 ],
                 "name": "asset_project_id_name_index_1",
                 "unique": True
+            },
+            {
+                # one asset per content in a project, assets without a hash are not indexed
+                "key": [
+                    ("asset_project_id", 1),
+                    ("asset_hash", 1)
+                ],
+                "name": "asset_project_id_hash_index_1",
+                "unique": True,
+                "partial_filter": { "asset_hash": { "$type": "string" } }
             }
         ]
+
+
+class AssetRecord(Record):
+    __slots__ = tuple(Asset.model_fields)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional
 from bson.objectid import ObjectId
+from .record import Record
 
 class DataChunk(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
@@ -13,6 +14,22 @@ class DataChunk(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+    def to_record(self):
+        # the document to insert, same as dict(by_alias=True, exclude_unset=True) for a new
+        # chunk without going through the serializer
+        record = {
+            "chunk_text": self.chunk_text,
+            "chunk_metadata": self.chunk_metadata,
+            "chunk_order": self.chunk_order,
+            "chunk_project_id": self.chunk_project_id,
+            "chunk_asset_id": self.chunk_asset_id,
+        }
+
+        if self.id is not None:
+            record["_id"] = self.id
+
+        return record
+
     @classmethod
     def get_indexes(cls):
 
@@ -23,9 +40,20 @@ class DataChunk(BaseModel):
                 ],
                 "name": "chunk_project_id_index_1",
                 "unique": False
+            },
+            {
+                "key":[
+                    ("chunk_project_id", 1),
+                    ("_id", 1)
+                ],
+                "name": "chunk_project_id_id_index_1",
+                "unique": False
             }
         ]
 
+class DataChunkRecord(Record):
+    __slots__ = tuple(DataChunk.model_fields)
+
 class RetrievedDocument(BaseModel):
     text: str
     score: float
\ No newline at end of file
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class EmbeddingCacheEntry(BaseModel):
+    # the cache key, a hash of (model id, document type, processed text)
+    id: str = Field(..., alias="_id", min_length=1)
+    cache_model_id: str = Field(..., min_length=1)
+    cache_document_type: str = Field(..., min_length=1)
+    cache_vector: bytes
+    cache_created_at: datetime = Field(default_factory=datetime.utcnow)
+    cache_last_used_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [
+                    ("cache_last_used_at", 1)
+                ],
+                "name": "cache_last_used_at_index_1",
+                "unique": False
+            }
+        ]
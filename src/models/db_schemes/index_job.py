@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime
+
+
+class IndexJob(BaseModel):
+    id: Optional[ObjectId] = Field(None, alias="_id")
+    job_project_id: ObjectId
+    job_status: str = Field(..., min_length=1)
+    job_do_reset: bool = False
+    job_do_delta: bool = False
+    job_total_chunks: int = Field(default=0, ge=0)
+    job_indexed_chunks: int = Field(default=0, ge=0)
+    job_skipped_chunks: int = Field(default=0, ge=0)
+    job_deleted_chunks: int = Field(default=0, ge=0)
+    job_last_page: int = Field(default=0, ge=0)
+    job_last_chunk_id: Optional[ObjectId] = None
+    job_error: Optional[str] = None
+    job_created_at: datetime = Field(default_factory=datetime.utcnow)
+    job_updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [
+                    ("job_project_id", 1)
+                ],
+                "name": "job_project_id_index_1",
+                "unique": False
+            },
+            {
+                "key": [
+                    ("job_status", 1)
+                ],
+                "name": "job_status_index_1",
+                "unique": False
+            }
+        ]
@@ -5,6 +5,7 @@ from bson.objectid import ObjectId
 class Project(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
     project_id: str = Field(..., min_length=1)
+    project_index_version: int = Field(default=0, ge=0)
 
     class Config:
         arbitrary_types_allowed = True
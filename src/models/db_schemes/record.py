@@ -0,0 +1,15 @@
+class Record:
+
+    # Slotted, unvalidated view of a document read back from the database, for bulk reads.
+    #
+    # The documents were validated when they were written, so nothing is validated
+    # again and building a record costs a fraction of a pydantic model. Subclasses
+    # list the fields of their model in __slots__, "id" is read from _id and the
+    # fields left out by a projection are None. Nothing stops a caller from setting a
+    # field, but a record is never written back, changes only live in the object.
+
+    __slots__ = ()
+
+    def __init__(self, record: dict):
+        for field in self.__slots__:
+            setattr(self, field, record.get("_id" if field == "id" else field))
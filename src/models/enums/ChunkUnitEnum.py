@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ChunkUnitEnum(Enum):
+
+    CHARACTER = "character"
+    TOKEN = "token"
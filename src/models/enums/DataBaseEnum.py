@@ -4,4 +4,6 @@ class DataBaseEnum(Enum):
     
     COLLECTION_PROJECT_NAME = "projects"
     COLLECTION_CHUNK_NAME = "chunks"
-    COLLECTION_ASSET_NAME = "assets"
\ No newline at end of file
+    COLLECTION_ASSET_NAME = "assets"
+    COLLECTION_INDEX_JOB_NAME = "index_jobs"
+    COLLECTION_EMBEDDING_CACHE_NAME = "embedding_cache"
@@ -0,0 +1,11 @@
+from enum import Enum
+
+class IndexJobStatusEnum(Enum):
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    CANCELLING = "cancelling"
+    CANCELLED = "cancelled"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    
@@ -7,8 +7,17 @@ class ResponseSignal(Enum):
     FILE_SIZE_EXCEEDED = "File size too large"
     FILE_UPLOADED_SUCCESS = "File is uploaded successfully"
     FILE_UPLOADED_FAILED = "File upload failed"
+    FILE_ALREADY_UPLOADED = "File is already uploaded"
+    BULK_UPLOAD_TOO_MANY_FILES = "Bulk upload has too many files"
+    UPLOAD_SESSION_CREATED = "Upload session created"
+    UPLOAD_SESSION_NOT_FOUND = "Upload session not found"
+    UPLOAD_SESSION_STATUS_SUCCESS = "Get upload session status success"
+    UPLOAD_RANGE_SUCCESS = "Upload range received"
+    UPLOAD_RANGE_INVALID = "Upload range is invalid"
+    UPLOAD_INCOMPLETE = "Upload is incomplete"
     FILE_PROCESSING_FAILED = "File processing failed"
     FILE_PROCESSED_SUCCESS = "File processed successfully"
+    CHUNK_SIZE_TOO_LARGE = "Chunk size is larger than the embedding input limit"
     NO_FILES_FOUND = "No files found"
     FILE_NOT_FOUND= "File not found"
     PROJECT_NOT_FOUND_ERROR= "Project not found"
@@ -19,5 +28,13 @@ class ResponseSignal(Enum):
     SEARCH_INDEX_FAILED = "Search index failed"
     ANSWER_RAG_QUESTION_SUCCESS = "Answer rag question success"
     ANSWER_RAG_QUESTION_FAILED = "Answer rag question failed"
+    INDEX_JOB_SUBMITTED = "Index job submitted"
+    INDEX_JOB_NOT_FOUND = "Index job not found"
+    INDEX_JOB_STATUS_SUCCESS = "Get index job status success"
+    INDEX_JOB_CANCEL_SUCCESS = "Index job cancel success"
+    INDEX_JOB_CANCEL_FAILED = "Index job cancel failed"
+    INDEX_JOB_RESUME_SUCCESS = "Index job resume success"
+    INDEX_JOB_RESUME_FAILED = "Index job resume failed"
+    SEARCH_BATCH_TOO_LARGE = "Search batch has too many queries"
     
     
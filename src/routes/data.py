@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, UploadFile, status, Request
 from fastapi.responses import JSONResponse
 from helpers.config import get_settings, Setting
-from controllers import DataController, ProjectController, PorcessController
+from controllers import DataController, ProjectController, PorcessController, UploadController
 from models import ResponseSignal
-from .schemes import ProcessRequest
+from .schemes import ProcessRequest, UploadInitRequest
+from typing import List
+from contextlib import nullcontext
 import os
-import aiofiles
+import asyncio
 import logging
-from models import ProjectModel, ChunkModel, AssetModel, AssetTypeEnum
+from models import AssetTypeEnum, ChunkUnitEnum
 from models.db_schemes import DataChunk, Asset
 from bson import ObjectId
+from helpers.text_splitter import CHARACTERS_PER_TOKEN
 
 
 logger = logging.getLogger('uvicorn.error')
@@ -20,88 +23,322 @@ data_router = APIRouter(
 )
 
 
+async def register_asset(asset_model, project, file_name: str, file_path: str, file_hash: str, file_size: int):
+    # returns (asset_record, signal)
+
+    # the same content uploaded again reuses the asset, and with it the chunks and vectors
+    asset_record = await asset_model.get_asset_by_hash(asset_project_id=project.id, asset_hash=file_hash)
+    if asset_record is not None:
+        os.remove(file_path)
+        return asset_record, ResponseSignal.FILE_ALREADY_UPLOADED.value
+
+    asset_resources = Asset(
+        asset_project_id= project.id,
+        asset_name= file_name,
+        asset_type= AssetTypeEnum.FILE.value,
+        asset_size= file_size,
+        asset_hash= file_hash
+    )
+    asset_record = await asset_model.create_asset(asset=asset_resources)
+
+    if asset_record.asset_name != file_name:
+        # a concurrent upload of the same content registered it first
+        os.remove(file_path)
+        return asset_record, ResponseSignal.FILE_ALREADY_UPLOADED.value
+
+    return asset_record, ResponseSignal.FILE_UPLOADED_SUCCESS.value
+
+
+async def write_file(data_controller: DataController, project_id: str, file: UploadFile):
+    # returns (signal, file_name, file_path, file_hash, file_size), file_hash is None on failure
+
+    is_valid , signal = data_controller.validate_uploaded_file(file=file)
+    if not is_valid:
+        return signal, None, None, None, None
+
+    project_dir_path = ProjectController().get_project_dir(project_id=project_id)
+    file_name = data_controller.generate_unique_file_name(org_file_name=file.filename, project_id=project_id)
+
+    file_path = os.path.join(project_dir_path , file_name)
+
+    try:
+        signal, file_hash, file_size = await data_controller.write_uploaded_file(file=file, file_path=file_path)
+
+    except Exception as e:
+        
+        logger.error(f"File upload failed: {e}")
+        return ResponseSignal.FILE_UPLOADED_FAILED.value, None, None, None, None
+
+    return signal, file_name, file_path, file_hash, file_size
+
+
 @data_router.post("/upload/{project_id}")
 async def upload_data(request: Request, project_id: str, 
                         file: UploadFile,  app_settings: Setting = Depends(get_settings)):
 
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    project_model = request.app.model_registry.project_model
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
+    signal, file_name, file_path, file_hash, file_size = await write_file(
+        data_controller=DataController(), project_id=project_id, file=file
+    )
+
+    if file_hash is None:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+                if signal == ResponseSignal.FILE_UPLOADED_FAILED.value else status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": signal
+                }
+        )
+
+    asset_record, signal = await register_asset(
+        asset_model=request.app.model_registry.asset_model, project=project,
+        file_name=file_name, file_path=file_path, file_hash=file_hash, file_size=file_size
+    )
+    
+    return JSONResponse(
+        content={
+            "signal": signal,
+            "file name": str(asset_record.id)
+            }
+    )
+
+
+@data_router.post("/upload/bulk/{project_id}")
+async def upload_data_bulk(request: Request, project_id: str,
+                             files: List[UploadFile], app_settings: Setting = Depends(get_settings)):
+
+    if len(files) > app_settings.FILE_BULK_MAX_FILES:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.BULK_UPLOAD_TOO_MANY_FILES.value
+                }
+        )
+
+    project_model = request.app.model_registry.project_model
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
 
     data_controller = DataController()
-    is_valid , signal = data_controller.validate_uploaded_file(file=file)
+    semaphore = asyncio.Semaphore(app_settings.FILE_UPLOAD_MAX_CONCURRENCY)
 
-    if not is_valid:
+    async def write_limited(file: UploadFile):
+        async with semaphore:
+            return await write_file(data_controller=data_controller, project_id=project_id, file=file)
+
+    written_files = await asyncio.gather(*[ write_limited(file) for file in files ])
+
+    # assets are registered one by one, so duplicates inside the same request are detected too
+    asset_model = request.app.model_registry.asset_model
+    files_report = []
+
+    for file, (signal, file_name, file_path, file_hash, file_size) in zip(files, written_files):
+        file_report = { "file": file.filename }
+        files_report.append(file_report)
+
+        if file_hash is None:
+            file_report["signal"] = signal
+            continue
+
+        asset_record, file_report["signal"] = await register_asset(
+            asset_model=asset_model, project=project,
+            file_name=file_name, file_path=file_path, file_hash=file_hash, file_size=file_size
+        )
+        file_report["file name"] = str(asset_record.id)
+
+    uploaded_files = len([ report for report in files_report if "file name" in report ])
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if uploaded_files > 0 else status.HTTP_400_BAD_REQUEST,
+        content={
+            "signal": ResponseSignal.FILE_UPLOADED_SUCCESS.value
+                        if uploaded_files > 0 else ResponseSignal.FILE_UPLOADED_FAILED.value,
+            "uploaded_files": uploaded_files,
+            "failed_files": len(files_report) - uploaded_files,
+            "files": files_report
+            }
+    )
+
+
+@data_router.post("/upload/resumable/{project_id}")
+async def init_resumable_upload(request: Request, project_id: str, init_request: UploadInitRequest):
+
+    upload_controller = UploadController(project_id=project_id)
+    session, signal = upload_controller.create_session(
+        file_name=init_request.file_name,
+        file_size=init_request.file_size,
+        content_type=init_request.content_type
+    )
+
+    if session is None:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-             content={
+            content={
                 "signal": signal
                 }
         )
 
-    project_dir_path = ProjectController().get_project_dir(project_id=project_id)
-    file_name = data_controller.generate_unique_file_name(org_file_name=file.filename, project_id=project_id)
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "signal": signal,
+            "session": session,
+            "chunk_size": upload_controller.app_settings.FILE_DEFAULT_CHUNK_SIZE
+            }
+    )
 
-    file_path = os.path.join(project_dir_path , file_name)
 
-    try:
-        async with aiofiles.open(file_path, "wb") as f:
-            while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                await f.write(chunk)
+@data_router.get("/upload/resumable/{project_id}/{upload_id}")
+async def get_resumable_upload(request: Request, project_id: str, upload_id: str):
 
-    except Exception as e:
-        
-        logger.error(f"File upload failed: {e}")
+    upload_controller = UploadController(project_id=project_id)
+    upload_controller.remove_expired_sessions()
+    session = upload_controller.get_session(upload_id=upload_id)
 
+    if session is None:
         return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_404_NOT_FOUND,
             content={
-                "signal": ResponseSignal.FILE_UPLOADED_FAILED.value
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
                 }
         )
 
-    asset_model = await AssetModel.create_instance(
-        db_client=request.app.db_client
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_STATUS_SUCCESS.value,
+            "session": session
+            }
     )
 
-    asset_resources = Asset(
-        asset_project_id= project.id,
-        asset_name= file_name,
-        asset_type= AssetTypeEnum.FILE.value,
-        asset_size= os.path.getsize(file_path)
+
+@data_router.put("/upload/resumable/{project_id}/{upload_id}")
+async def upload_resumable_range(request: Request, project_id: str, upload_id: str):
+
+    upload_controller = UploadController(project_id=project_id)
+    upload_controller.remove_expired_sessions()
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+                }
+        )
+
+    byte_range = upload_controller.parse_content_range(
+        content_range=request.headers.get("content-range"), session=session
     )
-    asset_record = await asset_model.create_asset(asset=asset_resources)
-    
+
+    if byte_range is None:
+        return JSONResponse(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            content={
+                "signal": ResponseSignal.UPLOAD_RANGE_INVALID.value,
+                "session": session
+                }
+        )
+
+    content_length = request.headers.get("content-length")
+    signal = await upload_controller.write_range(
+        session=session, start=byte_range[0], end=byte_range[1], stream=request.stream(),
+        content_length=int(content_length) if content_length and content_length.isdigit() else None
+    )
+
+    session = upload_controller.get_session(upload_id=upload_id)
+
     return JSONResponse(
+        status_code=status.HTTP_200_OK
+            if signal == ResponseSignal.UPLOAD_RANGE_SUCCESS.value else status.HTTP_400_BAD_REQUEST,
         content={
-            "signal": ResponseSignal.FILE_UPLOADED_SUCCESS.value,
+            "signal": signal,
+            "session": session
+            }
+    )
+
+
+@data_router.post("/upload/resumable/{project_id}/{upload_id}/complete")
+async def complete_resumable_upload(request: Request, project_id: str, upload_id: str):
+
+    upload_controller = UploadController(project_id=project_id)
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+                }
+        )
+
+    data_controller = DataController()
+    file_name = data_controller.generate_unique_file_name(org_file_name=session["file_name"], project_id=project_id)
+    file_path = os.path.join(upload_controller.project_path, file_name)
+
+    signal, file_hash, file_size = await upload_controller.complete_session(session=session, file_path=file_path)
+
+    if file_hash is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": signal,
+                "session": session
+                }
+        )
+
+    project_model = request.app.model_registry.project_model
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    asset_record, signal = await register_asset(
+        asset_model=request.app.model_registry.asset_model, project=project,
+        file_name=file_name, file_path=file_path, file_hash=file_hash, file_size=file_size
+    )
+
+    return JSONResponse(
+        content={
+            "signal": signal,
             "file name": str(asset_record.id)
             }
     )
     
 
 @data_router.post("/process/{project_id}")
-async def process_endpoint(request: Request, project_id: str , process_request: ProcessRequest):
+async def process_endpoint(request: Request, project_id: str , process_request: ProcessRequest,
+                           app_settings: Setting = Depends(get_settings)):
 
     # file_id = process_request.file_id
     chunk_size = process_request.chunk_size
     overlap_size = process_request.overlap_size
+    chunk_unit = process_request.chunk_unit
     do_reset = process_request.do_reset
 
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    # longer chunks would be cut to INPUT_DAFAULT_MAX_CHARACTERS before being embedded, a token
+    # budget is compared with the characters it is expected to span
+    chunk_characters = chunk_size
+    if chunk_unit == ChunkUnitEnum.TOKEN:
+        chunk_characters = chunk_size * CHARACTERS_PER_TOKEN
+
+    if app_settings.INPUT_DAFAULT_MAX_CHARACTERS and chunk_characters > app_settings.INPUT_DAFAULT_MAX_CHARACTERS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.CHUNK_SIZE_TOO_LARGE.value
+                }
+        )
+
+    project_model = request.app.model_registry.project_model
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    asset_model = await AssetModel.create_instance(
-        db_client=request.app.db_client
-    )
+    asset_model = request.app.model_registry.asset_model
 
     project_files_ids = {}
     if process_request.file_id:
@@ -124,7 +361,8 @@ async def process_endpoint(request: Request, project_id: str , process_request:
 
         project_files = await asset_model.get_all_project_assets(
             asset_project_id=project.id,
-            asset_type=AssetTypeEnum.FILE.value
+            asset_type=AssetTypeEnum.FILE.value,
+            fields=["asset_name"]
         )
 
         project_files_ids = {
@@ -142,59 +380,86 @@ async def process_endpoint(request: Request, project_id: str , process_request:
 
     process_controller = PorcessController(project_id=project_id)
 
-    chunk_model = await ChunkModel.create_instance(
-        db_client=request.app.db_client
-    )
+    chunk_model = request.app.model_registry.chunk_model
+    lexical_index = request.app.lexical_index
 
     no_records = 0
     no_files = 0
+    files_report = []
 
-    if do_reset:
-        
-        await chunk_model.delete_chunks_by_project_id(project_id=project.id)
+    # the lexical index of the project is changed by one request, in any worker, at a time
+    lexical_lock = lexical_index.lock_project(project) if lexical_index is not None else nullcontext()
 
-    for asset_id , file_id in project_files_ids.items():
-        file_content = process_controller.get_file_content(file_id=file_id)
+    async with lexical_lock:
 
-        if file_content is None:
-            logger.error(f"File content is None for file id: {file_id}")
-            continue
+        if do_reset:
+        
+            await chunk_model.delete_chunks_by_project_id(project_id=project.id)
 
-        file_chunks = process_controller.process_file_content(
-            file_content=file_content,
-            file_id=file_id,
+            if lexical_index is not None:
+                await lexical_index.reset(project=project)
+
+        async for file_result in process_controller.process_files(
+            project_files_ids=project_files_ids,
             chunck_size=chunk_size,
-            overlap_size=overlap_size
-        )
+            overlap_size=overlap_size,
+            chunk_unit=chunk_unit.value
+        ):
+            asset_id, file_id = file_result["asset_id"], file_result["file_id"]
+            file_chunks = file_result["chunks"]
+
+            file_report = {
+                "file_id": file_id,
+                "seconds": round(file_result["seconds"], 3),
+                "inserted_chunks": 0,
+            }
+            files_report.append(file_report)
 
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal": ResponseSignal.FILE_PROCESSING_FAILED.value
-                    }
-            )    
+            if file_result["error"] or file_chunks is None or len(file_chunks) == 0:
+                logger.error(f"File processing failed for file id: {file_id} {file_result['error'] or ''}")
+                file_report["error"] = ResponseSignal.FILE_PROCESSING_FAILED.value
+                continue
         
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order=i+1,
-                chunk_project_id=project.id,
-                chunk_asset_id=asset_id
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
-
-
-        no_records += await chunk_model.insert_many_chunks(file_chunks_records)
-        no_files += 1
+            file_chunks_records = [
+                DataChunk(
+                    chunk_text=chunk_text,
+                    chunk_metadata=chunk_metadata,
+                    chunk_order=i+1,
+                    chunk_project_id=project.id,
+                    chunk_asset_id=asset_id
+                )
+                for i, (chunk_text, chunk_metadata) in enumerate(file_chunks)
+            ]
+
+            file_report["inserted_chunks"] = await chunk_model.insert_many_chunks(file_chunks_records)
+            no_records += file_report["inserted_chunks"]
+            no_files += 1
+
+            if lexical_index is not None:
+                await lexical_index.add_chunks(project=project, chunks=file_chunks_records)
+
+        if lexical_index is not None and (no_files > 0 or do_reset):
+            await lexical_index.save(project=project)
+
+            # sparse search results changed, cached answers of the project are stale
+            await project_model.increment_index_version(project_id=project.id)
+
+    if no_files == 0:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.FILE_PROCESSING_FAILED.value,
+                "files": files_report
+                }
+        )
 
     return JSONResponse(
         content={
             "signal": ResponseSignal.FILE_PROCESSED_SUCCESS.value,
             "inserted_chunks": no_records,
-            "processed_files": no_files
+            "processed_files": no_files,
+            "failed_files": len(files_report) - no_files,
+            "files": files_report
         }
     )
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, status, Request
-from fastapi.responses import JSONResponse
-from .schemes import IndexPushRequest, SearchIndexRequest
-from models import ProjectModel, ChunkModel
+from fastapi import APIRouter, status, Request, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+from .schemes import IndexPushRequest, SearchIndexRequest, SearchBatchIndexRequest
 from models.enums.ResponseEnum import ResponseSignal
+from helpers.config import get_settings, Setting
+from helpers.tracing import add_request_timings
 from controllers import NLPController
 import logging
+import json
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -17,17 +19,11 @@ nlp_router = APIRouter(
 @nlp_router.post("/index/push/{project_id}")
 async def index_project(request: Request, project_id: str, push_request: IndexPushRequest):
 
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    project_model = request.app.model_registry.project_model
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    chunk_model = await ChunkModel.create_instance(
-        db_client=request.app.db_client
-    )
-
     if not project:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -35,60 +31,97 @@ async def index_project(request: Request, project_id: str, push_request: IndexPu
                 "signal": ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
             }
         )
-    
-    nlp_controller = NLPController(
-        vector_db_client=request.app.vector_db_client,
-        generation_client=request.app.generation_client,
-        embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser
+
+    index_job_controller = request.app.index_job_controller
+
+    job = await index_job_controller.submit_job(
+        project=project,
+        do_reset=push_request.do_reset,
+        do_delta=push_request.do_delta
     )
 
-    has_records = True
-    page_no = 1
-    inserted_chunk_count = 0
-    idx  = 0
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "signal": ResponseSignal.INDEX_JOB_SUBMITTED.value,
+            "job_id": str(job.id)
+        }
+    )
 
-    while has_records:
-        page_chunks = await chunk_model.get_poject_chunks(project_id=project.id, page_no=page_no)
-        if not page_chunks or len(page_chunks) == 0:
-            has_records = False
-            continue
-        
-        page_no += 1
 
-        chunk_ids = list(range(idx, idx + len(page_chunks)))
-        idx += len(page_chunks)
+@nlp_router.get("/index/jobs/{job_id}")
+async def get_index_job(request: Request, job_id: str):
 
-        is_inserted = nlp_controller.index_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            chunks_ids=chunk_ids,
-            do_reset=push_request.do_reset
+    index_job_controller = request.app.index_job_controller
+
+    job = await index_job_controller.get_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.INDEX_JOB_NOT_FOUND.value
+            }
         )
 
-        if not is_inserted:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal": ResponseSignal.INSERT_INTO_VECTOR_DB_FAILED.value
-                }
-            )
-        
-        inserted_chunk_count += len(page_chunks)
-    
     return JSONResponse(
         content={
-            "signal": ResponseSignal.INSERT_INTO_VECTOR_DB_SUCCESS.value,
-            "inserted_chunks": inserted_chunk_count
+            "signal": ResponseSignal.INDEX_JOB_STATUS_SUCCESS.value,
+            "job": index_job_controller.get_job_progress(job=job)
+        }
+    )
+
+
+@nlp_router.post("/index/jobs/{job_id}/cancel")
+async def cancel_index_job(request: Request, job_id: str):
+
+    index_job_controller = request.app.index_job_controller
+
+    job = await index_job_controller.cancel_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.INDEX_JOB_CANCEL_FAILED.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.INDEX_JOB_CANCEL_SUCCESS.value,
+            "job": index_job_controller.get_job_progress(job=job)
+        }
+    )
+
+
+@nlp_router.post("/index/jobs/{job_id}/resume")
+async def resume_index_job(request: Request, job_id: str):
+
+    index_job_controller = request.app.index_job_controller
+
+    job = await index_job_controller.resume_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.INDEX_JOB_RESUME_FAILED.value
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "signal": ResponseSignal.INDEX_JOB_RESUME_SUCCESS.value,
+            "job": index_job_controller.get_job_progress(job=job)
         }
     )
         
 
 @nlp_router.get("/index/info/{project_id}")
 async def get_project_index_info(request: Request, project_id: str):
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    project_model = request.app.model_registry.project_model
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
@@ -100,7 +133,7 @@ async def get_project_index_info(request: Request, project_id: str):
         template_parser=request.app.template_parser
     )
 
-    collection_info = nlp_controller.get_vector_db_collection_info(project=project)
+    collection_info = await nlp_controller.get_vector_db_collection_info(project=project)
 
 
     return JSONResponse(
@@ -114,9 +147,55 @@ async def get_project_index_info(request: Request, project_id: str):
 @nlp_router.post("/index/search/{project_id}")
 async def search_index(request: Request, project_id: str, search_request: SearchIndexRequest):
 
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
+    project_model = request.app.model_registry.project_model
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    nlp_controller = NLPController(
+        vector_db_client=request.app.vector_db_client,
+        generation_client=request.app.generation_client,
+        embedding_client=request.app.embedding_client,
+        template_parser=request.app.template_parser,
+        lexical_index=request.app.lexical_index
+    )
+
+    results = await nlp_controller.search_vector_db_collection(
+        project=project,
+        query=search_request.text,
+        limit=search_request.limit,
+        mode=search_request.mode.value
+    )
+
+    if not results:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.SEARCH_INDEX_FAILED.value
+            }
+        )
+
+    return JSONResponse(
+        content=add_request_timings({
+            "signal": ResponseSignal.SEARCH_INDEX_SUCCESS.value,
+            "results": [result.dict() for result in results]
+        })
     )
+
+
+@nlp_router.post("/index/search/batch/{project_id}")
+async def search_index_batch(request: Request, project_id: str, search_request: SearchBatchIndexRequest,
+                             app_settings: Setting = Depends(get_settings)):
+
+    if len(search_request.texts) > app_settings.SEARCH_BATCH_MAX_QUERIES:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.SEARCH_BATCH_TOO_LARGE.value
+            }
+        )
+
+    project_model = request.app.model_registry.project_model
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
@@ -128,9 +207,9 @@ async def search_index(request: Request, project_id: str, search_request: Search
         template_parser=request.app.template_parser
     )
 
-    results = nlp_controller.search_vector_db_collection(
+    results = await nlp_controller.search_vector_db_collection_batch(
         project=project,
-        query=search_request.text,
+        queries=search_request.texts,
         limit=search_request.limit
     )
 
@@ -143,10 +222,16 @@ async def search_index(request: Request, project_id: str, search_request: Search
         )
 
     return JSONResponse(
-        content={
+        content=add_request_timings({
             "signal": ResponseSignal.SEARCH_INDEX_SUCCESS.value,
-            "results": [result.dict() for result in results]
-        }
+            "results": [
+                {
+                    "text": text,
+                    "results": [result.dict() for result in query_results]
+                }
+                for text, query_results in zip(search_request.texts, results)
+            ]
+        })
     )
     
 
@@ -154,9 +239,7 @@ async def search_index(request: Request, project_id: str, search_request: Search
 @nlp_router.post("/index/answer/{project_id}")
 async def answer_rag(request: Request, project_id: str, search_request: SearchIndexRequest):
     
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    project_model = request.app.model_registry.project_model
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
@@ -167,12 +250,15 @@ async def answer_rag(request: Request, project_id: str, search_request: SearchIn
         generation_client=request.app.generation_client,
         embedding_client=request.app.embedding_client,
         template_parser=request.app.template_parser,
+        lexical_index=request.app.lexical_index,
+        answer_cache=request.app.answer_cache,
     )
 
-    answer, full_prompt, chat_history = nlp_controller.answer_rag_question(
+    answer, full_prompt, chat_history = await nlp_controller.answer_rag_question(
         project=project,
         query=search_request.text,
         limit=search_request.limit,
+        mode=search_request.mode.value,
     )
 
     if not answer:
@@ -184,10 +270,71 @@ async def answer_rag(request: Request, project_id: str, search_request: SearchIn
         )
     
     return JSONResponse(
-        content={
+        content=add_request_timings({
             "signal": ResponseSignal.ANSWER_RAG_QUESTION_SUCCESS.value,
             "answer": answer,
             "full_prompt": full_prompt,
             "chat_history": chat_history
-        }
-    )
\ No newline at end of file
+        })
+    )
+
+
+@nlp_router.post("/index/answer/stream/{project_id}")
+async def answer_rag_stream(request: Request, project_id: str, search_request: SearchIndexRequest):
+
+    project_model = request.app.model_registry.project_model
+
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    nlp_controller = NLPController(
+        vector_db_client=request.app.vector_db_client,
+        generation_client=request.app.generation_client,
+        embedding_client=request.app.embedding_client,
+        template_parser=request.app.template_parser,
+        lexical_index=request.app.lexical_index,
+    )
+
+    retrieved_docs = await nlp_controller.search_vector_db_collection(
+        project=project,
+        query=search_request.text,
+        limit=search_request.limit,
+        mode=search_request.mode.value,
+    )
+
+    if not retrieved_docs:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseSignal.ANSWER_RAG_QUESTION_FAILED.value
+                }
+        )
+
+    async def answer_events():
+        # one JSON object per line: the sources first, then the tokens as they arrive
+        yield json.dumps({
+            "event": "sources",
+            "sources": [doc.dict() for doc in retrieved_docs]
+        }) + "\n"
+
+        try:
+            async for token in nlp_controller.stream_rag_answer(
+                query=search_request.text,
+                retrieved_docs=retrieved_docs
+            ):
+                yield json.dumps({ "event": "token", "text": token }) + "\n"
+        except Exception as e:
+            logger.error(f"Error while streaming the answer: {e}")
+            yield json.dumps({
+                "event": "error",
+                "signal": ResponseSignal.ANSWER_RAG_QUESTION_FAILED.value
+            }) + "\n"
+            return
+
+        yield json.dumps(add_request_timings({
+            "event": "done",
+            "signal": ResponseSignal.ANSWER_RAG_QUESTION_SUCCESS.value
+        })) + "\n"
+
+    return StreamingResponse(answer_events(), media_type="application/x-ndjson")
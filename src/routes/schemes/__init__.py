@@ -1,2 +1,2 @@
-from .data import ProcessRequest
-from .nlp import IndexPushRequest, SearchIndexRequest
+from .data import ProcessRequest, UploadInitRequest
+from .nlp import IndexPushRequest, SearchIndexRequest, SearchBatchIndexRequest
@@ -1,10 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from models.enums.ChunkUnitEnum import ChunkUnitEnum
 
 class ProcessRequest(BaseModel):
     
     file_id: str = None
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int] = 20
+    chunk_unit: ChunkUnitEnum = ChunkUnitEnum.CHARACTER
     do_reset: Optional[int] = 0
-    
\ No newline at end of file
+
+class UploadInitRequest(BaseModel):
+
+    file_name: str = Field(..., min_length=1)
+    file_size: int = Field(..., gt=0)
+    content_type: str
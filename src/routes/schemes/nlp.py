@@ -1,11 +1,19 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+from stores.lexical.LexicalEnum import SearchModeEnum
 
 class IndexPushRequest(BaseModel):
     
     do_reset: Optional[int] = 0
+    do_delta: Optional[int] = 0
 
 class SearchIndexRequest(BaseModel):
     
     text: str
-    limit: Optional[int] = 5
\ No newline at end of file
+    limit: Optional[int] = 5
+    mode: SearchModeEnum = SearchModeEnum.DENSE
+
+class SearchBatchIndexRequest(BaseModel):
+
+    texts: List[str]
+    limit: Optional[int] = 5
@@ -0,0 +1,239 @@
+from array import array
+from collections import Counter
+import numpy as np
+import threading
+import math
+import re
+
+
+# words, plus identifiers such as error codes or versions kept whole (ERR-1042, v1.2.3)
+TOKEN_PATTERN = re.compile(r"\w+(?:[-.:/]\w+)*")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def encode_strings(values: list):
+    # utf-8 bytes of all the strings and the offset of each one, two plain numpy arrays
+    encoded = [ value.encode("utf-8") for value in values ]
+
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([ len(value) for value in encoded ], dtype=np.int64)
+
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(data: np.ndarray, offsets: np.ndarray):
+    data, offsets = data.tobytes(), offsets.tolist()
+    return [ data[offsets[idx]:offsets[idx + 1]].decode("utf-8") for idx in range(len(offsets) - 1) ]
+
+
+# BM25 inverted index over the chunks of one project, keyed by the chunk id.
+# Every term keeps its postings in two flat arrays (doc ids and term frequencies),
+# removed documents are tombstoned and compacted away once they outnumber the live ones.
+class BM25Index:
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self.vocabulary = {}
+        self.postings_docs = []
+        self.postings_freqs = []
+
+        self.doc_keys = []
+        self.doc_ids = {}
+        self.doc_lengths = array("I")
+        self.deleted = array("B")
+
+        self.total_length = 0
+
+        self.lock = threading.RLock()
+
+    def to_arrays(self):
+        # the index as flat numpy arrays, saved with numpy.savez and loaded back without pickle.
+        # the posting lists are concatenated in term id order, offsets delimit them
+        with self.lock:
+            terms = sorted(self.vocabulary, key=self.vocabulary.get)
+            terms_data, terms_offsets = encode_strings(terms)
+            keys_data, keys_offsets = encode_strings(self.doc_keys)
+
+            postings_offsets = np.zeros(len(self.postings_docs) + 1, dtype=np.int64)
+            postings_offsets[1:] = np.cumsum([ len(docs) for docs in self.postings_docs ], dtype=np.int64)
+
+            return {
+                "params": np.array([ self.k1, self.b ], dtype=np.float64),
+                "total_length": np.array([ self.total_length ], dtype=np.int64),
+                "terms_data": terms_data,
+                "terms_offsets": terms_offsets,
+                "postings_offsets": postings_offsets,
+                "postings_docs": np.frombuffer(b"".join(docs.tobytes() for docs in self.postings_docs),
+                                               dtype=np.uint32),
+                "postings_freqs": np.frombuffer(b"".join(freqs.tobytes() for freqs in self.postings_freqs),
+                                                dtype=np.uint32),
+                "keys_data": keys_data,
+                "keys_offsets": keys_offsets,
+                "doc_lengths": np.frombuffer(self.doc_lengths, dtype=np.uint32).copy(),
+                "deleted": np.frombuffer(self.deleted, dtype=np.uint8).copy(),
+            }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        k1, b = arrays["params"].tolist()
+        index = cls(k1=k1, b=b)
+
+        offsets = arrays["postings_offsets"].tolist()
+        docs = arrays["postings_docs"].astype(np.uint32).tobytes()
+        freqs = arrays["postings_freqs"].astype(np.uint32).tobytes()
+        itemsize = np.dtype(np.uint32).itemsize
+
+        index.vocabulary = {
+            term: term_id
+            for term_id, term in enumerate(decode_strings(arrays["terms_data"], arrays["terms_offsets"]))
+        }
+        index.postings_docs = [
+            array("I", docs[offsets[idx] * itemsize:offsets[idx + 1] * itemsize])
+            for idx in range(len(offsets) - 1)
+        ]
+        index.postings_freqs = [
+            array("I", freqs[offsets[idx] * itemsize:offsets[idx + 1] * itemsize])
+            for idx in range(len(offsets) - 1)
+        ]
+
+        index.doc_keys = decode_strings(arrays["keys_data"], arrays["keys_offsets"])
+        index.doc_lengths = array("I", arrays["doc_lengths"].astype(np.uint32).tobytes())
+        index.deleted = array("B", arrays["deleted"].astype(np.uint8).tobytes())
+        index.doc_ids = {
+            key: doc_id
+            for doc_id, key in enumerate(index.doc_keys)
+            if not index.deleted[doc_id]
+        }
+        index.total_length = int(arrays["total_length"][0])
+
+        if len(index.postings_docs) != len(index.vocabulary) or len(index.doc_lengths) != len(index.doc_keys):
+            raise ValueError("Inconsistent BM25 index arrays")
+
+        return index
+
+    @staticmethod
+    def tokenize(text: str):
+        tokens = []
+
+        for match in TOKEN_PATTERN.finditer(text.lower()):
+            token = match.group()
+            tokens.append(token)
+
+            # a compound token is also searchable by its parts
+            if not token.isalnum():
+                tokens.extend(WORD_PATTERN.findall(token))
+
+        return tokens
+
+    def get_documents_count(self):
+        return len(self.doc_ids)
+
+    def add_documents(self, keys: list, texts: list):
+
+        with self.lock:
+            # re-adding a key replaces the previous document
+            self.remove_documents([ key for key in keys if key in self.doc_ids ])
+
+            for key, text in zip(keys, texts):
+                tokens = self.tokenize(text)
+                doc_id = len(self.doc_keys)
+
+                for term, freq in Counter(tokens).items():
+                    term_id = self.vocabulary.get(term)
+                    if term_id is None:
+                        term_id = len(self.postings_docs)
+                        self.vocabulary[term] = term_id
+                        self.postings_docs.append(array("I"))
+                        self.postings_freqs.append(array("I"))
+
+                    self.postings_docs[term_id].append(doc_id)
+                    self.postings_freqs[term_id].append(freq)
+
+                self.doc_keys.append(key)
+                self.doc_ids[key] = doc_id
+                self.doc_lengths.append(len(tokens))
+                self.deleted.append(0)
+                self.total_length += len(tokens)
+
+    def remove_documents(self, keys: list):
+
+        with self.lock:
+            for key in keys:
+                doc_id = self.doc_ids.pop(key, None)
+                if doc_id is None:
+                    continue
+
+                self.deleted[doc_id] = 1
+                self.total_length -= self.doc_lengths[doc_id]
+
+            if len(self.doc_keys) - len(self.doc_ids) > len(self.doc_ids):
+                self.compact()
+
+    def compact(self):
+        # renumber the live documents and drop the tombstoned ones from every posting list
+        deleted = np.frombuffer(self.deleted, dtype=np.uint8).astype(bool)
+        new_ids = np.cumsum(~deleted, dtype=np.int64) - 1
+
+        vocabulary, postings_docs, postings_freqs = {}, [], []
+        for term, term_id in self.vocabulary.items():
+            docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+            freqs = np.frombuffer(self.postings_freqs[term_id], dtype=np.uint32)
+
+            keep = ~deleted[docs]
+            if not keep.any():
+                continue
+
+            vocabulary[term] = len(postings_docs)
+            postings_docs.append(array("I", new_ids[docs[keep]].astype(np.uint32).tobytes()))
+            postings_freqs.append(array("I", freqs[keep].tobytes()))
+
+        live = np.flatnonzero(~deleted)
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)[live]
+
+        self.vocabulary = vocabulary
+        self.postings_docs = postings_docs
+        self.postings_freqs = postings_freqs
+        self.doc_keys = [ self.doc_keys[doc_id] for doc_id in live ]
+        self.doc_ids = { key: doc_id for doc_id, key in enumerate(self.doc_keys) }
+        self.doc_lengths = array("I", lengths.tobytes())
+        self.deleted = array("B", bytes(len(self.doc_keys)))
+
+    def search(self, query: str, limit: int = 5):
+        # returns [(key, score)] best match first
+
+        with self.lock:
+            documents_count = len(self.doc_ids)
+            term_ids = {
+                self.vocabulary[term]
+                for term in self.tokenize(query)
+                if term in self.vocabulary
+            }
+
+            if documents_count == 0 or len(term_ids) == 0 or limit <= 0:
+                return []
+
+            avg_length = max(self.total_length / documents_count, 1.0)
+            lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)
+            scores = np.zeros(len(self.doc_keys), dtype=np.float32)
+
+            for term_id in term_ids:
+                docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+                freqs = np.frombuffer(self.postings_freqs[term_id], dtype=np.uint32).astype(np.float32)
+
+                # document frequency counts tombstones until the next compaction
+                doc_freq = len(docs)
+                idf = math.log(1 + (documents_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+                norms = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_length)
+                scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + norms)
+
+            scores[np.frombuffer(self.deleted, dtype=np.uint8).astype(bool)] = 0
+
+            matches = np.flatnonzero(scores > 0)
+            if len(matches) > limit:
+                matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+            matches = matches[np.argsort(-scores[matches])]
+
+            return [ (self.doc_keys[doc_id], float(scores[doc_id])) for doc_id in matches ]
@@ -0,0 +1,204 @@
+from .BM25Index import BM25Index
+from models.db_schemes import DataChunk, RetrievedDocument
+from helpers.concurrency import run_in_thread_pool
+from helpers.tracing import traced
+from bson.objectid import ObjectId
+from contextlib import asynccontextmanager
+from typing import List
+import numpy as np
+import asyncio
+import logging
+import fcntl
+import os
+import re
+
+
+# seconds between two attempts at the write lock of a project held by another process
+FILE_LOCK_POLL_SECONDS = 0.05
+
+
+# per project BM25 indexes, loaded lazily and persisted as one file per project under db_path.
+# A project without an index file (processed before the lexical index existed) is built
+# from its chunks on first use.
+#
+# Several processes (workers) share the files. A cached index is reloaded as soon as
+# another process replaced its file, and the writers of a project are serialized across
+# processes with a file lock (see lock_project) so that none overwrites the others' chunks.
+class LexicalIndexStore:
+
+    def __init__(self, db_path: str, chunk_model, k1: float = 1.2, b: float = 0.75):
+        self.db_path = db_path
+        self.chunk_model = chunk_model
+        self.k1 = k1
+        self.b = b
+
+        # project_id -> (index, stamp of the file it was loaded from or saved to)
+        self.indexes = {}
+        self.load_lock = asyncio.Lock()
+        self.project_locks = {}
+
+        self.logger = logging.getLogger(__name__)
+
+    def get_index_path(self, project_id: str):
+        # project ids end up as file names
+        file_name = re.sub(r"[^\w\-]", "_", project_id)
+        return os.path.join(self.db_path, f"{file_name}.bm25")
+
+    @staticmethod
+    def get_file_stamp(stat: os.stat_result):
+        # a saved index is always a new file (os.replace), the stamp changes on every save
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def get_index_stamp(self, project_id: str):
+        try:
+            return self.get_file_stamp(os.stat(self.get_index_path(project_id)))
+        except FileNotFoundError:
+            return None
+
+    def load_index(self, project_id: str):
+        # returns (index, stamp), the arrays are loaded without pickle
+        index_path = self.get_index_path(project_id)
+        if not os.path.exists(index_path):
+            return None, None
+
+        with open(index_path, "rb") as f:
+            stamp = self.get_file_stamp(os.fstat(f.fileno()))
+
+            with np.load(f, allow_pickle=False) as arrays:
+                return BM25Index.from_arrays(arrays), stamp
+
+    def save_index(self, project_id: str, index: BM25Index):
+        # written next to the index and swapped in, readers see the old or the new file.
+        # returns the stamp of the saved file
+        index_path = self.get_index_path(project_id)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+
+        arrays = index.to_arrays()
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+
+        os.replace(tmp_path, index_path)
+
+        return self.get_index_stamp(project_id)
+
+    async def acquire_file_lock(self, project_id: str):
+        lock_file = open(self.get_index_path(project_id) + ".lock", "a")
+
+        try:
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return lock_file
+                except BlockingIOError:
+                    await asyncio.sleep(FILE_LOCK_POLL_SECONDS)
+        except BaseException:
+            lock_file.close()
+            raise
+
+    @asynccontextmanager
+    async def lock_project(self, project):
+        # held around every change of a project index: reset, add_chunks and save.
+        # The index is reloaded on entry if another process saved it since, so the changes
+        # apply to the latest one
+        project_lock = self.project_locks.setdefault(project.project_id, asyncio.Lock())
+
+        async with project_lock:
+            lock_file = await self.acquire_file_lock(project.project_id)
+
+            try:
+                cached = self.indexes.get(project.project_id)
+                if cached is None or cached[1] != self.get_index_stamp(project.project_id):
+                    index = await self.load(project=project)
+
+                    if index is None:
+                        index = await self.build_index(project_id=project.id)
+                        await self.save(project=project, index=index)
+
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+
+    async def load(self, project):
+        # the saved index, cached with its stamp. None when there is none or it is unreadable
+        try:
+            index, stamp = await run_in_thread_pool(self.load_index, project_id=project.project_id)
+        except Exception as e:
+            self.logger.error(f"Error while loading the lexical index of {project.project_id}: {e}")
+            return None
+
+        if index is not None:
+            self.indexes[project.project_id] = (index, stamp)
+
+        return index
+
+    async def build_index(self, project_id: ObjectId):
+        index = BM25Index(k1=self.k1, b=self.b)
+
+        async for chunks in self.chunk_model.iterate_project_chunks(project_id=project_id, fields=["chunk_text"]):
+            await run_in_thread_pool(index.add_documents,
+                                     keys=[ str(chunk.id) for chunk in chunks ],
+                                     texts=[ chunk.chunk_text for chunk in chunks ])
+
+        return index
+
+    async def get_index(self, project) -> BM25Index:
+        cached = self.indexes.get(project.project_id)
+        stamp = self.get_index_stamp(project.project_id)
+        if cached is not None and cached[1] == stamp:
+            return cached[0]
+
+        if stamp is not None:
+            async with self.load_lock:
+                cached = self.indexes.get(project.project_id)
+                if cached is not None and cached[1] == self.get_index_stamp(project.project_id):
+                    return cached[0]
+
+                index = await self.load(project=project)
+                if index is not None:
+                    return index
+
+        # no index file yet, or an unreadable one: built from the chunks and saved under the write lock
+        async with self.lock_project(project):
+            return self.indexes[project.project_id][0]
+
+    async def save(self, project, index: BM25Index = None):
+        # to be called under lock_project
+        if index is None:
+            cached = self.indexes.get(project.project_id)
+            if cached is None:
+                return
+            index = cached[0]
+
+        stamp = await run_in_thread_pool(self.save_index, project_id=project.project_id, index=index)
+        self.indexes[project.project_id] = (index, stamp)
+
+    @traced("lexical.add_chunks")
+    async def add_chunks(self, project, chunks: List[DataChunk]):
+        index = await self.get_index(project)
+
+        await run_in_thread_pool(index.add_documents,
+                                 keys=[ str(chunk.id) for chunk in chunks ],
+                                 texts=[ chunk.chunk_text for chunk in chunks ])
+
+    async def reset(self, project):
+        # to be called under lock_project, like add_chunks
+        await self.save(project=project, index=BM25Index(k1=self.k1, b=self.b))
+
+    @traced("lexical.search")
+    async def search(self, project, query: str, limit: int = 5) -> List[RetrievedDocument]:
+        index = await self.get_index(project)
+
+        hits = await run_in_thread_pool(index.search, query=query, limit=limit)
+        if len(hits) == 0:
+            return []
+
+        chunks = await self.chunk_model.get_chunks_by_ids(chunk_ids=[ ObjectId(key) for key, _ in hits ],
+                                                          fields=["chunk_text"])
+        texts = { str(chunk.id): chunk.chunk_text for chunk in chunks }
+
+        return [
+            RetrievedDocument(text=texts[key], score=score)
+            for key, score in hits
+            if key in texts
+        ]
@@ -0,0 +1,193 @@
+from models import EmbeddingCacheModel
+from models.db_schemes import EmbeddingCacheEntry
+from .LLMEnum import DocumentTypeEnum
+from collections import OrderedDict
+from array import array
+import threading
+import asyncio
+import hashlib
+import logging
+import time
+
+
+# two tier embedding cache: an in-memory LRU in front of a Mongo store,
+# entries are keyed by (embedding model id, document type, hash of the processed text).
+# Hits only touch the store entries (their last use drives the store eviction) in batches,
+# written in the background every touch_interval seconds or touch_batch_size keys
+class EmbeddingCache:
+
+    def __init__(self, cache_model: EmbeddingCacheModel = None,
+                        memory_max_entries: int = 10000,
+                        store_max_entries: int = 1000000,
+                        store_eviction_interval: int = 1000,
+                        touch_batch_size: int = 1000,
+                        touch_interval: float = 60.0):
+
+        self.cache_model = cache_model
+        self.memory_max_entries = memory_max_entries
+        self.store_max_entries = store_max_entries
+        self.store_eviction_interval = store_eviction_interval
+        self.touch_batch_size = touch_batch_size
+        self.touch_interval = touch_interval
+
+        self.memory = OrderedDict()
+        self.store_writes = 0
+
+        # the blocking path collects touched keys from worker threads
+        self.touched_keys = set()
+        self.touched_lock = threading.Lock()
+        self.touched_at = time.monotonic()
+        self.touch_task = None
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+        self.logger = logging.getLogger(__name__)
+
+    def get_key(self, model_id: str, document_type: str, text: str):
+        document_type = document_type if document_type else DocumentTypeEnum.DOCUMENT.value
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        return hashlib.sha256(
+            f"{model_id}\x1f{document_type}\x1f{text_hash}".encode("utf-8")
+        ).hexdigest()
+
+    def pack_vector(self, vector: list):
+        return array("f", vector).tobytes()
+
+    def unpack_vector(self, packed: bytes):
+        vector = array("f")
+        vector.frombytes(packed)
+        return vector.tolist()
+
+    def get_from_memory(self, keys: list):
+        found = {}
+
+        for key in keys:
+            vector = self.memory.get(key)
+            if vector is not None:
+                self.memory.move_to_end(key)
+                found[key] = vector
+
+        self.touch(found.keys())
+
+        return found
+
+    def touch(self, keys):
+        if self.cache_model is None or not keys:
+            return
+
+        with self.touched_lock:
+            self.touched_keys.update(keys)
+
+    def schedule_touch_flush(self):
+        if self.touch_task is not None and not self.touch_task.done():
+            return
+
+        with self.touched_lock:
+            due = len(self.touched_keys) >= self.touch_batch_size or \
+                  (self.touched_keys and time.monotonic() - self.touched_at >= self.touch_interval)
+
+        if due:
+            self.touch_task = asyncio.create_task(self.flush_touched())
+
+    async def flush_touched(self):
+        with self.touched_lock:
+            keys, self.touched_keys = list(self.touched_keys), set()
+            self.touched_at = time.monotonic()
+
+        if self.cache_model is None or not keys:
+            return
+
+        try:
+            await self.cache_model.touch_entries(keys=keys)
+        except Exception as e:
+            self.logger.error(f"Error while touching the embedding cache store entries: {e}")
+
+    def put_in_memory(self, vectors: dict):
+
+        for key, vector in vectors.items():
+            self.memory[key] = vector
+            self.memory.move_to_end(key)
+
+        while len(self.memory) > self.memory_max_entries:
+            self.memory.popitem(last=False)
+
+    def count_lookups(self, keys: list, memory_found: dict, store_found: dict = None):
+        store_found = store_found if store_found else {}
+
+        for key in keys:
+            if key in memory_found:
+                self.memory_hits += 1
+            elif key in store_found:
+                self.store_hits += 1
+            else:
+                self.misses += 1
+
+    def get_many_from_memory(self, keys: list):
+        found = self.get_from_memory(keys)
+        self.count_lookups(keys, memory_found=found)
+        return found
+
+    async def get_many(self, keys: list):
+
+        memory_found = self.get_from_memory(keys)
+        store_found = {}
+
+        missing_keys = list({ key for key in keys if key not in memory_found })
+        if missing_keys and self.cache_model is not None:
+            try:
+                packed_vectors = await self.cache_model.get_vectors(keys=missing_keys)
+                store_found = {
+                    key: self.unpack_vector(packed)
+                    for key, packed in packed_vectors.items()
+                }
+
+                if store_found:
+                    self.put_in_memory(store_found)
+                    self.touch(store_found.keys())
+            except Exception as e:
+                self.logger.error(f"Error while reading the embedding cache store: {e}")
+
+        self.count_lookups(keys, memory_found=memory_found, store_found=store_found)
+        self.schedule_touch_flush()
+
+        return { **memory_found, **store_found }
+
+    async def put_many(self, vectors: dict, model_id: str, document_type: str):
+
+        self.put_in_memory(vectors)
+
+        if self.cache_model is None:
+            return
+
+        document_type = document_type if document_type else DocumentTypeEnum.DOCUMENT.value
+
+        try:
+            self.store_writes += await self.cache_model.insert_many_entries(entries=[
+                EmbeddingCacheEntry(
+                    _id=key,
+                    cache_model_id=model_id,
+                    cache_document_type=document_type,
+                    cache_vector=self.pack_vector(vector)
+                )
+                for key, vector in vectors.items()
+            ])
+
+            if self.store_writes >= self.store_eviction_interval:
+                self.store_writes = 0
+                await self.cache_model.evict_entries(max_entries=self.store_max_entries)
+        except Exception as e:
+            self.logger.error(f"Error while writing the embedding cache store: {e}")
+
+    def get_stats(self):
+        lookups = self.memory_hits + self.store_hits + self.misses
+
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -23,6 +23,8 @@ class CoHereEnum(Enum):
     DOCUMENT = "search_document"
     QUERY = "search_query"
 
+    TEXT_GENERATION_EVENT = "text-generation"
+
 
 class DocumentTypeEnum(Enum):
     
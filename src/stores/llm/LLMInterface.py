@@ -1,7 +1,17 @@
 
 from abc import ABC, abstractmethod
+from helpers.concurrency import run_in_thread_pool
+from helpers.tracing import instrument_class
 
 class LLMInterface(ABC):
+
+    # timed in every provider by the tracing layer
+    traced_methods = { "generate_text", "agenerate_text", "generate_text_stream",
+                       "embed_text", "aembed_text", "embed_texts", "aembed_texts" }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_class(cls, prefix="llm", method_names=cls.traced_methods)
     
     @abstractmethod
     def set_generation_model(self, model_id: str):
@@ -20,6 +30,55 @@ class LLMInterface(ABC):
     def embed_text(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        pass
+
     @abstractmethod
     def construct_prompt(self, prompt:str , role:str):
-        pass
\ No newline at end of file
+        pass
+
+    # async variants, providers with a native async client override these,
+    # otherwise the blocking call runs on the shared thread pool
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                temperature: float = None):
+        return await run_in_thread_pool(
+            self.generate_text, prompt=prompt, chat_history=chat_history,
+            max_output_tokens=max_output_tokens, temperature=temperature
+        )
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                      temperature: float = None):
+        # providers without streaming support yield the whole completion at once
+        text = await self.agenerate_text(prompt=prompt, chat_history=chat_history,
+                                         max_output_tokens=max_output_tokens, temperature=temperature)
+        if text:
+            yield text
+
+    async def aembed_text(self, text: str, document_type: str = None):
+        return await run_in_thread_pool(self.embed_text, text=text, document_type=document_type)
+
+    async def aembed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        return await run_in_thread_pool(
+            self.embed_texts, texts=texts, document_type=document_type, batch_size=batch_size
+        )
+
+    def get_text_batches(self, texts: list, batch_size: int, max_batch_tokens: int = None):
+        # split texts into batches bounded by the number of inputs and
+        # (roughly, ~4 characters per token) by the total number of tokens
+        batch, batch_tokens = [], 0
+
+        for text in texts:
+            text_tokens = len(text) // 4 + 1
+
+            if batch and (len(batch) >= batch_size or 
+                          (max_batch_tokens and batch_tokens + text_tokens > max_batch_tokens)):
+                yield batch
+                batch, batch_tokens = [], 0
+
+            batch.append(text)
+            batch_tokens += text_tokens
+
+        if batch:
+            yield batch
@@ -15,7 +15,8 @@ class LLMProviderFactory:
                 api_url= self.config.OPENAI_API_URL,
                 default_input_max_input_characters= self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_output_max_output_tokens= self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature= self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature= self.config.GENERATION_DAFAULT_TEMPERATURE,
+                default_embedding_batch_size= self.config.EMBEDDING_DEFAULT_BATCH_SIZE
             )
         
         if provide == LLMEnum.COHERE.value:
@@ -23,6 +24,7 @@ class LLMProviderFactory:
                 api_key= self.config.COHERE_API_KEY,
                 default_input_max_input_characters= self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_output_max_output_tokens= self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature= self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature= self.config.GENERATION_DAFAULT_TEMPERATURE,
+                default_embedding_batch_size= self.config.EMBEDDING_DEFAULT_BATCH_SIZE
             )
         
\ No newline at end of file
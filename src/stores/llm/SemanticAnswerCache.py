@@ -0,0 +1,118 @@
+import numpy as np
+import time
+
+
+# per project cache of generated answers keyed on the query embedding, a lookup hits
+# when a cached query is similar enough, not expired and was answered against the
+# same version of the project index
+class SemanticAnswerCache:
+
+    def __init__(self, similarity_threshold: float = 0.95,
+                        ttl_seconds: int = 3600,
+                        max_entries: int = 1000):
+
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # {project_id: {"index_version": int, "vectors": np.ndarray, "entries": list}}
+        self.projects = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def normalize(self, vector: list):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_project_cache(self, project_id: str, index_version: int):
+        project_cache = self.projects.get(project_id)
+
+        # the project index changed since these answers were generated
+        if project_cache is not None and project_cache["index_version"] != index_version:
+            project_cache = None
+            self.invalidate(project_id=project_id)
+
+        return project_cache
+
+    def drop_expired(self, project_cache: dict):
+        now = time.monotonic()
+        keep = [
+            idx for idx, entry in enumerate(project_cache["entries"])
+            if now - entry["created_at"] < self.ttl_seconds
+        ]
+
+        if len(keep) != len(project_cache["entries"]):
+            project_cache["vectors"] = project_cache["vectors"][keep]
+            project_cache["entries"] = [ project_cache["entries"][idx] for idx in keep ]
+
+    def lookup(self, project_id: str, index_version: int, vector: list, limit: int, mode: str = None):
+
+        project_cache = self.get_project_cache(project_id=project_id, index_version=index_version)
+        if project_cache is None or len(project_cache["entries"]) == 0:
+            self.misses += 1
+            return None
+
+        self.drop_expired(project_cache)
+        if len(project_cache["entries"]) == 0:
+            self.misses += 1
+            return None
+
+        similarities = project_cache["vectors"] @ self.normalize(vector)
+
+        for idx in np.argsort(-similarities):
+            if similarities[idx] < self.similarity_threshold:
+                break
+
+            entry = project_cache["entries"][idx]
+            if entry["limit"] == limit and entry["mode"] == mode:
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def store(self, project_id: str, index_version: int, vector: list, limit: int,
+                    answer: str, full_prompt: str, chat_history: list, mode: str = None):
+
+        project_cache = self.get_project_cache(project_id=project_id, index_version=index_version)
+        vector = self.normalize(vector)
+
+        if project_cache is None:
+            project_cache = {
+                "index_version": index_version,
+                "vectors": np.empty((0, vector.shape[0]), dtype=np.float32),
+                "entries": [],
+            }
+            self.projects[project_id] = project_cache
+
+        project_cache["vectors"] = np.vstack([project_cache["vectors"], vector])
+        project_cache["entries"].append({
+            "limit": limit,
+            "mode": mode,
+            "answer": answer,
+            "full_prompt": full_prompt,
+            "chat_history": chat_history,
+            "created_at": time.monotonic(),
+        })
+
+        # drop the oldest answers above the bound
+        overflow = len(project_cache["entries"]) - self.max_entries
+        if overflow > 0:
+            project_cache["vectors"] = project_cache["vectors"][overflow:]
+            project_cache["entries"] = project_cache["entries"][overflow:]
+
+    def invalidate(self, project_id: str):
+        self.projects.pop(project_id, None)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+
+        return {
+            "projects": len(self.projects),
+            "entries": sum([ len(project_cache["entries"]) for project_cache in self.projects.values() ]),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -1 +1,4 @@
-from .LLMProviderFactory import LLMProviderFactory
\ No newline at end of file
+from .LLMProviderFactory import LLMProviderFactory
+from .EmbeddingCache import EmbeddingCache
+from .providers import CachedEmbeddingProvider
+from .SemanticAnswerCache import SemanticAnswerCache
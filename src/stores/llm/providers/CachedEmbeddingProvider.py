@@ -0,0 +1,116 @@
+from ..LLMInterface import LLMInterface
+from ..EmbeddingCache import EmbeddingCache
+
+
+# wraps an LLM provider and serves embeddings from an EmbeddingCache,
+# only the texts missing from the cache are sent to the wrapped provider
+class CachedEmbeddingProvider(LLMInterface):
+
+    def __init__(self, provider: LLMInterface, embedding_cache: EmbeddingCache):
+        self.provider = provider
+        self.embedding_cache = embedding_cache
+
+    def __getattr__(self, name):
+        # enums, embedding_size, process_text, ... come from the wrapped provider
+        return getattr(self.provider, name)
+
+    def set_generation_model(self, model_id: str):
+        return self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        return self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                        temperature: float = None):
+        return self.provider.generate_text(prompt=prompt, chat_history=chat_history,
+                                           max_output_tokens=max_output_tokens, temperature=temperature)
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                temperature: float = None):
+        return await self.provider.agenerate_text(prompt=prompt, chat_history=chat_history,
+                                                  max_output_tokens=max_output_tokens, temperature=temperature)
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                      temperature: float = None):
+        async for token in self.provider.generate_text_stream(prompt=prompt, chat_history=chat_history,
+                                                              max_output_tokens=max_output_tokens,
+                                                              temperature=temperature):
+            yield token
+
+    def construct_prompt(self, prompt:str , role:str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
+
+    def get_cache_keys(self, texts: list, document_type: str = None):
+        return [
+            self.embedding_cache.get_key(
+                model_id=self.provider.embedding_model_id,
+                document_type=document_type,
+                text=self.provider.process_text(text)
+            )
+            for text in texts
+        ]
+
+    def get_missing_texts(self, texts: list, keys: list, found: dict):
+        # unique texts not found in the cache, keyed by their cache key
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        return missing
+
+    def embed_text(self, text: str, document_type: str = None):
+
+        vectors = self.embed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    async def aembed_text(self, text: str, document_type: str = None):
+
+        vectors = await self.aembed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+        # the blocking path can not reach the Mongo store, it only uses the memory tier
+
+        keys = self.get_cache_keys(texts=texts, document_type=document_type)
+        found = self.embedding_cache.get_many_from_memory(keys)
+
+        missing = self.get_missing_texts(texts=texts, keys=keys, found=found)
+        if missing:
+            vectors = self.provider.embed_texts(texts=list(missing.values()), document_type=document_type,
+                                                batch_size=batch_size)
+            if not vectors:
+                return None
+
+            new_vectors = dict(zip(missing.keys(), vectors))
+            self.embedding_cache.put_in_memory(new_vectors)
+            found.update(new_vectors)
+
+        return [ found[key] for key in keys ]
+
+    async def aembed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        keys = self.get_cache_keys(texts=texts, document_type=document_type)
+        found = await self.embedding_cache.get_many(keys)
+
+        missing = self.get_missing_texts(texts=texts, keys=keys, found=found)
+        if missing:
+            vectors = await self.provider.aembed_texts(texts=list(missing.values()), document_type=document_type,
+                                                       batch_size=batch_size)
+            if not vectors:
+                return None
+
+            new_vectors = dict(zip(missing.keys(), vectors))
+            await self.embedding_cache.put_many(new_vectors, model_id=self.provider.embedding_model_id,
+                                                document_type=document_type)
+            found.update(new_vectors)
+
+        return [ found[key] for key in keys ]
@@ -1,21 +1,27 @@
-from email import message
 from ..LLMInterface import LLMInterface
-from ..LLMEnum import CoHereEnum, DocumentTypeEnum
+from ..LLMEnum import CoHereEnum, DocumentTypeEnum, LLMEnum
+from helpers.tracing import record_tokens
 import cohere 
 import logging
 
 
 class CoHereProvider(LLMInterface):
+
+    # limit of the embed endpoint for a single request
+    MAX_EMBEDDING_BATCH_SIZE = 96
+
     def __init__(self, api_key: str,
                     default_input_max_input_characters: int = 1000,
                     default_generation_output_max_output_tokens: int = 1000,
-                    default_generation_temperature: float = 0.1):
+                    default_generation_temperature: float = 0.1,
+                    default_embedding_batch_size: int = 96):
 
         self.api_key = api_key
 
         self.default_input_max_input_characters = default_input_max_input_characters
         self.default_generation_output_max_output_tokens = default_generation_output_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size if default_embedding_batch_size else self.MAX_EMBEDDING_BATCH_SIZE
 
         self.generation_model_id = None
         self.embedding_model_id = None
@@ -25,6 +31,10 @@ class CoHereProvider(LLMInterface):
             api_key= self.api_key,
         )
 
+        self.async_client = cohere.AsyncClient(
+            api_key= self.api_key,
+        )
+
         self.enums = CoHereEnum
 
         self.logger = logging.getLogger(__name__)
@@ -42,8 +52,8 @@ class CoHereProvider(LLMInterface):
         return text[:self.default_input_max_input_characters].strip()
 
 
-    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
-                        temperature: float = None):
+    def get_generation_request(self, prompt: str, chat_history: list, max_output_tokens: int = None,
+                                    temperature: float = None):
         
         if not self.client:
             self.logger.error("Cohere client is not initialized")
@@ -59,24 +69,74 @@ class CoHereProvider(LLMInterface):
 
         prompt = self.construct_prompt(prompt, CoHereEnum.USER.value)
 
-        response = self.client.chat(
-            model= self.generation_model_id,
-            chat_history= chat_history,
-            message= prompt['text'],
-            max_tokens= max_output_tokens,
-            temperature= temperature
-        )
+        return {
+            "model": self.generation_model_id,
+            "chat_history": chat_history,
+            "message": prompt['text'],
+            "max_tokens": max_output_tokens,
+            "temperature": temperature
+        }
+
+    def get_generation_response_text(self, response):
 
         if not response or not response.text:
             self.logger.error("Error while generating text with Cohere")
             return None
 
+        billed_units = self.get_billed_units(response)
+        if billed_units:
+            record_tokens(provider=LLMEnum.COHERE.value, kind="prompt", count=billed_units.input_tokens)
+            record_tokens(provider=LLMEnum.COHERE.value, kind="completion", count=billed_units.output_tokens)
 
         return response.text
 
+    def get_billed_units(self, response):
+        meta = getattr(response, "meta", None)
+        return getattr(meta, "billed_units", None) if meta else None
 
 
-    def embed_text(self, text: str, document_type: str = None):
+    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                        temperature: float = None):
+
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return None
+
+        response = self.client.chat(**request)
+
+        return self.get_generation_response_text(response)
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                temperature: float = None):
+
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return None
+
+        response = await self.async_client.chat(**request)
+
+        return self.get_generation_response_text(response)
+
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                      temperature: float = None):
+
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return
+
+        async for event in self.async_client.chat_stream(**request):
+            if event.event_type == CoHereEnum.TEXT_GENERATION_EVENT.value and event.text:
+                yield event.text
+
+
+    def get_embedding_batches(self, texts: list, batch_size: int = None):
         
         if not self.client:
             self.logger.error("Cohere client is not initialized")
@@ -90,22 +150,97 @@ class CoHereProvider(LLMInterface):
             self.logger.error("Cohere embedding size is not set")
             return None
 
-        input_type = CoHereEnum.DOCUMENT.value
-        if document_type == DocumentTypeEnum.QUERY.value:
-            input_type = CoHereEnum.QUERY.value
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+        batch_size = min(batch_size, self.MAX_EMBEDDING_BATCH_SIZE)
 
-        response = self.client.embed(
-            model= self.embedding_model_id,
-            input_type= input_type,
-            texts= [self.process_text(text)],
-            embedding_types = ['float']
+        return self.get_text_batches(
+            texts=[ self.process_text(text) for text in texts ],
+            batch_size=batch_size
         )
 
-        if not response or not response.embeddings:
-            self.logger.error("Error while embedding text with Cohere")
+    def get_embedding_input_type(self, document_type: str = None):
+
+        if document_type == DocumentTypeEnum.QUERY.value:
+            return CoHereEnum.QUERY.value
+
+        return CoHereEnum.DOCUMENT.value
+
+    def get_embedding_response_vectors(self, response, batch: list):
+
+        if not response or not response.embeddings or len(response.embeddings.float) != len(batch):
+            self.logger.error("Error while embedding texts with Cohere")
             return None
-        
-        return response.embeddings.float[0]
+
+        billed_units = self.get_billed_units(response)
+        if billed_units:
+            record_tokens(provider=LLMEnum.COHERE.value, kind="embedding", count=billed_units.input_tokens)
+
+        return response.embeddings.float
+
+
+    def embed_text(self, text: str, document_type: str = None):
+
+        vectors = self.embed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    async def aembed_text(self, text: str, document_type: str = None):
+
+        vectors = await self.aembed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        batches = self.get_embedding_batches(texts=texts, batch_size=batch_size)
+        if batches is None:
+            return None
+
+        vectors = []
+        for batch in batches:
+            response = self.client.embed(
+                model= self.embedding_model_id,
+                input_type= self.get_embedding_input_type(document_type),
+                texts= batch,
+                embedding_types = ['float']
+            )
+
+            batch_vectors = self.get_embedding_response_vectors(response, batch=batch)
+            if batch_vectors is None:
+                return None
+
+            vectors.extend(batch_vectors)
+
+        return vectors
+
+    async def aembed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        batches = self.get_embedding_batches(texts=texts, batch_size=batch_size)
+        if batches is None:
+            return None
+
+        vectors = []
+        for batch in batches:
+            response = await self.async_client.embed(
+                model= self.embedding_model_id,
+                input_type= self.get_embedding_input_type(document_type),
+                texts= batch,
+                embedding_types = ['float']
+            )
+
+            batch_vectors = self.get_embedding_response_vectors(response, batch=batch)
+            if batch_vectors is None:
+                return None
+
+            vectors.extend(batch_vectors)
+
+        return vectors
 
 
     def construct_prompt(self, prompt:str , role:str):
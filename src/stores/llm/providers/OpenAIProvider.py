@@ -1,13 +1,20 @@
 from ..LLMInterface import LLMInterface
-from ..LLMEnum import OpenAIEnum
-from openai import OpenAI
+from ..LLMEnum import OpenAIEnum, LLMEnum
+from helpers.tracing import record_tokens
+from openai import OpenAI, AsyncOpenAI
 import logging
 
 class OpenAIProvider(LLMInterface):
+
+    # limits of the embeddings endpoint for a single request
+    MAX_EMBEDDING_BATCH_SIZE = 2048
+    MAX_EMBEDDING_BATCH_TOKENS = 300000
+
     def __init__(self, api_key: str, api_url: str =None,
                         default_input_max_input_characters: int = 1000,
                         default_generation_output_max_output_tokens: int = 1000,
-                        default_generation_temperature: float = 0.1):
+                        default_generation_temperature: float = 0.1,
+                        default_embedding_batch_size: int = 100):
 
         self.api_key = api_key
         self.api_url = api_url
@@ -15,6 +22,7 @@ class OpenAIProvider(LLMInterface):
         self.default_input_max_input_characters = default_input_max_input_characters
         self.default_generation_output_max_output_tokens = default_generation_output_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size if default_embedding_batch_size else self.MAX_EMBEDDING_BATCH_SIZE
 
         self.generation_model_id = None
         self.embedding_model_id = None
@@ -25,6 +33,11 @@ class OpenAIProvider(LLMInterface):
             base_url = self.api_url if self.api_url and len(self.api_url) else None
         )
 
+        self.async_client = AsyncOpenAI(
+            api_key= self.api_key,
+            base_url = self.api_url if self.api_url and len(self.api_url) else None
+        )
+
         self.enums = OpenAIEnum
         self.logger = logging.getLogger(__name__)
 
@@ -41,8 +54,8 @@ class OpenAIProvider(LLMInterface):
         return text[:self.default_input_max_input_characters].strip()
 
 
-    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
-                        temperature: float = None):
+    def get_generation_request(self, prompt: str, chat_history: list, max_output_tokens: int = None,
+                                    temperature: float = None):
         
         if not self.client:
             self.logger.error("OpenAI client is not initialized")
@@ -60,22 +73,74 @@ class OpenAIProvider(LLMInterface):
             self.construct_prompt(prompt, OpenAIEnum.USER.value)
         )
 
-        response = self.client.chat.completions.create(
-            model= self.generation_model_id,
-            messages= chat_history,
-            max_tokens= max_output_tokens,
-            temperature= temperature
-        )
+        return {
+            "model": self.generation_model_id,
+            "messages": chat_history,
+            "max_tokens": max_output_tokens,
+            "temperature": temperature
+        }
+
+    def get_generation_response_text(self, response):
 
         if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
             self.logger.error("Error while generating text with OpenAI")
             return None
 
+        if response.usage:
+            record_tokens(provider=LLMEnum.OPENAI.value, kind="prompt", count=response.usage.prompt_tokens)
+            record_tokens(provider=LLMEnum.OPENAI.value, kind="completion", count=response.usage.completion_tokens)
+
         return response.choices[0].message.content
 
 
+    def generate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                        temperature: float = None):
 
-    def embed_text(self, text: str, document_type: str = None):
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return None
+
+        response = self.client.chat.completions.create(**request)
+
+        return self.get_generation_response_text(response)
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                temperature: float = None):
+
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return None
+
+        response = await self.async_client.chat.completions.create(**request)
+
+        return self.get_generation_response_text(response)
+
+
+    async def generate_text_stream(self, prompt: str, chat_history: list = [], max_output_tokens: int = None,
+                                      temperature: float = None):
+
+        request = self.get_generation_request(prompt=prompt, chat_history=chat_history,
+                                              max_output_tokens=max_output_tokens,
+                                              temperature=temperature)
+        if request is None:
+            return
+
+        stream = await self.async_client.chat.completions.create(**request, stream=True)
+
+        async for chunk in stream:
+            if not chunk.choices or len(chunk.choices) == 0:
+                continue
+
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+
+    def get_embedding_batches(self, texts: list, batch_size: int = None):
         
         if not self.client:
             self.logger.error("OpenAI client is not initialized")
@@ -89,16 +154,89 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("OpenAI embedding size is not set")
             return None
 
-        response = self.client.embeddings.create(
-            model= self.embedding_model_id,
-            input= self.process_text(text)
+        batch_size = batch_size if batch_size else self.default_embedding_batch_size
+        batch_size = min(batch_size, self.MAX_EMBEDDING_BATCH_SIZE)
+
+        return self.get_text_batches(
+            texts=[ self.process_text(text) for text in texts ],
+            batch_size=batch_size,
+            max_batch_tokens=self.MAX_EMBEDDING_BATCH_TOKENS
         )
 
-        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
-            self.logger.error("Error while embedding text with OpenAI")
+    def get_embedding_response_vectors(self, response, batch: list):
+
+        if not response or not response.data or len(response.data) != len(batch):
+            self.logger.error("Error while embedding texts with OpenAI")
+            return None
+
+        if response.usage:
+            record_tokens(provider=LLMEnum.OPENAI.value, kind="embedding", count=response.usage.prompt_tokens)
+
+        return [
+            rec.embedding
+            for rec in sorted(response.data, key=lambda rec: rec.index)
+        ]
+
+
+    def embed_text(self, text: str, document_type: str = None):
+
+        vectors = self.embed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
             return None
-        
-        return response.data[0].embedding
+
+        return vectors[0]
+
+    async def aembed_text(self, text: str, document_type: str = None):
+
+        vectors = await self.aembed_texts(texts=[text], document_type=document_type)
+
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        batches = self.get_embedding_batches(texts=texts, batch_size=batch_size)
+        if batches is None:
+            return None
+
+        vectors = []
+        for batch in batches:
+            response = self.client.embeddings.create(
+                model= self.embedding_model_id,
+                input= batch
+            )
+
+            batch_vectors = self.get_embedding_response_vectors(response, batch=batch)
+            if batch_vectors is None:
+                return None
+
+            vectors.extend(batch_vectors)
+
+        return vectors
+
+    async def aembed_texts(self, texts: list, document_type: str = None, batch_size: int = None):
+
+        batches = self.get_embedding_batches(texts=texts, batch_size=batch_size)
+        if batches is None:
+            return None
+
+        vectors = []
+        for batch in batches:
+            response = await self.async_client.embeddings.create(
+                model= self.embedding_model_id,
+                input= batch
+            )
+
+            batch_vectors = self.get_embedding_response_vectors(response, batch=batch)
+            if batch_vectors is None:
+                return None
+
+            vectors.extend(batch_vectors)
+
+        return vectors
 
 
     def construct_prompt(self, prompt:str , role:str):
@@ -106,8 +244,3 @@ class OpenAIProvider(LLMInterface):
             "role": role,
             "content": self.process_text(prompt)
         }
-
-
-
-        
-    
@@ -1,2 +1,3 @@
 from .OpenAIProvider import OpenAIProvider
-from .CoHereProvider import CoHereProvider
\ No newline at end of file
+from .CoHereProvider import CoHereProvider
+from .CachedEmbeddingProvider import CachedEmbeddingProvider
@@ -1,4 +1,60 @@
 import os
+import importlib
+from string import Template
+
+
+class CompiledTemplate:
+
+    def __init__(self, template: Template):
+        # split the template once into literal text and placeholder names,
+        # rendering is then a single join without any regex work
+        self.parts = []
+        self.variables = set()
+
+        text = template.template
+        last_end = 0
+
+        for match in template.pattern.finditer(text):
+            self.add_literal(text[last_end:match.start()])
+            last_end = match.end()
+
+            if match.group("escaped") is not None:
+                self.add_literal(template.delimiter)
+                continue
+
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                raise ValueError(f"Invalid placeholder in template at position {match.start()}")
+
+            self.parts.append((True, name))
+            self.variables.add(name)
+
+        self.add_literal(text[last_end:])
+
+        # templates without placeholders are rendered once and served from here
+        self.rendered = None
+        if len(self.variables) == 0:
+            self.rendered = "".join([ value for _, value in self.parts ])
+
+    def add_literal(self, text: str):
+        if not text:
+            return
+
+        if self.parts and not self.parts[-1][0]:
+            self.parts[-1] = (False, self.parts[-1][1] + text)
+        else:
+            self.parts.append((False, text))
+
+    def render(self, vars: dict):
+        if self.rendered is not None:
+            return self.rendered
+
+        # same contract as Template.substitute: a missing variable raises KeyError
+        return "".join([
+            str(vars[value]) if is_variable else value
+            for is_variable, value in self.parts
+        ])
+
 
 class TemplateParser:
 
@@ -7,36 +63,68 @@ class TemplateParser:
         self.default_language = default_language
         self.language = None
 
+        # {group: {key: CompiledTemplate}}, with the default language fallback already resolved
+        self.templates = {}
+
         self.set_language(language)
 
-    
+
     def set_language(self, language: str):
-        if not language:
-            self.language = self.default_language
+        self.language = self.default_language
 
-        language_path = os.path.join(self.current_path, "locales", language)
-        if os.path.exists(language_path):
+        if language and os.path.exists(os.path.join(self.current_path, "locales", language)):
             self.language = language
-        else:
-            self.language = self.default_language
 
-    def get(self, group: str, key: str, vars: dict={}):
+        self.templates = self.load_templates()
+
+    def get_language_groups(self, language: str):
+        language_path = os.path.join(self.current_path, "locales", language)
+        if not os.path.exists(language_path):
+            return []
+
+        return [
+            os.path.splitext(file_name)[0]
+            for file_name in os.listdir(language_path)
+            if file_name.endswith(".py") and file_name != "__init__.py"
+        ]
+
+    def load_group(self, language: str, group: str):
+        module = importlib.import_module(f"stores.llm.templates.locales.{language}.{group}")
+
+        return {
+            key: CompiledTemplate(value)
+            for key, value in vars(module).items()
+            if isinstance(value, Template)
+        }
+
+    def load_templates(self):
+        templates = {}
+
+        for group in self.get_language_groups(self.default_language):
+            templates[group] = self.load_group(self.default_language, group)
+
+        if self.language != self.default_language:
+            for group in self.get_language_groups(self.language):
+                templates.setdefault(group, {}).update(self.load_group(self.language, group))
+
+        return templates
+
+    def get_template(self, group: str, key: str):
         if not group or not key:
             return None
-        
-        group_path = os.path.join(self.current_path, "locales", self.language, f"{group}.py" )
-        targeted_language = self.language
-        if not os.path.exists(group_path):
-            group_path = os.path.join(self.current_path, "locales", self.default_language, f"{group}.py" )
-            targeted_language = self.default_language
-
-        if not os.path.exists(group_path):
+
+        return self.templates.get(group, {}).get(key)
+
+    def get(self, group: str, key: str, vars: dict={}):
+        template = self.get_template(group=group, key=key)
+        if template is None:
             return None
-        
-        module = __import__(f"stores.llm.templates.locales.{targeted_language}.{group}", fromlist=[group])
 
-        if not module:
+        return template.render(vars)
+
+    def render_many(self, group: str, key: str, vars_list: list):
+        template = self.get_template(group=group, key=key)
+        if template is None:
             return None
-        
-        key_attribute = getattr(module, key)
-        return key_attribute.substitute(vars)
\ No newline at end of file
+
+        return [ template.render(vars) for vars in vars_list ]
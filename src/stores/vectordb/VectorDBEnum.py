@@ -3,9 +3,17 @@ from enum import Enum
 class VectorDBEnum(Enum):
     
     QDRANT = "QDRANT"
+    NUMPY = "NUMPY"
+    NUMPY_IVF = "NUMPY_IVF"
     
 
 class DistanceMethodEnum(Enum):
     
     DOT= "dot"
-    COSINE = "cosine"
\ No newline at end of file
+    COSINE = "cosine"
+
+
+class VectorQuantizationEnum(Enum):
+
+    SCALAR = "scalar"
+    BINARY = "binary"
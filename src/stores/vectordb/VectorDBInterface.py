@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
 from typing import List
 from models.db_schemes import RetrievedDocument
+from helpers.concurrency import run_in_thread_pool
+from helpers.tracing import instrument_class
 
 class VectorDBInterface(ABC):
+
+    # executor used by the async variants, None means the shared thread pool
+    executor = None
+
+    # timed in every provider by the tracing layer
+    traced_methods = { "is_collection_existed", "get_collection_info", "delete_collection",
+                       "create_collection", "insert_one", "insert_many", "list_record_ids",
+                       "delete_records", "search_by_vector", "search_batch" }
+    traced_methods |= { f"a{name}" for name in traced_methods }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_class(cls, prefix="vectordb", method_names=cls.traced_methods)
     
     @abstractmethod
     def connect(self):
@@ -31,7 +46,8 @@ class VectorDBInterface(ABC):
     @abstractmethod
     def create_collection(self, collection_name: str,
                                 embedding_size:int,
-                                do_reset: bool = False):
+                                do_reset: bool = False,
+                                quantization: str = None):
         pass
 
     @abstractmethod
@@ -46,6 +62,83 @@ class VectorDBInterface(ABC):
                           record_ids: list = None, batch_size: int = 50):
         pass
 
+    @abstractmethod
+    def list_record_ids(self, collection_name: str) -> List:
+        pass
+
+    @abstractmethod
+    def delete_records(self, collection_name: str, record_ids: list, batch_size: int = 500):
+        pass
+
     @abstractmethod
     def search_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
-        pass
\ No newline at end of file
+        pass
+
+    def search_batch(self, collection_name: str, vectors: list, limit: int) -> List[List[RetrievedDocument]]:
+        # providers that can score many queries in one call override this
+        return [
+            self.search_by_vector(collection_name=collection_name, vector=vector, limit=limit)
+            for vector in vectors
+        ]
+
+    # async variants, providers with a native async client override these,
+    # otherwise the blocking call runs on the provider executor
+
+    async def adisconnect(self):
+        # inline, disconnect may shut down the provider executor itself
+        return self.disconnect()
+
+    async def ais_collection_existed(self, collection_name: str) -> bool:
+        return await run_in_thread_pool(self.is_collection_existed, collection_name=collection_name,
+                                        executor=self.executor)
+
+    async def alist_all_collections(self) -> List:
+        return await run_in_thread_pool(self.list_all_collections, executor=self.executor)
+
+    async def aget_collection_info(self, collection_name: str) -> dict:
+        return await run_in_thread_pool(self.get_collection_info, collection_name=collection_name,
+                                        executor=self.executor)
+
+    async def adelete_collection(self, collection_name: str):
+        return await run_in_thread_pool(self.delete_collection, collection_name=collection_name,
+                                        executor=self.executor)
+
+    async def acreate_collection(self, collection_name: str,
+                                       embedding_size:int,
+                                       do_reset: bool = False,
+                                       quantization: str = None):
+        return await run_in_thread_pool(self.create_collection, collection_name=collection_name,
+                                        embedding_size=embedding_size, do_reset=do_reset,
+                                        quantization=quantization, executor=self.executor)
+
+    async def ainsert_one(self, collection_name: str, text: str, vector: list,
+                                metadata: dict = None, 
+                                record_id: str = None):
+        return await run_in_thread_pool(self.insert_one, collection_name=collection_name,
+                                        text=text, vector=vector, metadata=metadata,
+                                        record_id=record_id, executor=self.executor)
+
+    async def ainsert_many(self, collection_name: str, texts: list, 
+                                 vectors: list, metadata: list = None, 
+                                 record_ids: list = None, batch_size: int = 50):
+        return await run_in_thread_pool(self.insert_many, collection_name=collection_name,
+                                        texts=texts, vectors=vectors, metadata=metadata,
+                                        record_ids=record_ids, batch_size=batch_size,
+                                        executor=self.executor)
+
+    async def alist_record_ids(self, collection_name: str) -> List:
+        return await run_in_thread_pool(self.list_record_ids, collection_name=collection_name,
+                                        executor=self.executor)
+
+    async def adelete_records(self, collection_name: str, record_ids: list, batch_size: int = 500):
+        return await run_in_thread_pool(self.delete_records, collection_name=collection_name,
+                                        record_ids=record_ids, batch_size=batch_size,
+                                        executor=self.executor)
+
+    async def asearch_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
+        return await run_in_thread_pool(self.search_by_vector, collection_name=collection_name,
+                                        vector=vector, limit=limit, executor=self.executor)
+
+    async def asearch_batch(self, collection_name: str, vectors: list, limit: int) -> List[List[RetrievedDocument]]:
+        return await run_in_thread_pool(self.search_batch, collection_name=collection_name,
+                                        vectors=vectors, limit=limit, executor=self.executor)
@@ -1,5 +1,5 @@
 from .VectorDBEnum import VectorDBEnum
-from .providers import QdrantDBProvider
+from .providers import QdrantDBProvider, NumpyDBProvider, NumpyIVFDBProvider
 from controllers.BaseController import BaseController
 
 class VectorDBProviderFactory:
@@ -14,7 +14,40 @@ class VectorDBProviderFactory:
             db_path = self.base_controller.get_database_path(self.config.VECTOR_DB_PATH)
             return QdrantDBProvider(
                 db_path= db_path,
-                distance_method= self.config.VECTOR_DB_DISTANCE_METHOD
+                distance_method= self.config.VECTOR_DB_DISTANCE_METHOD,
+                url= self.config.VECTOR_DB_URL,
+                api_key= self.config.VECTOR_DB_API_KEY,
+                prefer_grpc= self.config.VECTOR_DB_PREFER_GRPC,
+                grpc_port= self.config.VECTOR_DB_GRPC_PORT,
+                timeout= self.config.VECTOR_DB_TIMEOUT,
+                upsert_parallel= self.config.VECTOR_DB_UPSERT_PARALLEL,
+                upsert_wait= self.config.VECTOR_DB_UPSERT_WAIT,
+                hnsw_m= self.config.VECTOR_DB_HNSW_M,
+                hnsw_ef_construct= self.config.VECTOR_DB_HNSW_EF_CONSTRUCT,
+                hnsw_ef= self.config.VECTOR_DB_HNSW_EF,
+                indexing_threshold= self.config.VECTOR_DB_INDEXING_THRESHOLD,
+                quantization_oversampling= self.config.VECTOR_DB_QUANTIZATION_OVERSAMPLING,
+                quantization_rescore= self.config.VECTOR_DB_QUANTIZATION_RESCORE,
+                quantization_always_ram= self.config.VECTOR_DB_QUANTIZATION_ALWAYS_RAM
+            )
+
+        if provide == VectorDBEnum.NUMPY.value:
+            db_path = self.base_controller.get_database_path(self.config.VECTOR_DB_PATH)
+            return NumpyDBProvider(
+                db_path= db_path,
+                distance_method= self.config.VECTOR_DB_DISTANCE_METHOD,
+                quantization_oversampling= self.config.VECTOR_DB_QUANTIZATION_OVERSAMPLING,
+                binary_quantization_oversampling= self.config.VECTOR_DB_BINARY_QUANTIZATION_OVERSAMPLING,
+                quantization_min_candidates= self.config.VECTOR_DB_QUANTIZATION_MIN_CANDIDATES
+            )
+
+        if provide == VectorDBEnum.NUMPY_IVF.value:
+            db_path = self.base_controller.get_database_path(self.config.VECTOR_DB_PATH)
+            return NumpyIVFDBProvider(
+                db_path= db_path,
+                distance_method= self.config.VECTOR_DB_DISTANCE_METHOD,
+                nlist= self.config.VECTOR_DB_IVF_NLIST,
+                nprobe= self.config.VECTOR_DB_IVF_NPROBE
             )
         
         return None
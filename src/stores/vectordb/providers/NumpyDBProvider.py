@@ -0,0 +1,748 @@
+from ..VectorDBInterface import VectorDBInterface
+from ..VectorDBEnum import DistanceMethodEnum, VectorQuantizationEnum
+from models.db_schemes import RetrievedDocument
+from typing import List
+import numpy as np
+import threading
+import logging
+import shutil
+import json
+import os
+import re
+
+
+class NumpyCollection:
+
+    META_FILE = "meta.json"
+    VECTORS_FILE = "vectors.f32"
+    IDS_FILE = "ids.jsonl"
+    PAYLOAD_FILE = "payload.jsonl"
+    DELETED_FILE = "deleted.jsonl"
+    CODES_FILE = "codes.bin"
+
+    # directories of a compaction in progress, next to the collection directory
+    COMPACT_SUFFIX = ".compact"
+    OLD_SUFFIX = ".old"
+
+    INITIAL_CAPACITY = 1024
+    SCORE_CHUNK_SIZE = 65536
+    # the live rows are rewritten once tombstones are at least this many and this share of the rows
+    COMPACT_MIN_DELETED_ROWS = 1024
+    COMPACT_DELETED_SHARE = 0.5
+    # rows sampled to compute the int8 scale
+    QUANTIZATION_SAMPLE_SIZE = 16384
+
+    # the bits of every byte value, most significant first like np.packbits
+    BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32)
+
+    # one collection on disk: a memory-mapped float32 matrix of capacity x embedding_size,
+    # a row per inserted point, and JSON lines sidecars for the point ids and payloads.
+    # Inserts only append rows, deleted or overwritten rows are masked out by tombstones
+    # until they outnumber the live rows and the collection is compacted.
+    # A quantized collection also keeps int8 or binary codes in memory, searches scan the
+    # codes and only read the float32 rows of the oversampled candidates to rescore them.
+    # Binary codes lose much more than int8 ones and get their own, larger oversampling.
+
+    def __init__(self, path: str, oversampling: float = 2.0, binary_oversampling: float = 64.0,
+                 min_candidates: int = 100):
+        self.path = path
+        self.oversampling = oversampling
+        self.binary_oversampling = binary_oversampling
+        self.min_candidates = min_candidates
+        self.lock = threading.RLock()
+
+        # row numbers change with a compaction, results are only mapped to payloads within
+        # the generation they were computed in
+        self.compaction_lock = threading.RLock()
+        self.generation = 0
+
+        self.load()
+
+    def load(self):
+        with open(self.get_file_path(self.META_FILE), "r") as f:
+            meta = json.load(f)
+
+        self.embedding_size = meta["embedding_size"]
+        self.distance_method = meta["distance_method"]
+        self.count = meta["count"]
+        self.capacity = meta["capacity"]
+        self.quantization = meta.get("quantization")
+        self.quantization_scale = meta.get("quantization_scale")
+        # the row count the int8 scale was computed at, and the codes file written with it
+        self.quantization_scale_count = meta.get("quantization_scale_count",
+                                                 self.count if self.quantization_scale else 0)
+        self.codes_generation = meta.get("codes_generation", 0)
+
+        self.vectors = self.open_vectors()
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.alive[:self.count] = True
+
+        self.ids = []
+        self.id_rows = {}
+        self.load_ids()
+
+        self.payload_offsets = []
+        self.load_payload_offsets()
+
+        self.load_deleted()
+
+        self.codes = None
+        if self.quantization is not None:
+            self.load_codes()
+
+    @classmethod
+    def create(cls, path: str, embedding_size: int, distance_method: str,
+                    quantization: str = None, **kwargs):
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, cls.VECTORS_FILE), "wb") as f:
+            f.truncate(cls.INITIAL_CAPACITY * embedding_size * 4)
+
+        for file_name in [cls.IDS_FILE, cls.PAYLOAD_FILE, cls.DELETED_FILE]:
+            open(os.path.join(path, file_name), "wb").close()
+
+        cls.write_meta(path, {
+            "embedding_size": embedding_size,
+            "distance_method": distance_method,
+            "count": 0,
+            "capacity": cls.INITIAL_CAPACITY,
+            "quantization": quantization,
+            "quantization_scale": None,
+            "quantization_scale_count": 0,
+            "codes_generation": 0,
+        })
+
+        return cls(path, **kwargs)
+
+    @classmethod
+    def write_meta(cls, path: str, meta: dict):
+        # the row count in meta.json is the commit point of an insert, write it atomically
+        meta_path = os.path.join(path, cls.META_FILE)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def get_file_path(self, file_name: str):
+        return os.path.join(self.path, file_name)
+
+    def open_vectors(self):
+        return np.memmap(self.get_file_path(self.VECTORS_FILE), dtype=np.float32, mode="r+",
+                         shape=(self.capacity, self.embedding_size))
+
+    def load_ids(self):
+        end_offset = 0
+        with open(self.get_file_path(self.IDS_FILE), "rb") as f:
+            for row, line in enumerate(f):
+                if row >= self.count:
+                    break
+                record_id = json.loads(line)
+                self.ids.append(record_id)
+                self.id_rows[record_id] = row
+                end_offset += len(line)
+
+        # drop the lines of an insert that never committed
+        os.truncate(self.get_file_path(self.IDS_FILE), end_offset)
+
+    def load_payload_offsets(self):
+        offset = 0
+        with open(self.get_file_path(self.PAYLOAD_FILE), "rb") as f:
+            for row, line in enumerate(f):
+                if row >= self.count:
+                    break
+                self.payload_offsets.append(offset)
+                offset += len(line)
+
+        os.truncate(self.get_file_path(self.PAYLOAD_FILE), offset)
+
+    def load_deleted(self):
+        with open(self.get_file_path(self.DELETED_FILE), "r") as f:
+            rows = [ int(line) for line in f if line.strip() ]
+
+        self.mark_deleted([ row for row in rows if row < self.count ], persist=False)
+
+    def get_codes_path(self, generation: int = None):
+        # the codes are rewritten to a new file whenever the int8 scale changes
+        generation = self.codes_generation if generation is None else generation
+        if generation == 0:
+            return self.get_file_path(self.CODES_FILE)
+
+        return self.get_file_path(f"codes.{generation}.bin")
+
+    def load_codes(self):
+        self.codes = np.zeros((self.capacity, self.get_code_size()), dtype=self.get_code_dtype())
+
+        rows = 0
+        if os.path.exists(self.get_codes_path()):
+            codes = np.fromfile(self.get_codes_path(), dtype=self.codes.dtype)
+            rows = min(len(codes) // self.codes.shape[1], self.count)
+            self.codes[:rows] = codes[:rows * self.codes.shape[1]].reshape(rows, -1)
+
+        # rows committed before their codes were written
+        if rows < self.count:
+            self.write_codes(start=rows, end=self.count)
+
+    def get_meta(self):
+        return {
+            "embedding_size": self.embedding_size,
+            "distance_method": self.distance_method,
+            "count": self.count,
+            "capacity": self.capacity,
+            "quantization": self.quantization,
+            "quantization_scale": self.quantization_scale,
+            "quantization_scale_count": self.quantization_scale_count,
+            "codes_generation": self.codes_generation,
+        }
+
+    def get_code_size(self):
+        if self.quantization == VectorQuantizationEnum.BINARY.value:
+            return (self.embedding_size + 7) // 8
+
+        return self.embedding_size
+
+    def get_code_dtype(self):
+        if self.quantization == VectorQuantizationEnum.BINARY.value:
+            return np.uint8
+
+        return np.int8
+
+    def quantize(self, vectors: np.ndarray):
+        if self.quantization == VectorQuantizationEnum.BINARY.value:
+            return np.packbits(vectors > 0, axis=1)
+
+        return np.clip(np.rint(vectors * self.quantization_scale), -127, 127).astype(np.int8)
+
+    def get_quantization_scale(self, end: int):
+        # maps the q99 of the absolute values, over rows sampled evenly in [0, end), to 127
+        rows = np.unique(np.linspace(0, end - 1, num=min(end, self.QUANTIZATION_SAMPLE_SIZE), dtype=np.int64))
+        sample = np.asarray(self.vectors[rows])
+
+        max_abs = float(np.quantile(np.abs(sample), 0.99)) if sample.size > 0 else 0.0
+        return 127 / max_abs if max_abs > 0 else 1.0
+
+    def needs_rescale(self, end: int):
+        # the scale follows the data: it is computed again every time the rows double, so a
+        # small or unrepresentative first batch does not clip everything inserted after it
+        if self.quantization != VectorQuantizationEnum.SCALAR.value:
+            return False
+
+        return self.quantization_scale is None or end >= 2 * self.quantization_scale_count
+
+    def rescale_codes(self, end: int):
+        # quantizes rows [0, end) again with a new scale into a new codes file. meta.json
+        # switches to it atomically, the codes on disk always match the scale in meta.json
+        self.quantization_scale = self.get_quantization_scale(end)
+        self.quantization_scale_count = end
+
+        for i in range(0, end, self.SCORE_CHUNK_SIZE):
+            chunk_end = min(i + self.SCORE_CHUNK_SIZE, end)
+            self.codes[i:chunk_end] = self.quantize(np.asarray(self.vectors[i:chunk_end]))
+
+        previous_path = self.get_codes_path()
+        generation = self.codes_generation + 1
+
+        with open(self.get_codes_path(generation), "wb") as f:
+            self.codes[:end].tofile(f)
+
+        self.codes_generation = generation
+        self.write_meta(self.path, self.get_meta())
+
+        if os.path.exists(previous_path):
+            os.remove(previous_path)
+
+    def write_codes(self, start: int, end: int):
+        if end <= start:
+            return
+
+        if self.needs_rescale(end):
+            self.rescale_codes(end)
+            return
+
+        self.codes[start:end] = self.quantize(np.asarray(self.vectors[start:end]))
+
+        with open(self.get_codes_path(), "ab") as f:
+            f.truncate(start * self.codes.shape[1] * self.codes.itemsize)
+            self.codes[start:end].tofile(f)
+
+    def prepare_vectors(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.embedding_size)
+
+        if self.distance_method == DistanceMethodEnum.COSINE.value:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1)
+
+        return vectors
+
+    def ensure_capacity(self, size: int):
+        if size <= self.capacity:
+            return
+
+        capacity = max(self.capacity * 2, size)
+
+        self.vectors.flush()
+        with open(self.get_file_path(self.VECTORS_FILE), "r+b") as f:
+            f.truncate(capacity * self.embedding_size * 4)
+
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.count] = self.alive[:self.count]
+
+        self.capacity = capacity
+        self.vectors = self.open_vectors()
+        self.alive = alive
+
+        if self.codes is not None:
+            codes = np.zeros((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+            codes[:self.count] = self.codes[:self.count]
+            self.codes = codes
+
+    def mark_deleted(self, rows: list, persist: bool = True):
+        if len(rows) == 0:
+            return
+
+        if persist:
+            with open(self.get_file_path(self.DELETED_FILE), "a") as f:
+                f.write("".join([ f"{row}\n" for row in rows ]))
+
+        for row in rows:
+            self.alive[row] = False
+            record_id = self.ids[row]
+            if self.id_rows.get(record_id) == row:
+                del self.id_rows[record_id]
+
+    def append(self, record_ids: list, vectors: list, texts: list, metadata: list):
+        vectors = self.prepare_vectors(vectors)
+
+        with self.lock:
+            start = self.count
+            end = start + len(record_ids)
+
+            # inserting an existing id overwrites it
+            self.mark_deleted([ self.id_rows[record_id] for record_id in record_ids if record_id in self.id_rows ])
+
+            self.ensure_capacity(end)
+            self.vectors[start:end] = vectors
+            self.vectors.flush()
+
+            if self.codes is not None:
+                self.write_codes(start=start, end=end)
+
+            with open(self.get_file_path(self.IDS_FILE), "a") as f:
+                f.write("".join([ json.dumps(record_id) + "\n" for record_id in record_ids ]))
+
+            with open(self.get_file_path(self.PAYLOAD_FILE), "ab") as f:
+                offset = f.tell()
+                for text, meta in zip(texts, metadata):
+                    line = (json.dumps({ "text": text, "metadata": meta }) + "\n").encode("utf-8")
+                    self.payload_offsets.append(offset)
+                    f.write(line)
+                    offset += len(line)
+
+            for row, record_id in enumerate(record_ids, start=start):
+                self.ids.append(record_id)
+                self.id_rows[record_id] = row
+
+            self.alive[start:end] = True
+            self.count = end
+            self.write_meta(self.path, self.get_meta())
+
+    def delete(self, record_ids: list):
+        with self.lock:
+            self.mark_deleted([ self.id_rows[record_id] for record_id in record_ids if record_id in self.id_rows ])
+
+    def compact_if_needed(self):
+        # delta reindexing overwrites and deletes rows, without compaction the files and
+        # the scan cost would grow with every reindex
+        with self.lock:
+            deleted_count = self.count - len(self.id_rows)
+
+            if deleted_count < self.COMPACT_MIN_DELETED_ROWS or deleted_count < self.count * self.COMPACT_DELETED_SHARE:
+                return False
+
+            self.compact()
+
+        return True
+
+    def write_compacted(self, path: str, live: np.ndarray):
+        # the live rows, in order, as a collection of its own under path
+        capacity = max(self.INITIAL_CAPACITY, len(live))
+
+        with open(os.path.join(path, self.VECTORS_FILE), "wb") as f:
+            for i in range(0, len(live), self.SCORE_CHUNK_SIZE):
+                np.asarray(self.vectors[live[i:i + self.SCORE_CHUNK_SIZE]], dtype=np.float32).tofile(f)
+            f.truncate(capacity * self.embedding_size * 4)
+
+        with open(os.path.join(path, self.IDS_FILE), "w") as f:
+            f.write("".join([ json.dumps(self.ids[row]) + "\n" for row in live ]))
+
+        with open(self.get_file_path(self.PAYLOAD_FILE), "rb") as source, \
+             open(os.path.join(path, self.PAYLOAD_FILE), "wb") as target:
+            for row, line in enumerate(source):
+                if row >= self.count:
+                    break
+                if self.alive[row]:
+                    target.write(line)
+
+        open(os.path.join(path, self.DELETED_FILE), "wb").close()
+
+        if self.codes is not None:
+            self.codes[live].tofile(os.path.join(path, self.CODES_FILE))
+
+        self.write_meta(path, {
+            **self.get_meta(),
+            "count": len(live),
+            "capacity": capacity,
+            "quantization_scale_count": len(live) if self.quantization_scale is not None else 0,
+            "codes_generation": 0,
+        })
+
+    def compact(self):
+        # written next to the collection then swapped in, see recover for a crash in between
+        with self.lock, self.compaction_lock:
+            live = np.flatnonzero(self.alive[:self.count])
+
+            compact_path = self.path + self.COMPACT_SUFFIX
+            if os.path.exists(compact_path):
+                shutil.rmtree(compact_path)
+            os.makedirs(compact_path)
+
+            self.write_compacted(compact_path, live)
+
+            old_path = self.path + self.OLD_SUFFIX
+            os.rename(self.path, old_path)
+            os.rename(compact_path, self.path)
+            shutil.rmtree(old_path)
+
+            self.generation += 1
+            self.load()
+
+    @classmethod
+    def recover(cls, path: str):
+        # finishes or rolls back a compaction interrupted by a crash. The compacted
+        # directory is complete once the collection directory was moved away
+        compact_path, old_path = path + cls.COMPACT_SUFFIX, path + cls.OLD_SUFFIX
+
+        if os.path.exists(compact_path):
+            if os.path.exists(path):
+                shutil.rmtree(compact_path)
+            else:
+                os.rename(compact_path, path)
+
+        if os.path.exists(old_path) and os.path.exists(path):
+            shutil.rmtree(old_path)
+
+    def list_ids(self):
+        with self.lock:
+            return list(self.id_rows.keys())
+
+    def get_payloads(self, rows: list):
+        with open(self.get_file_path(self.PAYLOAD_FILE), "rb") as f:
+            payloads = []
+            for row in rows:
+                f.seek(self.payload_offsets[row])
+                payloads.append(json.loads(f.readline()))
+
+        return payloads
+
+    def get_snapshot(self):
+        # views that stay valid even if a concurrent insert grows the matrix
+        with self.lock:
+            return self.vectors[:self.count], self.alive[:self.count].copy()
+
+    def search(self, vectors: list, limit: int):
+        # returns a list of (rows, scores) per query vector, best match first
+        queries = self.prepare_vectors(vectors)
+
+        if self.codes is not None:
+            return self.search_quantized(queries=queries, limit=limit)
+
+        matrix, alive = self.get_snapshot()
+
+        limit = min(limit, int(alive.sum()))
+        if limit <= 0:
+            return [ ([], []) for _ in range(len(queries)) ]
+
+        scores = queries @ matrix.T
+        scores[:, ~alive] = -np.inf
+
+        return self.top_k(scores=scores, limit=limit)
+
+    def get_binary_query_tables(self, queries: np.ndarray):
+        # the float query is scored against the codes (asymmetric distance), which ranks far
+        # better than the hamming distance to the binarized query. Table j of a query holds,
+        # for every value of code byte j, the sum of the query dimensions whose bit is set
+        code_size = self.get_code_size()
+        padded = np.zeros((len(queries), code_size * 8), dtype=np.float32)
+        padded[:, :self.embedding_size] = queries
+
+        return padded.reshape(len(queries), code_size, 8) @ self.BYTE_BITS.T
+
+    def get_quantized_scores(self, queries: np.ndarray, codes: np.ndarray):
+        # approximate scores, only their order matters
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+
+        is_binary = self.quantization == VectorQuantizationEnum.BINARY.value
+        if is_binary:
+            query_tables = self.get_binary_query_tables(queries)
+            byte_positions = np.arange(codes.shape[1])[None, :]
+
+        for i in range(0, len(codes), self.SCORE_CHUNK_SIZE):
+            chunk = codes[i:i + self.SCORE_CHUNK_SIZE]
+
+            if is_binary:
+                for j, query_table in enumerate(query_tables):
+                    scores[j, i:i + len(chunk)] = query_table[byte_positions, chunk].sum(axis=1)
+            else:
+                scores[:, i:i + len(chunk)] = (chunk.astype(np.float32) @ queries.T).T
+
+        return scores
+
+    def get_candidates_count(self, limit: int, points_count: int):
+        # the points rescored with their float32 vectors
+        oversampling = self.oversampling
+        if self.quantization == VectorQuantizationEnum.BINARY.value:
+            oversampling = self.binary_oversampling
+
+        return min(points_count, max(int(np.ceil(limit * oversampling)), self.min_candidates, limit))
+
+    def search_quantized(self, queries: np.ndarray, limit: int):
+        with self.lock:
+            matrix, alive = self.get_snapshot()
+            codes = self.codes[:self.count]
+
+        points_count = int(alive.sum())
+        limit = min(limit, points_count)
+        if limit <= 0:
+            return [ ([], []) for _ in range(len(queries)) ]
+
+        scores = self.get_quantized_scores(queries=queries, codes=codes)
+        scores[:, ~alive] = -np.inf
+
+        candidates_count = self.get_candidates_count(limit=limit, points_count=points_count)
+        candidates = self.top_k(scores=scores, limit=candidates_count)
+
+        # rescore the candidates with their original vectors
+        results = []
+        for query, (rows, _) in zip(queries, candidates):
+            rows = np.asarray(rows)
+            exact_scores = (matrix[rows] @ query)[None, :]
+            results.extend(self.top_k(scores=exact_scores, limit=limit, rows=rows))
+
+        return results
+
+    def top_k(self, scores: np.ndarray, limit: int, rows: np.ndarray = None):
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        if rows is not None:
+            top = rows[top]
+
+        return [
+            (top[i].tolist(), top_scores[i].tolist())
+            for i in range(top.shape[0])
+        ]
+
+    def search_documents(self, vectors: list, limit: int):
+        # returns a list of (payloads, scores) per query vector, best match first
+        while True:
+            generation = self.generation
+            results = self.search(vectors=vectors, limit=limit)
+
+            with self.compaction_lock:
+                # compacted during the search, the rows point to other points now
+                if generation != self.generation:
+                    continue
+
+                return [ (self.get_payloads(rows), scores) for rows, scores in results ]
+
+    def flush(self):
+        with self.lock:
+            self.vectors.flush()
+
+
+class NumpyDBProvider(VectorDBInterface):
+
+    def __init__(self, db_path: str, distance_method: str, quantization_oversampling: float = 2.0,
+                       binary_quantization_oversampling: float = 64.0, quantization_min_candidates: int = 100):
+
+        self.db_path = db_path
+        self.quantization_oversampling = quantization_oversampling
+        self.binary_quantization_oversampling = binary_quantization_oversampling
+        self.quantization_min_candidates = quantization_min_candidates
+        self.distance_method = DistanceMethodEnum.COSINE.value
+
+        if distance_method == DistanceMethodEnum.DOT.value:
+            self.distance_method = DistanceMethodEnum.DOT.value
+
+        self.collections = {}
+        self.lock = threading.RLock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        os.makedirs(self.db_path, exist_ok=True)
+
+        for name in os.listdir(self.db_path):
+            if name.endswith(NumpyCollection.COMPACT_SUFFIX) or name.endswith(NumpyCollection.OLD_SUFFIX):
+                NumpyCollection.recover(os.path.join(self.db_path, os.path.splitext(name)[0]))
+
+    def disconnect(self):
+        with self.lock:
+            for collection in self.collections.values():
+                collection.flush()
+            self.collections = {}
+
+    def get_collection_path(self, collection_name: str):
+        # collection names end up as directory names
+        if not re.fullmatch(r"[\w\-]+", collection_name):
+            raise ValueError(f"Invalid collection name: {collection_name}")
+
+        return os.path.join(self.db_path, collection_name)
+
+    def get_collection_options(self):
+        return {
+            "oversampling": self.quantization_oversampling,
+            "binary_oversampling": self.binary_quantization_oversampling,
+            "min_candidates": self.quantization_min_candidates,
+        }
+
+    def open_collection(self, collection_path: str):
+        return NumpyCollection(collection_path, **self.get_collection_options())
+
+    def create_new_collection(self, collection_path: str, embedding_size: int, quantization: str = None):
+        return NumpyCollection.create(collection_path, embedding_size=embedding_size,
+                                      distance_method=self.distance_method,
+                                      quantization=quantization,
+                                      **self.get_collection_options())
+
+    def get_collection(self, collection_name: str):
+        with self.lock:
+            collection = self.collections.get(collection_name)
+
+            if collection is None and self.is_collection_existed(collection_name=collection_name):
+                collection = self.open_collection(self.get_collection_path(collection_name))
+                self.collections[collection_name] = collection
+
+            return collection
+
+    def is_collection_existed(self, collection_name: str) -> bool:
+        return os.path.exists(
+            os.path.join(self.get_collection_path(collection_name), NumpyCollection.META_FILE)
+        )
+
+    def list_all_collections(self) -> List:
+        return [
+            name for name in sorted(os.listdir(self.db_path))
+            if re.fullmatch(r"[\w\-]+", name)
+            and os.path.exists(os.path.join(self.db_path, name, NumpyCollection.META_FILE))
+        ]
+
+    def get_collection_info(self, collection_name: str) -> dict:
+        collection = self.get_collection(collection_name=collection_name)
+        if collection is None:
+            return None
+
+        return {
+            **collection.get_meta(),
+            "points_count": len(collection.id_rows),
+        }
+
+    def delete_collection(self, collection_name: str):
+
+        with self.lock:
+            self.collections.pop(collection_name, None)
+
+            if self.is_collection_existed(collection_name=collection_name):
+                shutil.rmtree(self.get_collection_path(collection_name))
+
+    def create_collection(self, collection_name: str,
+                                embedding_size:int,
+                                do_reset: bool = False,
+                                quantization: str = None):
+
+        with self.lock:
+            if do_reset:
+                _ = self.delete_collection(collection_name=collection_name)
+
+            if not self.is_collection_existed(collection_name=collection_name):
+                self.collections[collection_name] = self.create_new_collection(
+                    self.get_collection_path(collection_name), embedding_size=embedding_size,
+                    quantization=quantization
+                )
+                return True
+
+        return False
+
+    def insert_one(self, collection_name: str, text: str, vector: list,
+                         metadata: dict = None,
+                         record_id: str = None):
+
+        return self.insert_many(collection_name=collection_name, texts=[text], vectors=[vector],
+                                metadata=[metadata], record_ids=[record_id] if record_id is not None else None)
+
+    def insert_many(self, collection_name: str, texts: list,
+                          vectors: list, metadata: list = None,
+                          record_ids: list = None, batch_size: int = 50):
+
+        collection = self.get_collection(collection_name=collection_name)
+        if collection is None:
+            self.logger.error(f"Can't insert documents to non existed collection: {collection_name}")
+            return False
+
+        if metadata is None:
+            metadata = [None] * len(texts)
+
+        if record_ids is None:
+            record_ids = list(range(0, len(texts)))
+
+        try:
+            collection.append(record_ids=record_ids, vectors=vectors, texts=texts, metadata=metadata)
+            collection.compact_if_needed()
+        except Exception as e:
+            self.logger.error(f"Error while inserting documents: {e}")
+            return False
+
+        return True
+
+    def list_record_ids(self, collection_name: str) -> List:
+        collection = self.get_collection(collection_name=collection_name)
+        if collection is None:
+            return []
+
+        return collection.list_ids()
+
+    def delete_records(self, collection_name: str, record_ids: list, batch_size: int = 500):
+        collection = self.get_collection(collection_name=collection_name)
+        if collection is None:
+            return False
+
+        collection.delete(record_ids=record_ids)
+        collection.compact_if_needed()
+        return True
+
+    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
+        results = self.search_batch(collection_name=collection_name, vectors=[vector], limit=limit)
+
+        if not results or len(results[0]) == 0:
+            return None
+
+        return results[0]
+
+    def search_batch(self, collection_name: str, vectors: list, limit: int = 5):
+        collection = self.get_collection(collection_name=collection_name)
+        if collection is None:
+            return None
+
+        results = []
+        for payloads, scores in collection.search_documents(vectors=vectors, limit=limit):
+            results.append([
+                RetrievedDocument(**{
+                    "score": score,
+                    "text": payload["text"],
+                })
+                for payload, score in zip(payloads, scores)
+            ])
+
+        return results
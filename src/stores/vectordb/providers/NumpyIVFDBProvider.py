@@ -0,0 +1,256 @@
+from .NumpyDBProvider import NumpyDBProvider, NumpyCollection
+from helpers.concurrency import get_thread_pool
+import numpy as np
+import logging
+import json
+import os
+
+
+class IVFCollection(NumpyCollection):
+
+    CENTROIDS_FILE = "centroids.npy"
+    ASSIGNMENTS_FILE = "assignments.i32"
+
+    # below this size brute force is as fast as probing and k-means has too little to learn from
+    MIN_TRAIN_SIZE = 4096
+    TRAIN_SAMPLES_PER_LIST = 64
+    TRAIN_ITERATIONS = 10
+    ASSIGN_CHUNK_SIZE = 8192
+
+    # inverted file index over a NumpyCollection: the points are clustered with k-means
+    # and a query only scores the points of the nprobe lists whose centroids are nearest.
+    # The lists are retrained whenever the collection doubles in size since the last training.
+    # Training runs on the thread pool over a snapshot of the rows, inserts and searches go on
+    # meanwhile with the previous lists, or with exact search before the first training.
+
+    def __init__(self, path: str, nlist: int = 0, nprobe: int = 16):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.training = None
+        self.logger = logging.getLogger(__name__)
+
+        super().__init__(path)
+
+    def load(self):
+        super().load()
+
+        self.centroids = None
+        self.trained_count = 0
+        self.lists = None
+
+        self.assignments = np.zeros(self.capacity, dtype=np.int32)
+        self.load_index()
+
+    def load_index(self):
+        with open(self.get_file_path(self.META_FILE), "r") as f:
+            self.trained_count = json.load(f).get("trained_count", 0)
+
+        if not os.path.exists(self.get_file_path(self.CENTROIDS_FILE)):
+            return
+
+        self.centroids = np.load(self.get_file_path(self.CENTROIDS_FILE))
+
+        assignments = np.fromfile(self.get_file_path(self.ASSIGNMENTS_FILE), dtype=np.int32)[:self.count]
+        self.assignments[:len(assignments)] = assignments
+
+        # rows committed after the last assignments write
+        if len(assignments) < self.count:
+            self.assign_rows(start=len(assignments), end=self.count)
+
+    def get_meta(self):
+        return {
+            **super().get_meta(),
+            "trained_count": self.trained_count,
+            "nlist": 0 if self.centroids is None else len(self.centroids),
+        }
+
+    def ensure_capacity(self, size: int):
+        super().ensure_capacity(size)
+
+        if len(self.assignments) < self.capacity:
+            assignments = np.zeros(self.capacity, dtype=np.int32)
+            assignments[:len(self.assignments)] = self.assignments
+            self.assignments = assignments
+
+    def append(self, record_ids: list, vectors: list, texts: list, metadata: list):
+        with self.lock:
+            start = self.count
+            super().append(record_ids=record_ids, vectors=vectors, texts=texts, metadata=metadata)
+
+            if self.centroids is not None:
+                self.assign_rows(start=start, end=self.count)
+
+            if self.training is None and self.needs_training():
+                self.training = get_thread_pool().submit(self.train)
+
+    def needs_training(self):
+        points_count = len(self.id_rows)
+
+        if self.centroids is None:
+            return points_count >= self.MIN_TRAIN_SIZE
+
+        return points_count >= 2 * self.trained_count
+
+    def get_nearest_lists(self, vectors: np.ndarray, centroids: np.ndarray, n: int):
+        # squared L2 distance without the constant |v|^2 term
+        distances = np.sum(centroids ** 2, axis=1) - 2 * (vectors @ centroids.T)
+
+        if n == 1:
+            return np.argmin(distances, axis=1)[:, None]
+
+        if n >= len(centroids):
+            return np.argsort(distances, axis=1)
+
+        return np.argpartition(distances, n - 1, axis=1)[:, :n]
+
+    def get_labels(self, vectors: np.ndarray, centroids: np.ndarray):
+        return np.concatenate([
+            self.get_nearest_lists(np.asarray(vectors[i:i + self.ASSIGN_CHUNK_SIZE]), centroids, 1)[:, 0]
+            for i in range(0, len(vectors), self.ASSIGN_CHUNK_SIZE)
+        ]).astype(np.int32)
+
+    def assign_rows(self, start: int, end: int):
+        if end <= start:
+            return
+
+        self.assignments[start:end] = self.get_labels(self.vectors[start:end], self.centroids)
+        self.lists = None
+
+        with open(self.get_file_path(self.ASSIGNMENTS_FILE), "ab") as f:
+            f.truncate(start * 4)
+            self.assignments[start:end].tofile(f)
+
+    def fit_centroids(self, vectors: np.ndarray, rows: np.ndarray):
+        nlist = self.nlist
+        if nlist <= 0:
+            # sqrt scaling keeps both the centroid scan and the probed lists sub-linear
+            nlist = int(4 * np.sqrt(len(rows)))
+        nlist = max(1, min(nlist, len(rows)))
+
+        rng = np.random.default_rng(0)
+        sample_size = min(len(rows), nlist * self.TRAIN_SAMPLES_PER_LIST)
+        samples = np.asarray(vectors[np.sort(rng.choice(rows, size=sample_size, replace=False))])
+
+        centroids = samples[rng.choice(len(samples), size=nlist, replace=False)].copy()
+        for _ in range(self.TRAIN_ITERATIONS):
+            labels = self.get_labels(samples, centroids)
+
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+
+            # empty lists keep their previous centroid
+            filled = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            sums = np.add.reduceat(samples[order], starts, axis=0)
+            centroids[filled] = sums / counts[filled, None]
+
+        return centroids
+
+    def train(self):
+        try:
+            with self.lock:
+                generation = self.generation
+                vectors, alive = self.get_snapshot()
+
+            rows = np.flatnonzero(alive)
+            centroids = self.fit_centroids(vectors, rows)
+            labels = self.get_labels(vectors, centroids)
+
+            with self.lock:
+                # a compaction renumbered the rows, the next insert trains again
+                if generation != self.generation:
+                    return
+
+                self.swap_index(centroids=centroids, labels=labels, trained_count=len(rows))
+        except Exception as e:
+            self.logger.error(f"Error while training the IVF lists of {self.path}: {e}")
+        finally:
+            with self.lock:
+                self.training = None
+
+    def swap_index(self, centroids: np.ndarray, labels: np.ndarray, trained_count: int):
+        self.centroids = centroids
+        self.trained_count = trained_count
+        self.assignments[:len(labels)] = labels
+        # rows inserted while training
+        if len(labels) < self.count:
+            self.assignments[len(labels):self.count] = self.get_labels(self.vectors[len(labels):self.count], centroids)
+        self.lists = None
+
+        centroids_path = self.get_file_path(self.CENTROIDS_FILE)
+        with open(centroids_path + ".tmp", "wb") as f:
+            np.save(f, centroids)
+
+        assignments_path = self.get_file_path(self.ASSIGNMENTS_FILE)
+        self.assignments[:self.count].tofile(assignments_path + ".tmp")
+
+        os.replace(assignments_path + ".tmp", assignments_path)
+        os.replace(centroids_path + ".tmp", centroids_path)
+        self.write_meta(self.path, self.get_meta())
+
+    def write_compacted(self, path: str, live: np.ndarray):
+        super().write_compacted(path, live)
+
+        if self.centroids is None:
+            return
+
+        with open(os.path.join(path, self.CENTROIDS_FILE), "wb") as f:
+            np.save(f, self.centroids)
+
+        self.assignments[live].tofile(os.path.join(path, self.ASSIGNMENTS_FILE))
+
+    def get_lists(self):
+        # rows grouped by list, list i is order[boundaries[i]:boundaries[i + 1]]
+        if self.lists is None:
+            assignments = self.assignments[:self.count]
+            order = np.argsort(assignments, kind="stable")
+            boundaries = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self.lists = (order, boundaries)
+
+        return self.lists
+
+    def search(self, vectors: list, limit: int):
+        with self.lock:
+            centroids = self.centroids
+            if centroids is not None:
+                order, boundaries = self.get_lists()
+                matrix, alive = self.get_snapshot()
+
+        if centroids is None:
+            return super().search(vectors=vectors, limit=limit)
+
+        queries = self.prepare_vectors(vectors)
+        probes = self.get_nearest_lists(queries, centroids, min(self.nprobe, len(centroids)))
+
+        results = []
+        for query, probe in zip(queries, probes):
+            rows = np.concatenate([ order[boundaries[i]:boundaries[i + 1]] for i in probe ])
+            rows = rows[alive[rows]]
+
+            k = min(limit, len(rows))
+            if k <= 0:
+                results.append(([], []))
+                continue
+
+            scores = (matrix[rows] @ query)[None, :]
+            results.extend(self.top_k(scores=scores, limit=k, rows=rows))
+
+        return results
+
+
+class NumpyIVFDBProvider(NumpyDBProvider):
+
+    def __init__(self, db_path: str, distance_method: str, nlist: int = 0, nprobe: int = 16):
+        super().__init__(db_path=db_path, distance_method=distance_method)
+
+        self.nlist = nlist
+        self.nprobe = nprobe
+
+    def open_collection(self, collection_path: str):
+        return IVFCollection(collection_path, nlist=self.nlist, nprobe=self.nprobe)
+
+    def create_new_collection(self, collection_path: str, embedding_size: int, quantization: str = None):
+        # the inverted lists already bound the rows a query reads, IVF collections are not quantized
+        return IVFCollection.create(collection_path, embedding_size=embedding_size,
+                                    distance_method=self.distance_method,
+                                    nlist=self.nlist, nprobe=self.nprobe)
@@ -1,19 +1,56 @@
-from qdrant_client import QdrantClient, models
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
 from ..VectorDBInterface import VectorDBInterface
-from ..VectorDBEnum import  DistanceMethodEnum
+from ..VectorDBEnum import  DistanceMethodEnum, VectorQuantizationEnum
 import logging
+import asyncio
+import threading
 from typing import List
 from models.db_schemes import RetrievedDocument
+from concurrent.futures import ThreadPoolExecutor
 
 
 class QdrantDBProvider(VectorDBInterface):
-    
-    def __init__(self, db_path: str, distance_method: str):
-        
+
+    # server connections are shared by every provider of the process with the same settings,
+    # {connection_key: {"client", "async_client", "refs"}}
+    shared_clients = {}
+    shared_clients_lock = threading.Lock()
+
+    def __init__(self, db_path: str, distance_method: str,
+                       url: str = None, api_key: str = None,
+                       prefer_grpc: bool = False, grpc_port: int = 6334,
+                       timeout: int = None,
+                       upsert_parallel: int = 1, upsert_wait: bool = True,
+                       hnsw_m: int = None, hnsw_ef_construct: int = None,
+                       hnsw_ef: int = None, indexing_threshold: int = None,
+                       quantization_oversampling: float = 2.0, quantization_rescore: bool = True,
+                       quantization_always_ram: bool = True):
+
         self.client = None
+        self.async_client = None
+        self.upload_executor = None
+
         self.db_path = db_path
         self.distance_method = None
 
+        self.url = url
+        self.api_key = api_key
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.timeout = timeout
+
+        self.upsert_parallel = max(1, upsert_parallel or 1)
+        self.upsert_wait = upsert_wait
+
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.indexing_threshold = indexing_threshold
+
+        self.quantization_oversampling = quantization_oversampling
+        self.quantization_rescore = quantization_rescore
+        self.quantization_always_ram = quantization_always_ram
+
 
         if distance_method == DistanceMethodEnum.COSINE.value:
             self.distance_method = models.Distance.COSINE
@@ -22,18 +59,85 @@ class QdrantDBProvider(VectorDBInterface):
 
         self.logger = logging.getLogger(__name__)
 
-    
+    def is_remote(self) -> bool:
+        return bool(self.url)
+
+    def get_connection_key(self):
+        return (self.url, self.api_key, self.prefer_grpc, self.grpc_port, self.timeout)
+
     def connect(self):
-        self.client = QdrantClient(
-            path= self.db_path
-        )
-    
+
+        if not self.is_remote():
+            self.client = QdrantClient(
+                path= self.db_path
+            )
+
+            # the embedded (path) client is not safe to share between threads,
+            # so async calls are serialized on a dedicated worker
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-local")
+            return
+
+        client_args = {
+            "url": self.url,
+            "api_key": self.api_key or None,
+            "prefer_grpc": self.prefer_grpc,
+            "grpc_port": self.grpc_port,
+            "timeout": self.timeout,
+        }
+
+        with self.shared_clients_lock:
+            connection = self.shared_clients.get(self.get_connection_key())
+
+            if connection is None:
+                connection = {
+                    "client": QdrantClient(**client_args),
+                    "async_client": AsyncQdrantClient(**client_args),
+                    "refs": 0,
+                }
+                self.shared_clients[self.get_connection_key()] = connection
+
+            connection["refs"] += 1
+
+        self.client = connection["client"]
+        self.async_client = connection["async_client"]
+
+        self.upload_executor = ThreadPoolExecutor(max_workers=self.upsert_parallel,
+                                                  thread_name_prefix="qdrant-upload")
+
     def disconnect(self):
+
+        if self.upload_executor is not None:
+            self.upload_executor.shutdown(wait=True)
+            self.upload_executor = None
+
+        if self.is_remote() and self.client is not None:
+            with self.shared_clients_lock:
+                connection = self.shared_clients.get(self.get_connection_key())
+                connection["refs"] -= 1
+
+                if connection["refs"] <= 0:
+                    self.shared_clients.pop(self.get_connection_key())
+                    connection["client"].close()
+
         self.client = None
-    
+        self.async_client = None
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def adisconnect(self):
+
+        async_client = self.async_client
+        self.disconnect()
+
+        # the last provider on the connection closes the async channels as well
+        if async_client is not None and self.get_connection_key() not in self.shared_clients:
+            await async_client.close()
+
     def is_collection_existed(self, collection_name: str) -> bool:
         return self.client.collection_exists(collection_name= collection_name)
-    
+
     def list_all_collections(self) -> List:
         return self.client.get_collections()
 
@@ -45,58 +149,93 @@ class QdrantDBProvider(VectorDBInterface):
         if self.is_collection_existed(collection_name= collection_name):
             self.client.delete_collection(collection_name= collection_name)
 
+    def get_hnsw_config(self):
+
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+
+        return models.HnswConfigDiff(
+            m= self.hnsw_m,
+            ef_construct= self.hnsw_ef_construct
+        )
+
+    def get_optimizers_config(self):
+
+        if self.indexing_threshold is None:
+            return None
+
+        return models.OptimizersConfigDiff(
+            indexing_threshold= self.indexing_threshold
+        )
+
+    def get_quantization_config(self, quantization: str = None):
+
+        if quantization == VectorQuantizationEnum.SCALAR.value:
+            return models.ScalarQuantization(
+                scalar= models.ScalarQuantizationConfig(
+                    type= models.ScalarType.INT8,
+                    quantile= 0.99,
+                    always_ram= self.quantization_always_ram
+                )
+            )
+
+        if quantization == VectorQuantizationEnum.BINARY.value:
+            return models.BinaryQuantization(
+                binary= models.BinaryQuantizationConfig(
+                    always_ram= self.quantization_always_ram
+                )
+            )
+
+        return None
+
+    def get_search_params(self):
+        # collections without quantization ignore the quantization params
+        return models.SearchParams(
+            hnsw_ef= self.hnsw_ef,
+            quantization= models.QuantizationSearchParams(
+                rescore= self.quantization_rescore,
+                oversampling= self.quantization_oversampling
+            )
+        )
+
     def create_collection(self, collection_name: str,
                                 embedding_size:int,
-                                do_reset: bool = False):
-        
+                                do_reset: bool = False,
+                                quantization: str = None):
+
         if do_reset:
             _ = self.delete_collection(collection_name= collection_name)
-        
+
         if not self.is_collection_existed(collection_name= collection_name):
             _ = self.client.create_collection(
                 collection_name= collection_name,
                 vectors_config= models.VectorParams(
                     size= embedding_size,
                     distance= self.distance_method
-                )
+                ),
+                hnsw_config= self.get_hnsw_config(),
+                optimizers_config= self.get_optimizers_config(),
+                quantization_config= self.get_quantization_config(quantization)
             )
 
             return True
-        
+
         return False
 
     def insert_one(self, collection_name: str, text: str, vector: list,
-                         metadata: dict = None, 
+                         metadata: dict = None,
                          record_id: str = None):
-                        
+
         if not self.is_collection_existed(collection_name= collection_name):
             self.logger.error(f"Can't insert document to non existed collection: {collection_name}")
             return False
-        
-        try:
-            _ = self.client.upload_records(
-                collection_name= collection_name,
-                records= [
-                    models.Record(
-                        id= [record_id],
-                        vector= vector,
-                        payload= {
-                            "text": text,
-                            "metadata": metadata
-                        }
-                    )
-                ]
-            )
-        except Exception as e:
-            self.logger.error(f"Error while inserting document {e}")
-            return False
-        
-        return True
 
-    def insert_many(self, collection_name: str, texts: list, 
-                          vectors: list, metadata: list = None, 
-                          record_ids: list = None, batch_size: int = 50):
-        
+        return self.insert_many(collection_name=collection_name, texts=[text], vectors=[vector],
+                                metadata=[metadata], record_ids=[record_id] if record_id is not None else None)
+
+    def get_point_batches(self, texts: list, vectors: list, metadata: list = None,
+                                record_ids: list = None, batch_size: int = 50):
+
         if metadata is None:
             metadata = [None] * len(texts)
 
@@ -106,46 +245,101 @@ class QdrantDBProvider(VectorDBInterface):
         for i in range(0, len(texts), batch_size):
             batch_end = i + batch_size
 
-            batch_texts = texts[i:batch_end]
-            batch_vectors = vectors[i:batch_end]
-            batch_metadata = metadata[i:batch_end]
-            batch_record_ids = record_ids[i:batch_end]
-
-            batch_records = [
-                models.Record(
-                    id=batch_record_ids[x],
-                    vector=batch_vectors[x],
+            yield [
+                models.PointStruct(
+                    id=record_ids[x],
+                    vector=vectors[x],
                     payload={
-                        "text": batch_texts[x], "metadata": batch_metadata[x]
+                        "text": texts[x], "metadata": metadata[x]
                     }
                 )
 
-                for x in range(len(batch_texts))
+                for x in range(i, min(batch_end, len(texts)))
             ]
 
+    def upsert_batch(self, collection_name: str, points: list):
+        # with wait=False the server acknowledges once the batch is in its write ahead log
+        return self.client.upsert(
+            collection_name=collection_name,
+            points=points,
+            wait=self.upsert_wait,
+        )
+
+    def insert_many(self, collection_name: str, texts: list,
+                          vectors: list, metadata: list = None,
+                          record_ids: list = None, batch_size: int = 50):
+
+        batches = self.get_point_batches(texts=texts, vectors=vectors, metadata=metadata,
+                                         record_ids=record_ids, batch_size=batch_size)
+
+        if self.upload_executor is None:
+            for points in batches:
+                try:
+                    _ = self.upsert_batch(collection_name=collection_name, points=points)
+                except Exception as e:
+                    self.logger.error(f"Error while inserting batch: {e}")
+                    return False
+
+            return True
+
+        futures = [
+            self.upload_executor.submit(self.upsert_batch, collection_name, points)
+            for points in batches
+        ]
+
+        is_inserted = True
+        for future in futures:
+            try:
+                _ = future.result()
+            except Exception as e:
+                self.logger.error(f"Error while inserting batch: {e}")
+                is_inserted = False
+
+        return is_inserted
+
+
+    def list_record_ids(self, collection_name: str) -> List:
+
+        record_ids = []
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+
+            record_ids.extend([ str(point.id) for point in points ])
+
+            if offset is None:
+                break
+
+        return record_ids
+
+    def delete_records(self, collection_name: str, record_ids: list, batch_size: int = 500):
+
+        for i in range(0, len(record_ids), batch_size):
             try:
-                _ = self.client.upload_records(
+                _ = self.client.delete(
                     collection_name=collection_name,
-                    records=batch_records,
+                    points_selector=models.PointIdsList(
+                        points=record_ids[i:i + batch_size]
+                    ),
                 )
             except Exception as e:
-                self.logger.error(f"Error while inserting batch: {e}")
+                self.logger.error(f"Error while deleting batch: {e}")
                 return False
 
         return True
 
-
-    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
-
-        results = self.client.search(
-            collection_name=collection_name,
-            query_vector=vector,
-            limit=limit
-        )
+    def get_retrieved_documents(self, results: list):
 
         if not results or len(results) == 0:
             return None
-        
+
         return [
             RetrievedDocument(**{
                 "score": result.score,
@@ -154,4 +348,101 @@ class QdrantDBProvider(VectorDBInterface):
             for result in results
         ]
 
-        
\ No newline at end of file
+    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
+
+        results = self.client.search(
+            collection_name=collection_name,
+            query_vector=vector,
+            limit=limit,
+            search_params=self.get_search_params()
+        )
+
+        return self.get_retrieved_documents(results)
+
+    def get_search_requests(self, vectors: list, limit: int):
+        return [
+            models.SearchRequest(
+                vector=vector,
+                limit=limit,
+                with_payload=True,
+                params=self.get_search_params()
+            )
+            for vector in vectors
+        ]
+
+    def search_batch(self, collection_name: str, vectors: list, limit: int = 5):
+
+        batch_results = self.client.search_batch(
+            collection_name=collection_name,
+            requests=self.get_search_requests(vectors=vectors, limit=limit)
+        )
+
+        return [ self.get_retrieved_documents(results) for results in batch_results ]
+
+    # in server mode the async variants talk to qdrant directly instead of going through a thread
+
+    async def ais_collection_existed(self, collection_name: str) -> bool:
+
+        if self.async_client is None:
+            return await super().ais_collection_existed(collection_name=collection_name)
+
+        return await self.async_client.collection_exists(collection_name= collection_name)
+
+    async def ainsert_many(self, collection_name: str, texts: list,
+                                 vectors: list, metadata: list = None,
+                                 record_ids: list = None, batch_size: int = 50):
+
+        if self.async_client is None:
+            return await super().ainsert_many(collection_name=collection_name, texts=texts,
+                                              vectors=vectors, metadata=metadata,
+                                              record_ids=record_ids, batch_size=batch_size)
+
+        semaphore = asyncio.Semaphore(self.upsert_parallel)
+
+        async def upsert_batch(points: list):
+            async with semaphore:
+                return await self.async_client.upsert(
+                    collection_name=collection_name,
+                    points=points,
+                    wait=self.upsert_wait,
+                )
+
+        batches = self.get_point_batches(texts=texts, vectors=vectors, metadata=metadata,
+                                         record_ids=record_ids, batch_size=batch_size)
+
+        results = await asyncio.gather(*[ upsert_batch(points) for points in batches ],
+                                       return_exceptions=True)
+
+        errors = [ result for result in results if isinstance(result, Exception) ]
+        for error in errors:
+            self.logger.error(f"Error while inserting batch: {error}")
+
+        return len(errors) == 0
+
+    async def asearch_by_vector(self, collection_name: str, vector: list, limit: int = 5):
+
+        if self.async_client is None:
+            return await super().asearch_by_vector(collection_name=collection_name,
+                                                   vector=vector, limit=limit)
+
+        results = await self.async_client.search(
+            collection_name=collection_name,
+            query_vector=vector,
+            limit=limit,
+            search_params=self.get_search_params()
+        )
+
+        return self.get_retrieved_documents(results)
+
+    async def asearch_batch(self, collection_name: str, vectors: list, limit: int = 5):
+
+        if self.async_client is None:
+            return await super().asearch_batch(collection_name=collection_name,
+                                               vectors=vectors, limit=limit)
+
+        batch_results = await self.async_client.search_batch(
+            collection_name=collection_name,
+            requests=self.get_search_requests(vectors=vectors, limit=limit)
+        )
+
+        return [ self.get_retrieved_documents(results) for results in batch_results ]
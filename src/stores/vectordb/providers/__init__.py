@@ -1 +1,3 @@
-from .QdrantDBProvider import QdrantDBProvider
\ No newline at end of file
+from .QdrantDBProvider import QdrantDBProvider
+from .NumpyDBProvider import NumpyDBProvider
+from .NumpyIVFDBProvider import NumpyIVFDBProvider